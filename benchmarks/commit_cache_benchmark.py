@@ -0,0 +1,65 @@
+"""
+Compares the size and load time of the columnar commit cache with the pickled chunks it replaced, on simulated commits.
+Run from the project root with: python -m benchmarks.commit_cache_benchmark
+"""
+import itertools
+import os
+import pickle
+import random
+import tempfile
+import timeit
+from datetime import datetime, timedelta, timezone
+from pydriller.domain.developer import Developer
+from src.infrastructure import commit_cache
+from src.infrastructure import serialize
+from src.models.CustomCommit import CustomCommit
+
+COMMITS = 100_000
+FILES = 20_000
+AUTHORS = 500
+CHUNK_SIZE = 1000
+
+def _simulated_commits(count=COMMITS):
+    random.seed(0)
+    paths = [f"src/main/java/org/apache/project/module{i % 50}/package{i % 300}/Class{i}.java" for i in range(FILES)]
+    paths += [path.replace("src/main", "src/test").replace(".java", "Test.java") for path in paths[:FILES // 2]]
+    authors = [Developer(f"Author {i}", f"author{i}@apache.org") for i in range(AUTHORS)]
+    time_zone = timezone(timedelta(hours=1))
+    start = datetime(2010, 1, 1, tzinfo=time_zone)
+
+    # As when mined, every commit holds its own copies of the paths and of its author
+    return [CustomCommit(f"{i:040x}", [path.encode().decode() for path in random.sample(paths, min(FILES, int(random.paretovariate(1.5))))],
+                         Developer(*vars(random.choice(authors)).values()), start + timedelta(hours=i))
+            for i in range(count)]
+
+def _write_pickled_chunks(file_path, commits, chunk_size):
+    # The commit cache before the columnar format, one pickled list per chunk of commits
+    commits = iter(commits)
+    with open(file_path, "wb") as file:
+        while chunk := list(itertools.islice(commits, chunk_size)):
+            pickle.dump(chunk, file)
+
+def _time(function, repeat=3):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+def main():
+    commits = _simulated_commits()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pickle_path = os.path.join(temp_dir, "repo.pkl")
+        columnar_path = os.path.join(temp_dir, "repo.commits")
+
+        pickle_write = _time(lambda: _write_pickled_chunks(pickle_path, commits, CHUNK_SIZE), repeat=1)
+        columnar_write = _time(lambda: commit_cache.write_commits(columnar_path, commits, CHUNK_SIZE), repeat=1)
+        pickle_load = _time(lambda: [commit for chunk in serialize.deserialize_chunks(pickle_path) for commit in chunk])
+        columnar_load = _time(lambda: commit_cache.read_commits(columnar_path))
+        pickle_size = os.path.getsize(pickle_path)
+        columnar_size = os.path.getsize(columnar_path)
+
+    print(f"{COMMITS} commits, {CHUNK_SIZE} commits per chunk")
+    print(f"Pickle:   {pickle_size / 1e6:6.1f} MB, written in {pickle_write:.2f}s, loaded in {pickle_load:.2f}s")
+    print(f"Columnar: {columnar_size / 1e6:6.1f} MB, written in {columnar_write:.2f}s, loaded in {columnar_load:.2f}s "
+          f"({pickle_size / columnar_size:.1f}x smaller, {pickle_load / columnar_load:.1f}x faster to load)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Compares the memory held by the commits of a repository once loaded for processing, between the previous commit model
+read from pickled chunks and the slotted commit model read from the columnar cache.
+Run from the project root with: python -m benchmarks.commit_memory_benchmark
+"""
+import os
+import tempfile
+import tracemalloc
+from src.infrastructure import commit_cache
+from src.infrastructure import serialize
+from src.models.CustomCommit import CustomCommit
+from benchmarks.commit_cache_benchmark import CHUNK_SIZE, _simulated_commits, _write_pickled_chunks
+
+COMMITS = 300_000
+
+class _DictCommit:
+    """
+    The commit model used before '__slots__', with one list of file names per commit.
+    """
+    def __init__(self, hash, modified_files, author, date):
+        self.hash = hash
+        self.modified_files = list(modified_files)
+        self.author = author
+        self.date = date
+        self.size = len(self.modified_files)
+
+def _measure(load):
+    tracemalloc.start()
+    commits = load()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(commits), memory
+
+def main():
+    commits = _simulated_commits(COMMITS)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pickle_path = os.path.join(temp_dir, "repo.pkl")
+        columnar_path = os.path.join(temp_dir, "repo.commits")
+        legacy_commits = (_DictCommit(commit.hash, commit.modified_files, commit.author, commit.date) for commit in commits)
+        _write_pickled_chunks(pickle_path, legacy_commits, CHUNK_SIZE)
+        commit_cache.write_commits(columnar_path, commits, CHUNK_SIZE)
+        del commits
+
+        _, legacy_memory = _measure(lambda: [commit for chunk in serialize.deserialize_chunks(pickle_path) for commit in chunk])
+        count, memory = _measure(lambda: commit_cache.read_commits(columnar_path))
+
+    print(f"{count} commits")
+    print(f"Dictionary commits, pickled chunks: {legacy_memory / 1e6:6.1f} MB ({legacy_memory / count:.0f} B per commit)")
+    print(f"Slotted commits, columnar cache:    {memory / 1e6:6.1f} MB ({memory / count:.0f} B per commit, "
+          f"{legacy_memory / memory:.1f}x less)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compares the binary search for the nearest implementation commit with the linear scans it replaced, on a simulated history
+whose most popular files are modified thousands of times.
+Run from the project root with: python -m benchmarks.nearest_implementation_benchmark
+"""
+from collections import defaultdict
+import random
+import timeit
+from datetime import datetime, timedelta
+from src.mining import commit_processing as process
+from src.models.CustomCommit import CustomCommit
+from src.models.file_handlers.JavaFileHandler import JavaFileHandler
+
+COMMITS = 100_000
+CLASSES = 2_000
+
+def _linear_find_nearest_implementation(test_file, commits, commit_map, file_handler):
+    """
+    The previous search, which scans every commit modifying the implementation file twice.
+    """
+    candidate_indices = commit_map.get(file_handler.get_implementation_file(test_file[1]), [])
+    if not candidate_indices:
+        return None
+
+    test_index = test_file[0]
+    before_index = max([i for i in candidate_indices if i < test_index], default=None)
+    after_index = min([i for i in candidate_indices if i >= test_index], default=None)
+
+    if after_index == before_index:
+        return after_index
+    if after_index is None:
+        return before_index
+    if before_index is None:
+        return after_index
+    distance_before = commits[test_index].date - commits[before_index].date
+    distance_after = commits[after_index].date - commits[test_index].date
+    return before_index if distance_before <= distance_after else after_index
+
+def _commit_map(commits):
+    """
+    Maps the files to the commits modifying them, as the processing did before the implementation index.
+    """
+    commit_map = defaultdict(list)
+    for i, commit in enumerate(commits):
+        for file in commit.modified_files:
+            commit_map[file].append(i)
+    return commit_map
+
+def _simulated_history():
+    random.seed(0)
+    start = datetime(2010, 1, 1)
+    commits = []
+    for i in range(COMMITS):
+        # Few classes are modified in most commits, as the core classes of a project are
+        classes = {min(CLASSES - 1, int(random.paretovariate(0.8))) for _ in range(random.randint(1, 4))}
+        files = [f"src/org/apache/project/Class{c}{'Test' if random.random() < 0.3 else ''}.java" for c in classes]
+        commits.append(CustomCommit(f"{i:040x}", files, "Author", start + timedelta(minutes=random.randint(0, 60) + i * 60)))
+    return commits
+
+def _categorise(find_nearest_implementation, test_files, commits, commit_map, file_handler):
+    return [find_nearest_implementation(test_file, commits, commit_map, file_handler) for test_file in test_files]
+
+def _time(function, repeat=3):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+def main():
+    file_handler = JavaFileHandler()
+    commits = _simulated_history()
+    test_files = [(i, file) for i, commit in enumerate(commits) for file in commit.modified_files if file_handler.is_test_file(file)]
+    commit_map = _commit_map(commits)
+
+    linear = _categorise(_linear_find_nearest_implementation, test_files, commits, commit_map, file_handler)
+    bisected = _categorise(process.find_nearest_implementation, test_files, commits, commit_map, file_handler)
+    assert linear == bisected, "The binary search found other implementation commits"
+
+    linear_time = _time(lambda: _categorise(_linear_find_nearest_implementation, test_files, commits, commit_map, file_handler), repeat=1)
+    bisected_time = _time(lambda: _categorise(process.find_nearest_implementation, test_files, commits, commit_map, file_handler))
+    hottest = max(len(indices) for indices in commit_map.values())
+
+    print(f"{COMMITS} commits, {len(test_files)} test file modifications, up to {hottest} commits per file")
+    print(f"Linear scans:  {linear_time:.2f}s")
+    print(f"Binary search: {bisected_time:.2f}s ({linear_time / bisected_time:.0f}x faster, identical results)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Compares the single-pass metrics engine with the previous processing of a repository, which traversed its commits and test files
+once per step, on a simulated history. Both must export the same data: tests sit next to their implementation files in the
+simulated history, so matching them through the implementation index finds the same files as the exact paths used before.
+Run from the project root with: python -m benchmarks.repo_metrics_benchmark
+"""
+import random
+import timeit
+import tracemalloc
+from src.mining import commit_processing as process
+from src.models.file_handlers.JavaFileHandler import JavaFileHandler
+from benchmarks.nearest_implementation_benchmark import _commit_map, _simulated_history
+
+AUTHORS = 300
+
+def _previous_average_commit_size(commits, test_files):
+    """
+    The previous 'calculate_average_commit_size', which looked up the commits already counted in a list.
+    """
+    total = 0
+    complete_indexes = []
+    for test_file in test_files:
+        if test_file[0] not in complete_indexes:
+            total += commits[test_file[0]].size
+            complete_indexes.append(test_file[0])
+    return round(total / len(complete_indexes), 1) if complete_indexes else 0
+
+def _previous_author_count(commits, author_counts, test_files, index_to_update):
+    """
+    The previous 'update_author_count', which counted the tests of each author for one category.
+    """
+    for test_file in test_files:
+        author = str(commits[test_file[0]].author).split(',')[0]
+        if author not in author_counts.keys():
+            author_counts[author] = [0, 0, 0]
+        author_counts[author][index_to_update] += 1
+
+def _previous_metrics(commits, file_handler):
+    """
+    The previous processing: gathering the test files, mapping the files to their commits, categorising the test files,
+    then averaging the commit sizes and counting the tests of each author once per category.
+    """
+    test_files = [(i, file) for i, commit in enumerate(commits) for file in commit.modified_files if file_handler.is_test_file(file)]
+    commit_map = _commit_map(commits)
+    categories = ([], [], [])
+    for test_file in test_files:
+        nearest_implementation = process.find_nearest_implementation(test_file, commits, commit_map, file_handler)
+        if nearest_implementation is None:
+            continue
+        if test_file[0] < nearest_implementation:
+            categories[0].append(test_file)
+        elif test_file[0] > nearest_implementation:
+            categories[1].append(test_file)
+        else:
+            categories[2].append(test_file)
+
+    average_sizes = [_previous_average_commit_size(commits, category) for category in categories]
+    average_sizes.append(round(sum(average_sizes) / 3, 1))
+    author_counts = {}
+    for index, category in enumerate(categories):
+        _previous_author_count(commits, author_counts, category, index)
+    return [len(category) for category in categories], average_sizes, author_counts
+
+def _engine_metrics(commits, file_handler):
+    metrics = process.compute_repo_metrics(commits, file_handler)
+    return metrics.test_counts, metrics.average_sizes, metrics.author_counts
+
+def _measure(compute, commits, file_handler, repeat=3):
+    tracemalloc.start()
+    result = compute(commits, file_handler)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    duration = min(timeit.repeat(lambda: compute(commits, file_handler), number=1, repeat=repeat))
+    return result, duration, peak_memory
+
+def main():
+    file_handler = JavaFileHandler()
+    commits = _simulated_history()
+    random.seed(1)
+    for commit in commits:
+        commit.author = f"Author {int(random.paretovariate(1.0)) % AUTHORS}"
+
+    previous, previous_time, previous_memory = _measure(_previous_metrics, commits, file_handler, repeat=1)
+    engine, engine_time, engine_memory = _measure(_engine_metrics, commits, file_handler)
+    assert previous[:2] == engine[:2], "The engine computed other counts or sizes"
+    assert list(previous[2].items()) == list(engine[2].items()), "The engine computed other author counts, or in another order"
+
+    print(f"{len(commits)} commits, {sum(engine[0])} categorised test file modifications, {len(engine[2])} authors")
+    print(f"Previous processing: {previous_time:.2f}s, peak {previous_memory / 1e6:6.1f} MB")
+    print(f"Single pass:         {engine_time:.2f}s, peak {engine_memory / 1e6:6.1f} MB "
+          f"({previous_time / engine_time:.1f}x faster, identical results)")
+
+if __name__ == "__main__":
+    main()
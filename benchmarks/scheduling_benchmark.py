@@ -0,0 +1,49 @@
+"""
+Compares fixed batches with the work queue on a skewed list of simulated repositories.
+Run from the project root with: python -m benchmarks.scheduling_benchmark
+"""
+import asyncio
+import random
+import timeit
+from src.infrastructure.work_queue import run_workers
+
+SLOTS = 8
+REPOSITORIES = 64
+TIME_SCALE = 0.01
+
+def _skewed_durations():
+    # A few huge repositories among many small ones, as in the Apache lists
+    random.seed(0)
+    return [random.paretovariate(1.2) * TIME_SCALE for _ in range(REPOSITORIES)]
+
+async def _mine(duration):
+    await asyncio.sleep(duration)
+
+async def _run_batches(durations):
+    for i in range(0, len(durations), SLOTS):
+        await asyncio.gather(*[_mine(duration) for duration in durations[i:i + SLOTS]])
+
+async def _run_queue(durations):
+    await run_workers(durations, SLOTS, _mine)
+
+def _time(run, durations):
+    start = timeit.default_timer()
+    asyncio.run(run(durations))
+    return timeit.default_timer() - start
+
+def main():
+    durations = _skewed_durations()
+    largest_first = sorted(durations, reverse=True)
+
+    batches = _time(_run_batches, durations)
+    queue = _time(_run_queue, durations)
+    queue_largest_first = _time(_run_queue, largest_first)
+    lower_bound = max(max(durations), sum(durations) / SLOTS)
+
+    print(f"{REPOSITORIES} repositories, {SLOTS} slots, lower bound {lower_bound:.2f}s")
+    print(f"Fixed batches:             {batches:.2f}s")
+    print(f"Work queue:                {queue:.2f}s ({batches / queue:.1f}x)")
+    print(f"Work queue, largest first: {queue_largest_first:.2f}s ({batches / queue_largest_first:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,30 @@
+import csv
+import os
+import numpy as np
 from src.infrastructure import file_utils
 
-def _generate_array(existing_data, new_headers):
-    # Initialize an empty array for new data to go in
-    new_data = []
+def get_adjusted_tests(table: np.ndarray):
+    """
+    Splits the tests written during their implementation between those written before and after it,
+    in the proportion of the tests written before and after it.
+    @param table: The rows of a results table, with 'Test Before', 'Test After' and 'Test During' columns.
+    @return: The adjusted counts of tests written before and after their implementation, truncated to integers.
+    """
+    test_before = table['Test Before']
+    test_after = table['Test After']
+    test_during = table['Test During']
 
-    for row in existing_data:
-        # for each existing row, create an array to represent the row from the dictionary
-        new_row = []
-        for header in new_headers:
-            new_row.append(row[header])
+    # Calculate the tdd percentage, which is 0 without any test written before or after the implementation
+    total = test_before + test_after
+    tdd_percentage = np.divide(test_before, total, out=np.zeros(len(table)), where=total != 0)
 
-        # append this row to the new_data array
-        new_data.append(new_row)
+    # Calculate the adjusted variables
+    adjusted_test_before = (test_before + (tdd_percentage * test_during)).astype(np.int64)
+    adjusted_test_after = (test_after + ((1 - tdd_percentage) * test_during)).astype(np.int64)
+    return adjusted_test_before, adjusted_test_after
 
-    # return the new data array and prepend the headers to this array
-    return [new_headers] + new_data
-
-
-def make_adjustments(filename):
-    existing_data = file_utils.read_csv(filename)
-
-    for row in existing_data:
-        # Calculate the tdd percentage
-        try:
-            tdd_percentage = int(row['Test Before']) / (int(row['Test Before']) + int(row['Test After']))
-        except ZeroDivisionError:
-            tdd_percentage = 0
-
-        # Calculate the adjusted variables
-        adjusted_test_before = int(row['Test Before']) + (tdd_percentage * int(row['Test During']))
-        adjusted_test_after = int(row['Test After']) + ((1 - tdd_percentage) * int(row['Test During']))
-
-        # Create a new item in the dictionary to store the new data
-        row['Adjusted Test Before'] = int(adjusted_test_before)
-        row['Adjusted Test After'] = int(adjusted_test_after)
 
+def make_adjustments(filename, table: np.ndarray):
     # Get the headers of the relevant file
     headers = []
     if filename == 'author_data':
@@ -43,8 +33,19 @@ def make_adjustments(filename):
         headers = ["Repo Name", "Language", "Commit Count", "Test Before", "Test After", "Test During", "Duration (s)",
                 "Avg Before Commit Size", "Avg After Commit Size", "Avg During Commit Size", "Avg Commit Size"]
 
-    # Generate the new data as a 2D array from the dictionary
-    new_data = _generate_array(existing_data, headers + ["Adjusted Test Before", "Adjusted Test After"])
+    # Only the adjusted counts are computed from the table: the other cells are copied as written in the results file,
+    # e.g. an average of '0' stays '0' instead of becoming the float '0.0'
+    file_path = os.path.join(file_utils.RESULTS_PATH, f"{filename}.csv")
+    with open(file_path, "r", newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        file_headers = next(reader)
+        indexes = [file_headers.index(header) for header in headers]
+        cells = [[row[index] for index in indexes] for row in reader]
+
+    # Generate the new data as a 2D array from the cells and the adjusted counts
+    adjusted_test_before, adjusted_test_after = get_adjusted_tests(table)
+    new_data = [headers + ["Adjusted Test Before", "Adjusted Test After"]]
+    new_data += [row + [before, after] for row, before, after in zip(cells, adjusted_test_before.tolist(), adjusted_test_after.tolist())]
 
     # Write this data to a new csv
-    file_utils.write_csv(new_data, filename+'_adjusted')
\ No newline at end of file
+    file_utils.write_csv(new_data, filename+'_adjusted', file_utils.RESULTS_PATH)
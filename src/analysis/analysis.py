@@ -1,97 +1,62 @@
 import os
-import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from src.infrastructure import file_utils
-from src.analysis.adjustments import make_adjustments
-
-def _save_plot(plot: plt, name: str):
-    file_path = os.path.join(file_utils.CHARTS_PATH, f"{name}.jpg")
-    plot.savefig(file_path)
-
-
-def _get_category_index(tdd_percentage):
-    # Return which index to increment - 10 25 50 70 90 100
-    if tdd_percentage < 10:
-        return 0
-    elif tdd_percentage < 25:
-        return 1
-    elif tdd_percentage < 50:
-        return 2
-    elif tdd_percentage < 70:
-        return 3
-    elif tdd_percentage < 90:
-        return 4
-    elif tdd_percentage <= 100:
-        return 5
-
-def _create_size_impact_scatter():
-    # Read data from the repo_data csv
-    repo_data = file_utils.read_csv("repo_data")
-
-    # Initialize arrays to store plot points
-    x = []
-    y = []
-
-    # Iterate through each repo and create a point in the two arrays
-    for repo in repo_data:
-        # Append the commit count of the repo to X
-        x.append(int(repo['Commit Count']))
-
-        # Get the total number of tests for the repo
-        # we don't count test_during as we want TDD percentage, not before, during and after percentage
-        total_test_count = int(repo['Test Before']) + int(repo['Test After'])
-        total_test_count = 1 if total_test_count == 0 else total_test_count
-
-        # Append the percentage of TDD for the repo to Y
-        y.append((int(repo['Test Before'])/total_test_count)*100)
-
-    # Convert arrays to numpy arrays
-    x = np.array(x)
-    y = np.array(y)
-
-    # Clear any existing plot
-    plt.clf()
+from src.analysis.adjustments import get_adjusted_tests, make_adjustments
+from src.analysis.results_table import ResultsTable
 
-    # Plot the scatter points
-    plt.scatter(x, y, c=y, cmap = 'winter')
+def _render_chart(file_path: str, draw, inputs: tuple, layout: str = None):
+    # Each chart is drawn on its own figure, rendered by the non-interactive Agg backend
+    figure = Figure(layout=layout)
+    FigureCanvasAgg(figure)
+    draw(figure.add_subplot(), *inputs)
+    figure.savefig(file_path)
 
-    # Calculate and plot the line of best fit
-    a, b = np.polyfit(x, y, 1)
-    plt.plot(x, a * x + b, color="red", alpha=0.5)
 
-    # Set title and axes labels
-    plt.xlabel("Repo Size (No. of files)")
-    plt.ylabel("TDD Percentage (%)")
-    plt.title("Repo size and TDD percentage")
+# Upper bounds of the TDD categories, the last one including 100%
+CATEGORY_BOUNDS = [10, 25, 50, 70, 90]
+
+def _get_category_indexes(tdd_percentages):
+    # Return the index of the category of each percentage - 10 25 50 70 90 100
+    return np.searchsorted(CATEGORY_BOUNDS, tdd_percentages, side='right')
+
+def _get_tdd_percentages(table):
+    # Calculate the percentage of TDD of each row, which is 0 without any test written before or after the implementation
+    # we don't count test_during as we want TDD percentage, not before, during and after percentage
+    total_test_count = np.maximum(1, table['Test Before'] + table['Test After'])
+    return (table['Test Before'] / total_test_count) * 100
 
-    # Save the plot
-    _save_plot(plt, "1 - Size Impact")
+def _get_size_impact_inputs(repo_data):
+    # The commit count of each repo is plotted against its percentage of TDD
+    return repo_data['Commit Count'], _get_tdd_percentages(repo_data)
 
-def _create_tdd_usage_box_plot():
-    # Read data from the repo_data csv
-    repo_data = file_utils.read_csv("repo_data")
+def _create_size_impact_scatter(axes, x, y):
+    # Plot the scatter points
+    axes.scatter(x, y, c=y, cmap = 'winter')
 
-    # Initialize arrays to store percentages for each repo
-    before = []
-    after = []
-    during = []
+    # Calculate and plot the line of best fit
+    a, b = np.polyfit(x, y, 1)
+    axes.plot(x, a * x + b, color="red", alpha=0.5)
 
-    # Iterate through each repo and append the before, during and after percentages to each array
-    for repo in repo_data:
-        # Get the total number of tests for the repo
-        total_test_count = int(repo['Test Before']) + int(repo['Test During']) + int(repo['Test After'])
-        total_test_count = 1 if total_test_count == 0 else total_test_count
+    # Set title and axes labels
+    axes.set_xlabel("Repo Size (No. of files)")
+    axes.set_ylabel("TDD Percentage (%)")
+    axes.set_title("Repo size and TDD percentage")
 
-        # Append the percentage data to each array
-        before.append((int(repo['Test Before']) / total_test_count) * 100)
-        after.append((int(repo['Test After']) / total_test_count) * 100)
-        during.append((int(repo['Test During']) / total_test_count) * 100)
+def _get_tdd_usage_inputs(repo_data):
+    # Get the total number of tests for each repo
+    total_test_count = np.maximum(1, repo_data['Test Before'] + repo_data['Test During'] + repo_data['Test After'])
 
-    # Clear any existing plot
-    plt.clf()
+    # Calculate the before, during and after percentages of each repo
+    before = (repo_data['Test Before'] / total_test_count) * 100
+    after = (repo_data['Test After'] / total_test_count) * 100
+    during = (repo_data['Test During'] / total_test_count) * 100
+    return before, after, during
 
+def _create_tdd_usage_box_plot(axes, before, after, during):
     # Plot the box plots
-    boxplt = plt.boxplot([before, after, during], patch_artist=True, tick_labels=["Before", "After", "During"], flierprops= dict(markerfacecolor='coral'))
+    boxplt = axes.boxplot([before, after, during], patch_artist=True, tick_labels=["Before", "After", "During"], flierprops= dict(markerfacecolor='coral'))
 
     # Give each bar a color
     colors = ['palegreen', 'lightblue', 'lightskyblue']
@@ -99,107 +64,61 @@ def _create_tdd_usage_box_plot():
         patch.set_facecolor(color)
 
     # Set title and axes labels
-    plt.ylabel("Percentage of tests")
-    plt.title("Percentage of tests created before, after and during implementation")
-
-    # Save the plot
-    _save_plot(plt, "2 - TDD Usage Statistics")
-
+    axes.set_ylabel("Percentage of tests")
+    axes.set_title("Percentage of tests created before, after and during implementation")
 
-def _create_avg_commit_size_bar_graph():
-    # Read data from the repo_data csv
-    repo_data = file_utils.read_csv("repo_data")
 
-    # Initialize variables to store total for each repo
-    before_total  = 0
-    after_total = 0
-    during_total = 0
-
-    # Iterate through each repo and update the before, during and after totals
-    for repo in repo_data:
-        before_total += float(repo['Avg Before Commit Size'])
-        after_total += float(repo['Avg After Commit Size'])
-        during_total += float(repo['Avg During Commit Size'])
-
-    # Calculate the average commit size using the totals above
-    before_avg = before_total / len(repo_data)
-    after_avg = after_total / len(repo_data)
-    during_avg = during_total / len(repo_data)
-
-    # Clear any existing plot
-    plt.clf()
+def _get_avg_commit_size_inputs(repo_data):
+    # Calculate the average commit size over all repos
+    before_avg = repo_data['Avg Before Commit Size'].mean()
+    after_avg = repo_data['Avg After Commit Size'].mean()
+    during_avg = repo_data['Avg During Commit Size'].mean()
+    return ([before_avg, after_avg, during_avg],)
 
+def _create_avg_commit_size_bar_graph(axes, averages):
     # Plot the bar chart
     colors = ['palegreen', 'lightblue', 'lightskyblue']
-    plt.bar(["Before", "After", "During"], [before_avg, after_avg, during_avg], align='center', color=colors)
+    axes.bar(["Before", "After", "During"], averages, align='center', color=colors)
 
     # Place values at the top of each bar
-    for index, value in enumerate([before_avg, after_avg, during_avg]):
-        plt.text(index, value+0.25, round(value, 1), ha='center')
+    for index, value in enumerate(averages):
+        axes.text(index, value+0.25, round(value, 1), ha='center')
 
     # Set title and axes labels
-    plt.ylabel("Average Commit Size (No. of files)")
-    plt.title("Average commit size when tests are created \nbefore, after and during implementation")
+    axes.set_ylabel("Average Commit Size (No. of files)")
+    axes.set_title("Average commit size when tests are created \nbefore, after and during implementation")
 
-    # Save the plot
-    _save_plot(plt, "3 - Average Commit Size")
 
-
-def _create_tdd_languages_bar_graph():
-    # Read data from the repo_data csv
-    repo_data = file_utils.read_csv("repo_data")
-
-    # Initialize variables to store total for each repo
+def _get_tdd_languages_inputs(repo_data):
     labels = ["Java", "C++", "C#", "Kotlin", "Python"]
-    percentage_total = {"Java":0, "C++":0, "C#":0, "Kotlin":0, "Python":0}
-    repo_count = {"Java":0, "C++":0, "C#":0, "Kotlin":0, "Python":0}
-
-    # Iterate through each repo and update the percentage total and repo count for the respective language
-    for repo in repo_data:
-        language = repo['Language']
-        repo_count[language] += 1
-        try:
-            percentage_total[language] += (int(repo['Test Before']) / (int(repo['Test Before']) + int(repo['Test After']))) * 100
-        except ZeroDivisionError:
-            pass
+    tdd_percentages = _get_tdd_percentages(repo_data)
 
+    # Average the percentage of TDD of the repos of each language, a language without repos having an average of 0
     percentage_avg = []
     for language in labels:
-        percentage_avg.append((percentage_total[language] / repo_count[language]))
-
-    # Clear any existing plot
-    plt.clf()
+        language_percentages = tdd_percentages[repo_data['Language'] == language]
+        percentage_avg.append(language_percentages.mean() if len(language_percentages) > 0 else 0)
+    return labels, percentage_avg
 
+def _create_tdd_languages_bar_graph(axes, labels, percentage_avg):
     # Plot the bar chart
     colors = ['#66c2a5','#fc8d62','#8da0cb','#e78ac3','#a6d854']
-    plt.bar(labels, percentage_avg, align='center', color=colors)
+    axes.bar(labels, percentage_avg, align='center', color=colors)
 
     # Place values at the top of each bar
     for index, value in enumerate(percentage_avg):
-        plt.text(index, value+0.25, round(value, 1), ha='center')
+        axes.text(index, value+0.25, round(value, 1), ha='center')
 
     # Set title and axes labels
-    plt.ylabel("TDD Percentage (%)")
-    plt.xlabel("Language")
-    plt.title("TDD percentage observed between programming languages")
+    axes.set_ylabel("TDD Percentage (%)")
+    axes.set_xlabel("Language")
+    axes.set_title("TDD percentage observed between programming languages")
 
-    # Save the plot
-    _save_plot(plt, "4 - Language TDD Percentage")
 
-
-def _create_raw_tdd_percentage_pie():
-    # Read data from the author_data csv
-    repo_data = file_utils.read_csv("repo_data")
-
-    # Initialize Counters
-    total = 0
-    data = [0, 0, 0]
-
-    for repo in repo_data:
-        data[0] += int(repo['Test Before'])
-        data[1] += int(repo['Test After'])
-        data[2] += int(repo['Test During'])
-        total += int(repo['Test Before']) + int(repo['Test After']) + int(repo['Test During'])
+def _get_raw_tdd_percentage_inputs(repo_data):
+    # Count the tests of all repos
+    data = [int(repo_data['Test Before'].sum()), int(repo_data['Test After'].sum()), int(repo_data['Test During'].sum())]
+    total = sum(data)
 
     # Convert the data into percentages using a lambda function and map
     percentages = list(map(lambda x: x / max(1, total) * 100, data))
@@ -208,38 +127,26 @@ def _create_raw_tdd_percentage_pie():
     labels = ['TDD', 'Not TDD', 'Unclear']
     for i in range(len(labels)):
         labels[i] = labels[i] + ' - ' + str(round(percentages[i], 1)) + '%'
+    return percentages, labels
 
-    # Clear any existing plot
-    plt.clf()
-
+def _create_raw_tdd_percentage_pie(axes, percentages, labels):
     # Plot the pie
     colors = ['palegreen', 'lightblue', 'lightskyblue']
-    patches, texts, x = plt.pie(percentages, colors=colors, autopct='%1.1f%%', radius=1.5)
+    patches, texts, x = axes.pie(percentages, colors=colors, autopct='%1.1f%%', radius=1.5)
 
     # Plot the legend
-    plt.legend(patches, labels, loc='upper center', bbox_to_anchor=(0.5, -0.001), ncol=3)
+    axes.legend(patches, labels, loc='upper center', bbox_to_anchor=(0.5, -0.001), ncol=3)
 
     # Set the title and specify axis setting
-    plt.axis('equal')
-    plt.title("Overall TDD Percentage (Raw Data)")
-    plt.rcParams["figure.autolayout"] = True
-
-    # Save the plot
-    _save_plot(plt, "5 - Overall TDD Percentage (Raw Data)")
+    axes.axis('equal')
+    axes.set_title("Overall TDD Percentage (Raw Data)")
 
 
-def _create_overall_tdd_percentage_pie():
-    # Read data from the author_data csv
-    repo_data = file_utils.read_csv("repo_data_adjusted")
-
-    # Initialize Counters
-    total = 0
-    data = [0, 0]
-
-    for repo in repo_data:
-        data[0] += int(repo['Adjusted Test Before'])
-        data[1] += int(repo['Adjusted Test After'])
-        total += int(repo['Adjusted Test Before']) + int(repo['Adjusted Test After'])
+def _get_overall_tdd_percentage_inputs(repo_data):
+    # Count the adjusted tests of all repos
+    adjusted_test_before, adjusted_test_after = get_adjusted_tests(repo_data)
+    data = [int(adjusted_test_before.sum()), int(adjusted_test_after.sum())]
+    total = sum(data)
 
     # Convert the data into percentages using a lambda function and map
     percentages = list(map(lambda x: x / max(1, total) * 100, data))
@@ -249,41 +156,25 @@ def _create_overall_tdd_percentage_pie():
     labels = ['TDD', 'Not TDD']
     for i in range(len(labels)):
         labels[i] = labels[i] + ' - ' + str(round(percentages[i], 1)) + '%, ' f"{data[i]:,}" + ' repos'
+    return percentages, labels
 
-    # Clear any existing plot
-    plt.clf()
-
+def _create_overall_tdd_percentage_pie(axes, percentages, labels):
     # Plot the pie
     colors = ['palegreen', 'lightblue']
-    patches, texts, x = plt.pie(percentages, colors=colors, autopct='%1.1f%%', radius=2)
+    patches, texts, x = axes.pie(percentages, colors=colors, autopct='%1.1f%%', radius=2)
 
     # Plot the legend
-    plt.legend(patches, labels, loc='upper center', bbox_to_anchor=(0.5, -0.001), ncol=2)
+    axes.legend(patches, labels, loc='upper center', bbox_to_anchor=(0.5, -0.001), ncol=2)
 
     # Set the title and specify axis setting
-    plt.axis('equal')
-    plt.title("Overall TDD Percentage (Adjusted Data)")
-    plt.rcParams["figure.autolayout"] = True
+    axes.axis('equal')
+    axes.set_title("Overall TDD Percentage (Adjusted Data)")
 
-    # Save the plot
-    _save_plot(plt, "6 - Overall TDD Percentage (Adjusted Data)")
 
-
-def _create_tdd_author_categories_pie():
-    # Read data from the author_data csv
-    author_data = file_utils.read_csv("author_data")
-
-    # Initialize Counters
+def _get_tdd_author_categories_inputs(author_data):
+    # Count the authors of each category
     #10 25 50 70 90 100
-    counters = [0,0,0,0,0,0]
-
-    for author in author_data:
-        # Calculate the percentage of TDD of the author
-        # we don't count test_during as we want TDD percentage, not before, during and after percentage
-        tdd_percentage = (float(author['Test Before']) / max(1, float(author['Test Before']) + float(author['Test After']))) * 100
-
-        # Update the counters array based on this result
-        counters[_get_category_index(tdd_percentage)] += 1
+    counters = np.bincount(_get_category_indexes(_get_tdd_percentages(author_data)), minlength=len(CATEGORY_BOUNDS) + 1)
 
     # Convert the counters into percentages using a lambda function and map
     percentages = list(map(lambda x: x/max(1, len(author_data))*100, counters))
@@ -292,86 +183,67 @@ def _create_tdd_author_categories_pie():
     labels = ['Non TDD', 'Rarely TDD', 'Occasionally TDD', 'Somewhat TDD', 'Mostly TDD', 'Consistently TDD']
     for i in range(len(labels)):
         labels[i] = labels[i] + ' - ' + str(round(percentages[i], 1)) + '%'
+    return percentages, labels, "Pie chart showing levels of TDD usage by authors"
 
-    # Clear any existing plot
-    plt.clf()
-
-    # Plot the pie
-    colors = ['#225ea8', '#1d91c0', '#41b6c4', '#7fcdbb', '#c7e9b4', '#71cb71']
-    patches, texts = plt.pie(percentages, colors=colors, radius=2)
-
-    # Plot the legend
-    plt.legend(patches, labels, loc='upper center', bbox_to_anchor=(0.5, -0.001))
-
-    # Set the title and specify axis setting
-    plt.axis('equal')
-    plt.title("Pie chart showing levels of TDD usage by authors")
-    plt.rcParams["figure.autolayout"] = True
-
-    # Save the plot
-    _save_plot(plt, "7 - TDD Author Categories")
-
-
-def _create_tdd_repo_categories_pie():
-    # Read data from the author_data csv
-    repo_data = file_utils.read_csv("repo_data")
 
-    # Initialize Counters
+def _get_tdd_repo_categories_inputs(repo_data):
+    # Count the repos and their commits in each category
     #10 25 50 70 90 100
-    counters = [0,0,0,0,0,0]
-    total_commit_count = [0,0,0,0,0,0]
-
-    for repo in repo_data:
-        # Calculate the percentage of TDD of the author
-        # we don't count test_during as we want TDD percentage, not before, during and after percentage
-        tdd_percentage = (float(repo['Test Before']) / max(1, float(repo['Test Before']) + float(repo['Test After']))) * 100
-
-        # Update the counter arrays based on this result
-        index = _get_category_index(tdd_percentage)
-        counters[index] += 1
-        total_commit_count[index] += int(repo['Commit Count'])
+    indexes = _get_category_indexes(_get_tdd_percentages(repo_data))
+    counters = np.bincount(indexes, minlength=len(CATEGORY_BOUNDS) + 1)
+    total_commit_count = np.bincount(indexes, weights=repo_data['Commit Count'], minlength=len(CATEGORY_BOUNDS) + 1)
 
 
     # Convert the counters into percentages using a lambda function and map
     percentages = list(map(lambda x: x/max(1, len(repo_data))*100, counters))
 
-    # Average the commit count array
+    # Average the commit count array, a category without repos having an average of 0
     average_commit_count = []
     for i in range(len(counters)):
-        average_commit_count.append(round(total_commit_count[i] / counters[i], 1))
+        average_commit_count.append(round(total_commit_count[i] / counters[i], 1) if counters[i] > 0 else 0)
 
     # Update labels to include percentage values for each slice
     labels = ['Non TDD', 'Rarely TDD', 'Occasionally TDD', 'Somewhat TDD', 'Mostly TDD', 'Consistently TDD']
     for i in range(len(labels)):
         labels[i] = labels[i] + ' - ' + str(round(percentages[i], 1)) + '%, Average Commit Count - ' +  f"{average_commit_count[i]:,}"
+    return percentages, labels, "Pie chart showing levels of TDD usage seen in repositories"
 
-    # Clear any existing plot
-    plt.clf()
-
+def _create_tdd_categories_pie(axes, percentages, labels, title):
     # Plot the pie
     colors = ['#225ea8', '#1d91c0', '#41b6c4', '#7fcdbb', '#c7e9b4', '#71cb71']
-    patches, texts = plt.pie(percentages, colors=colors, radius=2)
+    patches, texts = axes.pie(percentages, colors=colors, radius=2)
 
     # Plot the legend
-    plt.legend(patches, labels, loc='upper center', bbox_to_anchor=(0.5, -0.001))
+    axes.legend(patches, labels, loc='upper center', bbox_to_anchor=(0.5, -0.001))
 
     # Set the title and specify axis setting
-    plt.axis('equal')
-    plt.title("Pie chart showing levels of TDD usage seen in repositories")
-    plt.rcParams["figure.autolayout"] = True
-
-    # Save the plot
-    _save_plot(plt, "8 - TDD Repo Categories")
-
+    axes.axis('equal')
+    axes.set_title(title)
+
+
+def _get_charts(results: ResultsTable):
+    # Name, drawing function, inputs and layout of each chart, the inputs being computed from the results beforehand
+    # The larger pies are laid out to keep their legends inside the chart
+    return [
+        ("1 - Size Impact", _create_size_impact_scatter, _get_size_impact_inputs(results.repos), None),
+        ("2 - TDD Usage Statistics", _create_tdd_usage_box_plot, _get_tdd_usage_inputs(results.repos), None),
+        ("3 - Average Commit Size", _create_avg_commit_size_bar_graph, _get_avg_commit_size_inputs(results.repos), None),
+        ("4 - Language TDD Percentage", _create_tdd_languages_bar_graph, _get_tdd_languages_inputs(results.repos), None),
+        ("5 - Overall TDD Percentage (Raw Data)", _create_raw_tdd_percentage_pie, _get_raw_tdd_percentage_inputs(results.repos), None),
+        ("6 - Overall TDD Percentage (Adjusted Data)", _create_overall_tdd_percentage_pie, _get_overall_tdd_percentage_inputs(results.repos),
+         "tight"),
+        ("7 - TDD Author Categories", _create_tdd_categories_pie, _get_tdd_author_categories_inputs(results.authors), "tight"),
+        ("8 - TDD Repo Categories", _create_tdd_categories_pie, _get_tdd_repo_categories_inputs(results.repos), "tight"),
+    ]
 
 def create_plots():
-    make_adjustments('author_data')
-    make_adjustments('repo_data')
-    _create_size_impact_scatter()
-    _create_tdd_usage_box_plot()
-    _create_avg_commit_size_bar_graph()
-    _create_tdd_languages_bar_graph()
-    _create_raw_tdd_percentage_pie()
-    _create_overall_tdd_percentage_pie()
-    _create_tdd_author_categories_pie()
-    _create_tdd_repo_categories_pie()
+    """
+    Writes the adjusted result files and renders the charts under 'results/charts/'.
+    """
+    # The results are read once, for the adjustments and all the charts
+    results = ResultsTable.read()
+    make_adjustments('author_data', results.authors)
+    make_adjustments('repo_data', results.repos)
+
+    for name, draw, inputs, layout in _get_charts(results):
+        _render_chart(os.path.join(file_utils.CHARTS_PATH, f"{name}.jpg"), draw, inputs, layout)
@@ -0,0 +1,54 @@
+import csv
+import os
+import warnings
+import numpy as np
+from src.infrastructure import file_utils
+
+# Columns holding text, the other columns hold numbers
+TEXT_COLUMNS = {"Repo Name", "Language", "Author"}
+INTEGER_COLUMNS = {"Commit Count", "Test Before", "Test After", "Test During", "Adjusted Test Before", "Adjusted Test After"}
+
+def _get_column_type(column: str):
+    if column in TEXT_COLUMNS:
+        return object
+    if column in INTEGER_COLUMNS:
+        return np.int64
+    return np.float64
+
+def read_results_table(file_name: str) -> np.ndarray:
+    """
+    Reads a CSV file from the 'results/' directory into a structured array, parsing every cell once.
+    Each column is a field named after its header, e.g. table['Test Before'] is an array of integers.
+    @param file_name: The name of the CSV file (without the '.csv' extension).
+    @return: A structured array with one element per row of the CSV file.
+    """
+    file_path = os.path.join(file_utils.RESULTS_PATH, f"{file_name}.csv")
+    if not file_utils.file_exists(file_path):
+        raise FileNotFoundError(f"The file '{file_path}' does not exist.")
+
+    with open(file_path, "r", newline="", encoding="utf-8") as file:
+        header = next(csv.reader(file))
+        dtype = np.dtype([(column, _get_column_type(column)) for column in header])
+        with warnings.catch_warnings():
+            # A file without rows gives an empty table
+            warnings.simplefilter("ignore", UserWarning)
+            # Cells are never comments, e.g. the language 'C#'
+            return np.loadtxt(file, dtype=dtype, delimiter=",", quotechar='"', comments=None, ndmin=1)
+
+class ResultsTable():
+    """
+    Results of all repositories and authors, read once and shared by the adjustments and the charts.
+    @param repos: The rows of 'repo_data.csv', see 'read_results_table'.
+    @param authors: The rows of 'author_data.csv', see 'read_results_table'.
+    """
+    def __init__(self, repos: np.ndarray, authors: np.ndarray):
+        self.repos = repos
+        self.authors = authors
+
+    @classmethod
+    def read(cls):
+        """
+        Reads the repository and author CSV files of the 'results/' directory.
+        @return: The results table.
+        """
+        return cls(read_results_table("repo_data"), read_results_table("author_data"))
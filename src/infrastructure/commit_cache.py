@@ -0,0 +1,317 @@
+"""
+Columnar on-disk format of the commit caches.
+
+A cache starts with a header holding the format version, followed by segments of up to 'chunk_size' commits each.
+Every segment holds, in order:
+- the strings (file paths, author names and emails) used for the first time in the segment, which extend a string table shared by the whole file,
+- the hashes of its commits,
+- one column per commit attribute: author name and email ids, epoch dates, UTC offsets, sizes and the offsets of the commits' file ids,
+- the ids of the files modified by its commits.
+Segments are self-contained apart from the string table, so they can be streamed to disk, appended to an existing cache,
+and recovered one by one from an interrupted write.
+"""
+import mmap
+import os
+import shutil
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Any, Generator, Iterable, List, Optional, Tuple
+import numpy as np
+from pydriller.domain.developer import Developer
+from src.infrastructure import file_utils
+from src.models.CustomCommit import CustomCommit
+
+# Incremented whenever the format or the stored values change, so caches of another version are mined again.
+# Version 2 stores the paths of the modified files, instead of their names.
+FORMAT_VERSION = 2
+
+_MAGIC = b"TDDCACHE"
+_FILE_HEADER = struct.Struct("<8sH")
+# Payload size, new strings, commits and modified files of a segment
+_SEGMENT_HEADER = struct.Struct("<QIII")
+
+_UINT32 = np.dtype("<u4")
+_INT32 = np.dtype("<i4")
+_INT64 = np.dtype("<i8")
+
+# Author id of authors stored as a plain name, and UTC offset of naive dates
+_NO_ID = -1
+_NAIVE = np.iinfo(np.int32).min
+
+class _StringTable():
+    """
+    Interns the strings written to a cache, giving each distinct string the id of its first occurrence.
+    """
+    def __init__(self, strings: Iterable[str] = ()):
+        self._ids = {}
+        for string in strings:
+            self._ids.setdefault(string, len(self._ids))
+        self._new_strings = []
+
+    def intern(self, string: str) -> int:
+        string_id = self._ids.get(string)
+        if string_id is None:
+            string_id = len(self._ids)
+            self._ids[string] = string_id
+            self._new_strings.append(string)
+        return string_id
+
+    def take_new_strings(self) -> List[str]:
+        new_strings = self._new_strings
+        self._new_strings = []
+        return new_strings
+
+def _pack_strings(strings: List[str]) -> bytes:
+    encoded = [string.encode("utf-8", errors="surrogatepass") for string in strings]
+    return np.array([len(string) for string in encoded], dtype=_UINT32).tobytes() + b"".join(encoded)
+
+def _unpack_strings(buffer, offset: int, count: int) -> Tuple[List[str], int]:
+    lengths = np.frombuffer(buffer, dtype=_UINT32, count=count, offset=offset)
+    offset += count * _UINT32.itemsize
+    ends = np.cumsum(lengths, dtype=np.int64).tolist()
+    blob = buffer[offset:offset + (ends[-1] if ends else 0)]
+    starts = [0] + ends[:-1]
+
+    if blob.isascii():
+        # Byte offsets are then also character offsets, so the strings are decoded all at once
+        text = blob.decode("ascii")
+        strings = [text[start:end] for start, end in zip(starts, ends)]
+    else:
+        strings = [blob[start:end].decode("utf-8", errors="surrogatepass") for start, end in zip(starts, ends)]
+    return strings, offset + len(blob)
+
+def _split_author(author: Any, strings: _StringTable) -> Tuple[int, int]:
+    if isinstance(author, Developer) and author.name is not None and author.email is not None:
+        return strings.intern(author.name), strings.intern(author.email)
+    return strings.intern(str(author)), _NO_ID
+
+def _split_date(date: datetime) -> Tuple[int, int]:
+    offset = date.utcoffset()
+    if offset is None:
+        return int(date.replace(tzinfo=timezone.utc).timestamp()), _NAIVE
+    return int(date.timestamp()), int(offset.total_seconds())
+
+def _pack_segment(commits: List[CustomCommit], strings: _StringTable) -> bytes:
+    count = len(commits)
+    name_ids = np.empty(count, dtype=_INT32)
+    email_ids = np.empty(count, dtype=_INT32)
+    dates = np.empty(count, dtype=_INT64)
+    utc_offsets = np.empty(count, dtype=_INT32)
+    sizes = np.empty(count, dtype=_UINT32)
+    file_offsets = np.empty(count + 1, dtype=_UINT32)
+    file_ids = []
+
+    file_offsets[0] = 0
+    for i, commit in enumerate(commits):
+        name_ids[i], email_ids[i] = _split_author(commit.author, strings)
+        dates[i], utc_offsets[i] = _split_date(commit.date)
+        sizes[i] = commit.size
+        file_ids.extend(strings.intern(file) for file in commit.modified_files)
+        file_offsets[i + 1] = len(file_ids)
+
+    new_strings = strings.take_new_strings()
+    payload = b"".join([
+        _pack_strings(new_strings),
+        _pack_strings([commit.hash for commit in commits]),
+        name_ids.tobytes(), email_ids.tobytes(), dates.tobytes(), utc_offsets.tobytes(), sizes.tobytes(), file_offsets.tobytes(),
+        np.array(file_ids, dtype=_UINT32).tobytes(),
+    ])
+    return _SEGMENT_HEADER.pack(len(payload), len(new_strings), count, len(file_ids)) + payload
+
+class _SegmentReader():
+    """
+    Reads the segments of a memory-mapped cache, keeping the string table and the authors and time zones built so far.
+    """
+    def __init__(self):
+        self.strings = []
+        self._authors = {}
+        self._time_zones = {}
+
+    def _get_author(self, name_id: int, email_id: int):
+        author = self._authors.get((name_id, email_id))
+        if author is None:
+            author = self.strings[name_id] if email_id == _NO_ID else Developer(self.strings[name_id], self.strings[email_id])
+            self._authors[(name_id, email_id)] = author
+        return author
+
+    def _get_time_zone(self, utc_offset: int):
+        time_zone = self._time_zones.get(utc_offset)
+        if time_zone is None:
+            time_zone = self._time_zones[utc_offset] = timezone(timedelta(seconds=utc_offset)) if utc_offset != _NAIVE else timezone.utc
+        return time_zone
+
+    def _get_date(self, date: int, utc_offset: int) -> datetime:
+        date = datetime.fromtimestamp(date, self._get_time_zone(utc_offset))
+        return date.replace(tzinfo=None) if utc_offset == _NAIVE else date
+
+    def read_strings(self, buffer, offset: int) -> int:
+        """
+        Extends the string table with the strings of the segment at the given offset, without reading its commits.
+        @return: The offset of the next segment.
+        """
+        payload_size, string_count, _, _ = _SEGMENT_HEADER.unpack_from(buffer, offset)
+        new_strings, _ = _unpack_strings(buffer, offset + _SEGMENT_HEADER.size, string_count)
+        self.strings.extend(new_strings)
+        return offset + _SEGMENT_HEADER.size + payload_size
+
+    def read_commits(self, buffer, offset: int) -> Tuple[List[CustomCommit], int]:
+        """
+        Reads the commits of the segment at the given offset.
+        @return: The commits, and the offset of the next segment.
+        """
+        payload_size, string_count, count, file_count = _SEGMENT_HEADER.unpack_from(buffer, offset)
+        end = offset + _SEGMENT_HEADER.size + payload_size
+
+        new_strings, position = _unpack_strings(buffer, offset + _SEGMENT_HEADER.size, string_count)
+        self.strings.extend(new_strings)
+        hashes, position = _unpack_strings(buffer, position, count)
+
+        columns = []
+        for dtype, length in [(_INT32, count), (_INT32, count), (_INT64, count), (_INT32, count), (_UINT32, count),
+                              (_UINT32, count + 1), (_UINT32, file_count)]:
+            columns.append(np.frombuffer(buffer, dtype=dtype, count=length, offset=position).tolist())
+            position += length * dtype.itemsize
+        name_ids, email_ids, dates, utc_offsets, sizes, file_offsets, file_ids = columns
+
+        # Whole columns are converted at once, rather than commit by commit
+        files = list(map(self.strings.__getitem__, file_ids))
+        modified_files = [files[start:end] for start, end in zip(file_offsets, file_offsets[1:])]
+        authors = list(map(self._get_author, name_ids, email_ids))
+        dates = list(map(self._get_date, dates, utc_offsets))
+
+        commits = list(map(CustomCommit, hashes, modified_files, authors, dates))
+        for commit, size in zip(commits, sizes):
+            commit.size = size
+        return commits, end
+
+def _check_header(buffer, file_path: str):
+    if len(buffer) < _FILE_HEADER.size:
+        raise ValueError(f"Commit cache at {file_path} has no header.")
+    magic, version = _FILE_HEADER.unpack_from(buffer, 0)
+    if magic != _MAGIC:
+        raise ValueError(f"{file_path} is not a commit cache.")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Commit cache at {file_path} has version {version}, expected {FORMAT_VERSION}.")
+
+def _is_complete_segment(buffer, offset: int) -> bool:
+    if offset + _SEGMENT_HEADER.size > len(buffer):
+        return False
+    payload_size = _SEGMENT_HEADER.unpack_from(buffer, offset)[0]
+    return offset + _SEGMENT_HEADER.size + payload_size <= len(buffer)
+
+def _read_strings(file_path: str) -> List[str]:
+    reader = _SegmentReader()
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        _check_header(buffer, file_path)
+        offset = _FILE_HEADER.size
+        while offset < len(buffer):
+            offset = reader.read_strings(buffer, offset)
+    return reader.strings
+
+def _move_partial(partial_path: str, file_path: str, append: bool, count: int):
+    if count == 0:
+        os.remove(partial_path)
+    elif append and file_utils.file_exists(file_path):
+        # The segments are added to the existing cache, without the header of the partial file
+        with open(partial_path, "rb") as source, open(file_path, "ab") as target:
+            source.seek(_FILE_HEADER.size)
+            shutil.copyfileobj(source, target)
+        os.remove(partial_path)
+    else:
+        os.replace(partial_path, file_path)
+
+def write_commits(file_path: str, commits: Iterable[CustomCommit], chunk_size: int = 1000, append: bool = False) -> int:
+    '''
+    Writes commits to a cache while they are being produced, one segment of 'chunk_size' commits at a time.
+    The segments are written to a temporary file first, and only moved to the given path once all commits were written.
+    @param file_path: The path of the cache.
+    @param commits: The commits to write.
+    @param chunk_size: The number of commits in a segment.
+    @param append: Whether to append the commits to an existing cache, instead of replacing it.
+    @return: The number of commits written. Nothing is written if there are no commits.
+    '''
+    partial_path = f"{file_path}.partial"
+    strings = _StringTable(_read_strings(file_path) if append and file_utils.file_exists(file_path) else ())
+    count = 0
+
+    try:
+        with open(partial_path, "wb") as file:
+            file.write(_FILE_HEADER.pack(_MAGIC, FORMAT_VERSION))
+            chunk = []
+            for commit in commits:
+                chunk.append(commit)
+                if len(chunk) == chunk_size:
+                    file.write(_pack_segment(chunk, strings))
+                    # Written segments can be recovered if the process is killed before all commits were written
+                    file.flush()
+                    count += len(chunk)
+                    chunk = []
+            if chunk:
+                file.write(_pack_segment(chunk, strings))
+                count += len(chunk)
+    except BaseException:
+        os.remove(partial_path)
+        raise
+
+    _move_partial(partial_path, file_path, append, count)
+    return count
+
+def recover_commits(file_path: str, append: bool = False) -> Tuple[int, Optional[CustomCommit]]:
+    '''
+    Keeps the segments written by an interrupted 'write_commits' call, as if only their commits had been given.
+    A segment that was only partially written when the process was killed is discarded.
+    @param file_path: The path of the cache.
+    @param append: Whether the interrupted call was appending to an existing cache.
+    @return: The number of commits recovered, and the last of them (None if nothing was recovered).
+    '''
+    partial_path = f"{file_path}.partial"
+    if not file_utils.file_exists(partial_path):
+        return 0, None
+
+    count = 0
+    last_commit = None
+    complete_size = 0
+    if os.path.getsize(partial_path) >= _FILE_HEADER.size:
+        reader = _SegmentReader()
+        if append and file_utils.file_exists(file_path):
+            reader.strings = _read_strings(file_path)
+
+        with open(partial_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            offset = complete_size = _FILE_HEADER.size
+            while _is_complete_segment(buffer, offset):
+                commits, offset = reader.read_commits(buffer, offset)
+                count += len(commits)
+                last_commit = commits[-1] if commits else last_commit
+                complete_size = offset
+
+    with open(partial_path, "r+b") as file:
+        file.truncate(complete_size)
+
+    _move_partial(partial_path, file_path, append, count)
+    return count, last_commit
+
+def iterate_commits(file_path: str) -> Generator[CustomCommit, None, None]:
+    '''
+    Lazily reads the commits of a cache, one segment at a time, from a memory map of the file.
+    @param file_path: The path of the cache.
+    @return: A generator of CustomCommit objects.
+    '''
+    if not file_utils.file_exists(file_path):
+        raise FileNotFoundError(f"Commit cache not found at {file_path}.")
+
+    reader = _SegmentReader()
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        _check_header(buffer, file_path)
+        offset = _FILE_HEADER.size
+        while offset < len(buffer):
+            commits, offset = reader.read_commits(buffer, offset)
+            yield from commits
+
+def read_commits(file_path: str) -> List[CustomCommit]:
+    '''
+    Reads all the commits of a cache.
+    Identical file paths and authors are shared by the commits, instead of being loaded once per commit.
+    @param file_path: The path of the cache.
+    @return: A list of CustomCommit objects.
+    '''
+    return list(iterate_commits(file_path))
@@ -0,0 +1,327 @@
+"""
+SQLite database holding the commits of every mined repository, as an alternative to one commit cache file per repository.
+
+Commits are identified by their repository and their position in the history, which is their index once read.
+The files modified by each commit are indexed by repository and path, so the commits modifying each file can be read
+without reading the files of every commit.
+The processing still reads all the commits of a repository, and the file map of the whole repository, at once:
+the store is an alternative storage format to the commit caches, not a way to process repositories without loading them.
+"""
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from typing import Dict, Generator, Iterable, List, Optional, Tuple
+from pydriller.domain.developer import Developer
+from src.infrastructure import file_utils
+from src.models.CustomCommit import CustomCommit
+
+DATABASE_NAME = "commits.sqlite"
+# Incremented whenever the schema or the stored values change, so repositories mined with another version are mined again.
+# Version 2 stores the paths of the modified files, instead of their names.
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repositories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS commits (
+    repository_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    author_id INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    utc_offset INTEGER,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (repository_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS commit_files (
+    repository_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    file_index INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    PRIMARY KEY (repository_id, position, file_index)
+) WITHOUT ROWID;
+-- Authors stored as a plain name have no email, which the index keeps apart from any email, even an empty one
+CREATE UNIQUE INDEX IF NOT EXISTS unique_authors ON authors (name, IFNULL(email, x''));
+-- No query reads the commits by date. Databases created by earlier versions had an index for it, which only slowed their writes.
+DROP INDEX IF EXISTS commits_by_date;
+CREATE INDEX IF NOT EXISTS commit_files_by_file ON commit_files (repository_id, file_id, position);
+"""
+
+def _get_database_path() -> str:
+    return os.path.join(file_utils.COMMITS_PATH, DATABASE_NAME)
+
+def _connect() -> sqlite3.Connection:
+    os.makedirs(file_utils.COMMITS_PATH, exist_ok=True)
+    # Repositories are mined by several processes at once, which wait for each other's writes
+    connection = sqlite3.connect(_get_database_path(), timeout=300)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(_SCHEMA)
+    return connection
+
+def _get_partial_name(repo_name: str) -> str:
+    return f"{repo_name}.partial"
+
+def _get_repository_id(connection: sqlite3.Connection, repo_name: str, create: bool = False) -> Optional[int]:
+    row = connection.execute("SELECT id FROM repositories WHERE name = ?", (repo_name,)).fetchone()
+    if row is not None:
+        return row[0]
+    if not create:
+        return None
+    return connection.execute("INSERT INTO repositories (name) VALUES (?)", (repo_name,)).lastrowid
+
+def _delete_repository(connection: sqlite3.Connection, repository_id: int):
+    connection.execute("DELETE FROM commit_files WHERE repository_id = ?", (repository_id,))
+    connection.execute("DELETE FROM commits WHERE repository_id = ?", (repository_id,))
+    connection.execute("DELETE FROM repositories WHERE id = ?", (repository_id,))
+
+class _Identifiers():
+    """
+    Gives ids to the authors and files written to the database, remembering the ids already looked up.
+    """
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+        self._authors = {}
+        self._files = {}
+
+    def get_author_id(self, author) -> int:
+        if isinstance(author, Developer) and author.name is not None and author.email is not None:
+            key = (author.name, author.email)
+        else:
+            # Authors that are not developers are stored as a plain name
+            key = (str(author), None)
+
+        author_id = self._authors.get(key)
+        if author_id is None:
+            # Repositories mined concurrently can insert the same author, which is then given the id of the first insert
+            author_id = self._connection.execute("""
+                INSERT INTO authors (name, email) VALUES (?, ?)
+                ON CONFLICT (name, IFNULL(email, x'')) DO UPDATE SET name = excluded.name RETURNING id""", key).fetchone()[0]
+            self._authors[key] = author_id
+        return author_id
+
+    def get_file_id(self, path: str) -> int:
+        file_id = self._files.get(path)
+        if file_id is None:
+            self._connection.execute("INSERT OR IGNORE INTO files (path) VALUES (?)", (path,))
+            file_id = self._connection.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()[0]
+            self._files[path] = file_id
+        return file_id
+
+def _split_date(date: datetime) -> Tuple[int, Optional[int]]:
+    offset = date.utcoffset()
+    if offset is None:
+        return int(date.replace(tzinfo=timezone.utc).timestamp()), None
+    return int(date.timestamp()), int(offset.total_seconds())
+
+def _insert_chunk(connection: sqlite3.Connection, identifiers: _Identifiers, repository_id: int, first_position: int,
+                  chunk: List[CustomCommit]):
+    commit_rows = []
+    file_rows = []
+    for position, commit in enumerate(chunk, start=first_position):
+        commit_rows.append((repository_id, position, commit.hash, identifiers.get_author_id(commit.author), *_split_date(commit.date),
+                            commit.size))
+        file_rows.extend((repository_id, position, file_index, identifiers.get_file_id(file))
+                         for file_index, file in enumerate(commit.modified_files))
+
+    connection.executemany("INSERT INTO commits VALUES (?, ?, ?, ?, ?, ?, ?)", commit_rows)
+    connection.executemany("INSERT INTO commit_files VALUES (?, ?, ?, ?)", file_rows)
+
+def _move_partial(connection: sqlite3.Connection, repo_name: str, append: bool, count: int):
+    with connection:
+        partial_id = _get_repository_id(connection, _get_partial_name(repo_name))
+        if partial_id is None:
+            return
+        repository_id = _get_repository_id(connection, repo_name)
+
+        if count == 0:
+            _delete_repository(connection, partial_id)
+        elif append and repository_id is not None:
+            first_position = connection.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM commits WHERE repository_id = ?",
+                                                (repository_id,)).fetchone()[0]
+            for table in ["commits", "commit_files"]:
+                connection.execute(f"UPDATE {table} SET repository_id = ?, position = position + ? WHERE repository_id = ?",
+                                   (repository_id, first_position, partial_id))
+            connection.execute("DELETE FROM repositories WHERE id = ?", (partial_id,))
+        else:
+            if repository_id is not None:
+                _delete_repository(connection, repository_id)
+            connection.execute("UPDATE repositories SET name = ? WHERE id = ?", (repo_name, partial_id))
+
+def write_commits(repo_name: str, commits: Iterable[CustomCommit], chunk_size: int = 1000, append: bool = False) -> int:
+    '''
+    Writes the commits of a repository to the database while they are being produced, committing 'chunk_size' commits at a time.
+    The commits are written under a temporary repository first, which only replaces the repository once all commits were written.
+    @param repo_name: The name of the repository.
+    @param commits: The commits to write.
+    @param chunk_size: The number of commits written in a transaction.
+    @param append: Whether to append the commits to those already stored for the repository, instead of replacing them.
+    @return: The number of commits written. Nothing is written if there are no commits.
+    '''
+    connection = _connect()
+    try:
+        with connection:
+            partial_id = _get_repository_id(connection, _get_partial_name(repo_name))
+            if partial_id is not None:
+                _delete_repository(connection, partial_id)
+            partial_id = _get_repository_id(connection, _get_partial_name(repo_name), create=True)
+
+        identifiers = _Identifiers(connection)
+        count = 0
+        try:
+            chunk = []
+            for commit in commits:
+                chunk.append(commit)
+                if len(chunk) == chunk_size:
+                    # Committed chunks can be recovered if the process is killed before all commits were written
+                    with connection:
+                        _insert_chunk(connection, identifiers, partial_id, count, chunk)
+                    count += len(chunk)
+                    chunk = []
+            if chunk:
+                with connection:
+                    _insert_chunk(connection, identifiers, partial_id, count, chunk)
+                count += len(chunk)
+        except BaseException:
+            with connection:
+                _delete_repository(connection, partial_id)
+            raise
+
+        _move_partial(connection, repo_name, append, count)
+        return count
+    finally:
+        connection.close()
+
+def recover_commits(repo_name: str, append: bool = False) -> Tuple[int, Optional[CustomCommit]]:
+    '''
+    Keeps the chunks committed by an interrupted 'write_commits' call, as if only their commits had been given.
+    @param repo_name: The name of the repository.
+    @param append: Whether the interrupted call was appending to the stored commits.
+    @return: The number of commits recovered, and the last of them (None if nothing was recovered).
+    '''
+    last_commit = None
+    count = 0
+    for count, last_commit in enumerate(iterate_commits(_get_partial_name(repo_name)), start=1):
+        pass
+
+    connection = _connect()
+    try:
+        _move_partial(connection, repo_name, append, count)
+    finally:
+        connection.close()
+    return count, last_commit
+
+def has_commits(repo_name: str) -> bool:
+    '''
+    Checks whether commits are stored for a repository.
+    @param repo_name: The name of the repository.
+    @return: True if the repository was stored, False otherwise.
+    '''
+    if not file_utils.file_exists(_get_database_path()):
+        return False
+
+    connection = _connect()
+    try:
+        return _get_repository_id(connection, repo_name) is not None
+    finally:
+        connection.close()
+
+def _get_date(date: int, utc_offset: Optional[int], time_zones: Dict[int, timezone]) -> datetime:
+    if utc_offset is None:
+        return datetime.fromtimestamp(date, timezone.utc).replace(tzinfo=None)
+    time_zone = time_zones.get(utc_offset)
+    if time_zone is None:
+        time_zone = time_zones[utc_offset] = timezone(timedelta(seconds=utc_offset))
+    return datetime.fromtimestamp(date, time_zone)
+
+def iterate_commits(repo_name: str, with_files: bool = True) -> Generator[CustomCommit, None, None]:
+    '''
+    Lazily reads the commits of a repository from the database, in the order they were written.
+    Identical file paths and authors are shared by the commits, instead of being loaded once per commit.
+    @param repo_name: The name of the repository.
+    @param with_files: Whether to read the files modified by the commits. Without them, the commits keep their size.
+    @return: A generator of CustomCommit objects, which is empty if the repository is not stored.
+    '''
+    if not file_utils.file_exists(_get_database_path()):
+        return
+
+    connection = _connect()
+    try:
+        repository_id = _get_repository_id(connection, repo_name)
+        if repository_id is None:
+            return
+
+        paths = {}
+        authors = {}
+        time_zones = {}
+        file_rows = connection.execute("""
+            SELECT commit_files.position, files.id, files.path FROM commit_files JOIN files ON files.id = commit_files.file_id
+            WHERE commit_files.repository_id = ? ORDER BY commit_files.position, commit_files.file_index""", (repository_id,)) if with_files else ()
+        commit_files = groupby(file_rows, key=lambda row: row[0])
+        next_files = next(commit_files, None)
+
+        commit_rows = connection.execute("""
+            SELECT commits.position, commits.hash, authors.id, authors.name, authors.email, commits.date, commits.utc_offset, commits.size
+            FROM commits JOIN authors ON authors.id = commits.author_id WHERE commits.repository_id = ? ORDER BY commits.position""",
+            (repository_id,))
+        for position, hash, author_id, name, email, date, utc_offset, size in commit_rows:
+            modified_files = []
+            if next_files is not None and next_files[0] == position:
+                modified_files = [paths.setdefault(file_id, path) for _, file_id, path in next_files[1]]
+                next_files = next(commit_files, None)
+
+            author = authors.get(author_id)
+            if author is None:
+                author = authors[author_id] = name if email is None else Developer(name, email)
+
+            commit = CustomCommit(hash, modified_files, author, _get_date(date, utc_offset, time_zones))
+            commit.size = size
+            yield commit
+    finally:
+        connection.close()
+
+def read_commits(repo_name: str, with_files: bool = True) -> List[CustomCommit]:
+    '''
+    Reads all the commits of a repository from the database.
+    @param repo_name: The name of the repository.
+    @param with_files: Whether to read the files modified by the commits. Without them, the commits keep their size.
+    @return: A list of CustomCommit objects, which is empty if the repository is not stored.
+    '''
+    return list(iterate_commits(repo_name, with_files))
+
+def read_commit_map(repo_name: str) -> Dict[str, List[int]]:
+    '''
+    Reads the positions of the commits modifying each file of a repository, with a single query walking the file index.
+    @param repo_name: The name of the repository.
+    @return: A dictionary of file paths to the ascending positions of the commits modifying them,
+             which is empty if the repository is not stored.
+    '''
+    if not file_utils.file_exists(_get_database_path()):
+        return {}
+
+    connection = _connect()
+    try:
+        repository_id = _get_repository_id(connection, repo_name)
+        if repository_id is None:
+            return {}
+
+        rows = connection.execute("""
+            SELECT files.path, commit_files.position FROM commit_files JOIN files ON files.id = commit_files.file_id
+            WHERE commit_files.repository_id = ? ORDER BY commit_files.file_id, commit_files.position""", (repository_id,))
+        commit_map = {}
+        for path, file_rows in groupby(rows, key=lambda row: row[0]):
+            commit_map[path] = [position for _, position in file_rows]
+        return commit_map
+    finally:
+        connection.close()
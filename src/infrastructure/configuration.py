@@ -14,12 +14,14 @@ def setup_directories():
     file_utils.create_directory(file_utils.CHARTS_PATH)
     file_utils.create_directory(file_utils.LOGS_PATH)
     file_utils.create_directory(file_utils.COMMITS_PATH)
+    file_utils.create_directory(file_utils.MIRRORS_PATH)
+    file_utils.create_directory(file_utils.PROCESSED_PATH)
 
-def setup_logging():
+def setup_logging(file_path: str = log_path, filemode: str = "w"):
     logging.NOTIFY = notify_level
     logging.addLevelName(logging.NOTIFY, 'NOTIFY')
     logging.Logger.notify = partialmethod(logging.Logger.log, logging.NOTIFY)
     logging.notify = partial(logging.log, logging.NOTIFY)
 
     logging.basicConfig(format="{asctime} - {levelname} - {message}", style="{", datefmt="%Y-%m-%d %H:%M",
-                        filename=log_path, filemode="w", level=notify_level)
\ No newline at end of file
+                        filename=file_path, filemode=filemode, level=notify_level)
\ No newline at end of file
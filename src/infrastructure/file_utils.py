@@ -1,6 +1,7 @@
 import csv
 import os
 import shutil
+import tempfile
 from typing import Any, Callable, Dict, List
 
 ROOT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
@@ -9,6 +10,9 @@ RESULTS_PATH = os.path.join(ROOT_PATH, "results")
 CHARTS_PATH = os.path.join(RESULTS_PATH, "charts")
 LOGS_PATH = os.path.join(ROOT_PATH, "logs")
 COMMITS_PATH = os.path.join(ROOT_PATH, "commits")
+MIRRORS_PATH = os.path.join(ROOT_PATH, "mirrors")
+PROCESSED_PATH = os.path.join(ROOT_PATH, "processed")
+ANONYMISATION_KEY_PATH = os.path.join(ROOT_PATH, "anonymisation.key")
 
 def create_directory(path: str, delete_existing: bool = False):
     """
@@ -43,22 +47,41 @@ def read_csv(file_name: str) -> List[Dict[str, Any]]:
         reader = csv.DictReader(file)
         return [row for row in reader]
 
-def write_csv(content: List[List[Any]], file_name: str) -> None:
+def write_csv(content: List[List[Any]], file_name: str, directory: str = RESULTS_PATH) -> None:
     """
     Writes content to a CSV file under 'results/'.
     @param content: Data to write to the CSV file, as a list of rows.
     @param file_name: The name of the CSV file.
+    @param directory: The directory to write the CSV file to, instead of 'results/'.
     """
     if not isinstance(content, list) or not all(isinstance(row, list) for row in content):
         raise ValueError("Content must be a list of lists.")
     
     file_name = file_name if file_name.endswith(".csv") else f"{file_name}.csv"
-    file_path: str = os.path.join(RESULTS_PATH, file_name)
-    os.makedirs(RESULTS_PATH, exist_ok=True)
+    file_path: str = os.path.join(directory, file_name)
+    os.makedirs(directory, exist_ok=True)
     with open(file_path, mode="w", encoding="utf-8", newline="") as file:
         writer = csv.writer(file)
         writer.writerows(content)
 
+def replace_csv(file_path: str, content: List[List[Any]]) -> None:
+    """
+    Replaces a CSV file with the given content at once: readers see either the previous file or the new one, never a partial file.
+    @param file_path: Path to the CSV file.
+    @param content: Data to write to the CSV file, as a list of rows.
+    """
+    directory = os.path.dirname(file_path)
+    os.makedirs(directory, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix=".partial")
+    try:
+        with os.fdopen(file_descriptor, mode="w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerows(content)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
 def create_or_update_csv(file_path: str, headers: list, data: list[str], row_identifier: str, recalculation_function: Callable[[list[str], list[str]], list[str]] = None):
     """
     Creates or updates a CSV file with the provided data.
@@ -0,0 +1,128 @@
+from datetime import datetime
+import subprocess
+import tempfile
+from typing import Generator, List, Optional
+from pydriller.domain.developer import Developer
+
+_HEADER_START = "\x1e"
+_FIELD_SEPARATOR = "\x1f"
+_LOG_FORMAT = "%x1e%H%x1f%an%x1f%ae%x1f%aI"
+_READ_SIZE = 1 << 16
+
+class GitLogFile():
+    """
+    File modified by a commit, as listed by 'git log --name-only'.
+    Mirrors the 'filename', 'new_path' and 'old_path' of PyDriller's ModifiedFile.
+    'git log --name-only' lists one path per file: its new path, or its old path if it was deleted. It stands for both paths.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.filename = path.rsplit("/", 1)[-1]
+        self.new_path = path
+        self.old_path = path
+
+class GitLogCommit():
+    """
+    Commit read from 'git log', exposing the same attributes as the PyDriller commits used for mining.
+    """
+    def __init__(self, hash: str, author: Developer, author_date: datetime, modified_files: List[GitLogFile]):
+        self.hash = hash
+        self.author = author
+        self.author_date = author_date
+        self.modified_files = modified_files
+
+def _build_arguments(file_extensions: List[str], final_date: Optional[datetime], from_commit: Optional[str],
+                     since: Optional[datetime] = None, to_commit: Optional[str] = None) -> List[str]:
+    # Same traversal as PyDriller: oldest commit first, renames detected, root commit compared to the empty tree
+    arguments = ["git", "-c", "core.quotepath=false", "log", "-z", "--reverse", "--name-only", "-M", "--root",
+                 f"--format={_LOG_FORMAT}"]
+
+    if final_date is not None:
+        # Naive dates are in local time, as in PyDriller
+        arguments.append(f"--until={final_date.astimezone().isoformat()}")
+
+    if since is not None:
+        # Unlike --since, this does not stop at the first older commit, as in PyDriller's 'since_as_filter'
+        arguments.append(f"--since-as-filter={since.astimezone().isoformat()}")
+
+    arguments.append(to_commit if to_commit is not None else "HEAD")
+    if from_commit is not None:
+        # Every commit missing from the history of the last traversed commit, including the branches merged since
+        arguments.append(f"^{from_commit}")
+
+    return arguments
+
+def _parse_header(header: str) -> GitLogCommit:
+    hash, name, email, date = header[len(_HEADER_START):].split(_FIELD_SEPARATOR)
+    return GitLogCommit(hash, Developer(name, email), datetime.fromisoformat(date), [])
+
+def _read_tokens(stream) -> Generator[str, None, None]:
+    remainder = b""
+    while True:
+        data = stream.read(_READ_SIZE)
+        if not data:
+            break
+        tokens = (remainder + data).split(b"\0")
+        remainder = tokens.pop()
+        for token in tokens:
+            yield token.decode("utf-8", errors="replace")
+    if remainder:
+        yield remainder.decode("utf-8", errors="replace")
+
+def _parse_log(stream) -> Generator[GitLogCommit, None, None]:
+    commit = None
+    for token in _read_tokens(stream):
+        # The header and the file list of a commit are separated by a new line
+        token = token[1:] if token.startswith("\n") else token
+        if token.startswith(_HEADER_START):
+            if commit is not None:
+                yield commit
+            commit = _parse_header(token)
+        elif token and commit is not None:
+            commit.modified_files.append(GitLogFile(token))
+
+    if commit is not None:
+        yield commit
+
+def _has_file_type(commit: GitLogCommit, file_extensions: tuple) -> bool:
+    return any(file.filename.endswith(file_extensions) for file in commit.modified_files)
+
+def read_commits(repository_path: str, file_extensions: List[str], final_date: Optional[datetime] = None,
+                 from_commit: Optional[str] = None, since: Optional[datetime] = None,
+                 to_commit: Optional[str] = None) -> Generator[GitLogCommit, None, None]:
+    """
+    Reads commits from a local repository by streaming 'git log --name-only', without computing any diffs.
+    Yields the same commits as 'repository_utils.read_commits', in the same order.
+
+    @param: repository_path: The path of a local (possibly bare) repository.
+    @param: file_extensions: The file extensions to search for. Commits that do not modify such files are skipped.
+    @param: final_date: Date to read commits up until from the given repository.
+    @param: from_commit: Hash of the last traversed commit. Only the commits missing from its history are read. Reads the whole history if not provided.
+    @param: since: Only read commits committed on or after this date.
+    @param: to_commit: Hash of the commit whose history is read. Defaults to the HEAD commit.
+
+    @return: A generator of GitLogCommit objects.
+    """
+    if final_date is not None and final_date > datetime.now(final_date.tzinfo):
+        raise ValueError("Final date must be in the past.")
+
+    extensions = tuple(file_extensions)
+    # Errors go to a file, so that a full stderr pipe can never block the traversal
+    with tempfile.TemporaryFile() as error_file:
+        process = subprocess.Popen(_build_arguments(file_extensions, final_date, from_commit, since, to_commit), cwd=repository_path,
+                                   stdout=subprocess.PIPE, stderr=error_file)
+        try:
+            for commit in _parse_log(process.stdout):
+                if _has_file_type(commit, extensions):
+                    yield commit
+        finally:
+            process.stdout.close()
+            process.wait()
+
+        if process.returncode != 0:
+            error_file.seek(0)
+            error = error_file.read().decode("utf-8", errors="replace").strip()
+            # Repositories without any commits have nothing to read, as in PyDriller
+            if "ambiguous argument 'HEAD'" in error or "bad revision 'HEAD'" in error:
+                return
+            raise RuntimeError(f"git log failed: {error}")
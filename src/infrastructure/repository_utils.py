@@ -1,13 +1,24 @@
-from datetime import datetime
+import bisect
+from contextlib import contextmanager
+import csv
+from datetime import datetime, timezone
+import hashlib
 import logging
 import os
 import re
-from typing import List, Optional, Generator
+import shutil
+import subprocess
+import tempfile
+from typing import Dict, List, Optional, Generator, Tuple
 from pydriller import Commit
 from src.models.Repository import Repository
-from pydriller import Repository as DrillerRepo, Commit
+from pydriller import Repository as DrillerRepo, Commit, Git
 from src.infrastructure import file_utils
 
+# Blob-less clones still hold every commit and tree, which is all that is needed to list the files modified by each commit.
+# Blobs are only fetched on demand, e.g. to detect renamed files whose content changed.
+PARTIAL_CLONE_FILTER = "blob:none"
+
 def read_repositories(language: str) -> List[Repository]:
     """
     Reads repository names from a file under 'resources/repositories/', removes duplicates,
@@ -31,21 +42,223 @@ def read_repositories(language: str) -> List[Repository]:
 
         return [apache_repo_from_name(repo_name) for repo_name in repositories]
 
-def read_commits(repository_url: str, file_extensions: List[str], final_date: Optional[datetime] = None) -> Generator[Commit, None, None]:
+def read_repository_sizes(language: str) -> Dict[str, int]:
+    """
+    Reads the commit count of each repository, as recorded by the repository finder in
+    'resources/repositories/{language}_repositories.csv'.
+
+    @param language: The programming language (e.g., "java", "kotlin").
+    @return: A dictionary of repository names to commit counts, which is empty if the file does not exist.
+    """
+    file_path = os.path.join(file_utils.RESOURCES_PATH, f"{language}_repositories.csv")
+    if not os.path.exists(file_path):
+        return {}
+
+    sizes = {}
+    with open(file_path, "r", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            try:
+                sizes[row["Repository Name"]] = int(row["Commit Count"])
+            except (KeyError, TypeError, ValueError):
+                continue
+    return sizes
+
+def sort_by_size(repositories: List[Repository], sizes: Dict[str, int]) -> List[Repository]:
+    """
+    Orders repositories from the largest to the smallest.
+    Repositories of unknown size are placed last, in their original order.
+
+    @param repositories: The repositories to order.
+    @param sizes: A dictionary of repository names to sizes.
+    @return: The ordered list of repositories.
+    """
+    return sorted(repositories, key=lambda repo: -sizes.get(repo.name, -1))
+
+def read_commits(repository_url: str, file_extensions: List[str], final_date: Optional[datetime] = None, from_commit: Optional[str] = None,
+                 since: Optional[datetime] = None, to_commit: Optional[str] = None) -> Generator[Commit, None, None]:
     """
     Reads commits from a repository using PyDriller.
 
     @param: repository_url: The URL of the repository.
     @param: file_extensions: The file extensions to search for.
     @param: final_date: Date to read commits up until from the given repository.
+    @param: from_commit: Hash of the last traversed commit. Only the commits missing from its history are read, which requires a local repository.
+                         Reads the whole history if not provided.
+    @param: since: Only read commits committed on or after this date. The whole history is still walked, so commits with skewed dates are not missed.
+    @param: to_commit: Hash of the commit whose history is read, which requires a local repository. Defaults to the HEAD commit.
 
     @return: A generator of Commit objects.
     """
-    if final_date is not None and final_date > datetime.now():
+    if final_date is not None and final_date > datetime.now(final_date.tzinfo):
         raise ValueError("Final date must be in the past.")
     to_date = final_date if final_date else datetime.now()
-    
-    return DrillerRepo(repository_url, only_modifications_with_file_types=file_extensions, to=to_date).traverse_commits()
+    if from_commit is not None or to_commit is not None:
+        return _read_listed_commits(repository_url, file_extensions, to_date, from_commit, since, to_commit)
+
+    starting_point = {"since_as_filter": since} if since is not None else {}
+    return DrillerRepo(repository_url, only_modifications_with_file_types=file_extensions, to=to_date, **starting_point).traverse_commits()
+
+def _read_listed_commits(repository_path: str, file_extensions: List[str], final_date: datetime, from_commit: Optional[str],
+                         since: Optional[datetime], to_commit: Optional[str]) -> Generator[Commit, None, None]:
+    # PyDriller's 'from_commit' only reads the descendants of the commit (--ancestry-path), which misses the branches forked
+    # before it and merged after it, and its 'to_commit' cannot be combined with a final date.
+    # The commits are listed by git instead, and read one at a time.
+    arguments = ["rev-list", "--reverse", f"--until={final_date.astimezone().isoformat()}"]
+    if since is not None:
+        arguments.append(f"--since-as-filter={since.astimezone().isoformat()}")
+    arguments.append(to_commit if to_commit is not None else "HEAD")
+    if from_commit is not None:
+        arguments.append(f"^{from_commit}")
+    extensions = tuple(file_extensions)
+    git = Git(repository_path)
+    try:
+        for commit_hash in _run_git(arguments, cwd=repository_path).split():
+            commit = git.get_commit(commit_hash)
+            if any(file.filename.endswith(extensions) for file in commit.modified_files):
+                yield commit
+    finally:
+        git.clear()
+
+def _run_git(arguments: List[str], cwd: Optional[str] = None) -> str:
+    result = subprocess.run(["git", *arguments], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {arguments[0]} failed: {result.stderr.strip()}")
+    return result.stdout
+
+def get_mirror_path(repository_url: str) -> str:
+    """
+    Gets the path of the local bare mirror of a repository under 'mirrors/'.
+    The directory name is readable, and suffixed with a hash of the URL so that different URLs never share a mirror.
+
+    @param repository_url: The URL of the repository.
+    @return: The path of the mirror, whether or not it exists.
+    """
+    readable_name = re.sub(r"[^A-Za-z0-9_-]", "_", repository_url.rstrip("/").split("/")[-1].removesuffix(".git"))
+    url_hash = hashlib.sha1(repository_url.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(file_utils.MIRRORS_PATH, f"{readable_name}-{url_hash}.git")
+
+def _clone(clone_arguments: List[str], repository_source: str, clone_path: str, clone_filter: Optional[str] = None):
+    if clone_filter is not None:
+        try:
+            # Servers that do not support filters ignore them, so this only fails when the filter cannot be used at all
+            _run_git(["clone", *clone_arguments, f"--filter={clone_filter}", repository_source, clone_path])
+            return
+        except RuntimeError as e:
+            logging.warning(f"Partial clone of {repository_source} failed, falling back to a full clone: {e}")
+            shutil.rmtree(clone_path, ignore_errors=True)
+
+    _run_git(["clone", *clone_arguments, repository_source, clone_path])
+
+def mirror_repository(repository_url: str, clone_filter: Optional[str] = None) -> str:
+    """
+    Creates or updates the local bare mirror of a repository.
+    A new mirror is cloned with 'git clone --bare', while an existing one is only fetched. Only branches and tags are mirrored.
+
+    @param repository_url: The URL of the repository.
+    @param clone_filter: Partial clone filter (e.g. PARTIAL_CLONE_FILTER) used when the mirror is created. Existing mirrors keep the filter they were created with.
+    @return: The path of the up-to-date mirror.
+    """
+    mirror_path = get_mirror_path(repository_url)
+
+    if not os.path.isdir(mirror_path):
+        # Clone next to the final location, so an interrupted clone never looks like a valid mirror
+        partial_path = mirror_path + ".partial"
+        if os.path.exists(partial_path):
+            shutil.rmtree(partial_path)
+        os.makedirs(file_utils.MIRRORS_PATH, exist_ok=True)
+        _clone(["--bare", "--quiet"], repository_url, partial_path, clone_filter)
+        os.replace(partial_path, mirror_path)
+        logging.info(f"Created mirror of {repository_url} at {mirror_path}")
+
+    # Unlike 'git clone --mirror', which fetches every ref of the server (e.g. GitHub's 'refs/pull/*'), only branches and tags are fetched.
+    # Mirrors created with '--mirror' are switched to these refs as well.
+    _run_git(["config", "--replace-all", "remote.origin.fetch", "+refs/heads/*:refs/heads/*"], cwd=mirror_path)
+    _run_git(["config", "--add", "remote.origin.fetch", "+refs/tags/*:refs/tags/*"], cwd=mirror_path)
+    _run_git(["fetch", "--prune", "--quiet", "origin"], cwd=mirror_path)
+    return mirror_path
+
+@contextmanager
+def local_repository(repository_source: str, clone_filter: Optional[str] = None) -> Generator[str, None, None]:
+    """
+    Provides a local path for a repository, for tools that cannot read remote repositories.
+    Local repositories are used in place, while remote ones are cloned (bare) to a temporary directory that is removed afterwards.
+
+    @param repository_source: The URL or local path of the repository.
+    @param clone_filter: Partial clone filter (e.g. PARTIAL_CLONE_FILTER) used for the temporary clone. Falls back to a full clone if it cannot be used.
+    @return: A context manager yielding the local path of the repository.
+    """
+    if os.path.isdir(repository_source):
+        yield repository_source
+        return
+
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as temp_dir:
+        clone_path = os.path.join(temp_dir, "repository.git")
+        _clone(["--bare", "--quiet"], repository_source, clone_path, clone_filter)
+        yield clone_path
+
+def read_head(repository_path: str) -> Optional[str]:
+    """
+    Reads the commit a traversal of a local repository starts from, so that a later traversal can skip its history.
+
+    @param repository_path: The path of a local (possibly bare) repository.
+    @return: The hash of the HEAD commit, or None if the repository has no commits.
+    """
+    try:
+        return _run_git(["rev-parse", "--verify", "--quiet", "HEAD^{commit}"], cwd=repository_path).strip()
+    except RuntimeError:
+        # Repositories without any commits have no HEAD commit
+        return None
+
+def read_commit_dates(repository_path: str, final_date: Optional[datetime] = None) -> List[Tuple[str, int]]:
+    """
+    Lists the commits of a local repository in the order a serial traversal reads them (oldest first), without reading any files.
+
+    @param repository_path: The path of a local (possibly bare) repository.
+    @param final_date: Date to list commits up until.
+    @return: A list of (hash, committer timestamp) tuples, which is empty if the repository has no commits.
+    """
+    arguments = ["log", "--reverse", "--format=%H %ct"]
+    if final_date is not None:
+        arguments.append(f"--until={final_date.astimezone().isoformat()}")
+    arguments.append("HEAD")
+
+    try:
+        output = _run_git(arguments, cwd=repository_path)
+    except RuntimeError as e:
+        if "ambiguous argument 'HEAD'" in str(e) or "bad revision 'HEAD'" in str(e):
+            return []
+        raise
+
+    commit_dates = []
+    for line in output.splitlines():
+        commit_hash, timestamp = line.split(" ")
+        commit_dates.append((commit_hash, int(timestamp)))
+    return commit_dates
+
+def split_date_windows(commit_dates: List[Tuple[str, int]], shards: int) -> List[Tuple[datetime, datetime]]:
+    """
+    Splits a history into consecutive committer date windows holding a similar number of commits.
+    Commits sharing a timestamp always fall in the same window, so windows never overlap.
+
+    @param commit_dates: A list of (hash, committer timestamp) tuples, as returned by 'read_commit_dates'.
+    @param shards: The maximum number of windows.
+    @return: A list of (first date, last date) tuples, both inclusive, in chronological order.
+    """
+    timestamps = sorted(timestamp for _, timestamp in commit_dates)
+    if not timestamps:
+        return []
+
+    windows = []
+    start = 0
+    for shard in range(1, shards + 1):
+        end = len(timestamps) * shard // shards
+        if end <= start:
+            continue
+        # Extend the window over the commits sharing its last timestamp
+        end = bisect.bisect_right(timestamps, timestamps[end - 1])
+        windows.append((datetime.fromtimestamp(timestamps[start], timezone.utc), datetime.fromtimestamp(timestamps[end - 1], timezone.utc)))
+        start = end
+    return windows
 
 def repo_from_url(repo_url: str):
     repo_name = re.search(r"github\.com/[^/]+/([^/.]+)", repo_url).group(1) if re.search(r"github\.com/[^/]+/([^/.]+)", repo_url) else None
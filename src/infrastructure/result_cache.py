@@ -0,0 +1,57 @@
+"""
+Results of processing repositories, stored under 'processed/' by a key derived from everything they depend on.
+Stored results are never invalidated: when any of their inputs changes, their key changes with it.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional
+from src.infrastructure import file_utils
+
+def get_key(*inputs) -> str:
+    """
+    Derives the key of a result from its inputs.
+    @param inputs: The values the result depends on, compared by their string representation.
+    @return: A hexadecimal digest of the inputs.
+    """
+    digest = hashlib.sha256()
+    for value in inputs:
+        digest.update(str(value).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def _get_file_name(key: str):
+    return os.path.join(file_utils.PROCESSED_PATH, f"{key}.json")
+
+def read_result(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Reads the result stored under a key.
+    @param key: The key of the result.
+    @return: The stored result, or None if there is none.
+    """
+    file_path = _get_file_name(key)
+    if not file_utils.file_exists(file_path):
+        return None
+    try:
+        with open(file_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        # The result is then computed and stored again
+        return None
+
+def write_result(key: str, result: Dict[str, Any]):
+    """
+    Stores a result under a key. Results stored from several processes at once are never mixed up.
+    @param key: The key of the result.
+    @param result: The result, which must be serializable to JSON.
+    """
+    os.makedirs(file_utils.PROCESSED_PATH, exist_ok=True)
+    file_descriptor, temp_path = tempfile.mkstemp(dir=file_utils.PROCESSED_PATH, suffix=".partial")
+    try:
+        with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+            json.dump(result, file)
+        os.replace(temp_path, _get_file_name(key))
+    except BaseException:
+        os.remove(temp_path)
+        raise
@@ -1,5 +1,5 @@
 import pickle
-from typing import Any
+from typing import Any, Generator
 from src.infrastructure import file_utils
 
 def serialize(file_path: str, data: Any):
@@ -22,3 +22,20 @@ def deserialize(file_path: str):
     
     with open(file_path, "rb") as file:
         return pickle.load(file)
+
+def deserialize_chunks(file_path: str) -> Generator[Any, None, None]:
+    '''
+    Lazily deserializes the chunks stored at the given file path, one at a time, e.g. a commit cache from before the columnar format.
+    A file written with 'serialize' is read as a single chunk.
+    @param file_path: The file where the serialized chunks are stored to.
+    @return: A generator of the deserialized chunks.
+    '''
+    if not file_utils.file_exists(file_path):
+        raise FileNotFoundError(f"Serialized file not found at {file_path}.")
+
+    with open(file_path, "rb") as file:
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
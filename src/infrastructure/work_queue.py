@@ -0,0 +1,74 @@
+import asyncio
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+async def run_workers(items: Iterable[T], worker_count: int, handle_item: Callable[[T], Awaitable[None]]):
+    """
+    Handles the given items on a fixed number of long-lived workers.
+    Each worker takes the next item as soon as it is free, so one slow item never holds up the others.
+    Items are started in the order they are given.
+
+    @param items: The items to handle.
+    @param worker_count: The maximum number of items handled at the same time.
+    @param handle_item: Coroutine function handling a single item.
+    @raise: The first exception raised while handling an item, after cancelling the remaining work.
+    """
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+
+    async def worker():
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await handle_item(item)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(worker_count, queue.qsize())))]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+
+_END_OF_STAGE = object()
+
+async def run_pipeline(items: Iterable[T], worker_count: int, produce: Callable[[T], Awaitable[None]],
+                       consume: Callable[[T], Awaitable[None]], queue_size: int = 1):
+    """
+    Runs two stages over the given items at the same time.
+    Items are produced on a fixed number of workers, and each item is consumed, one at a time, as soon as it has been produced.
+    The stages are connected by a bounded queue: producers wait while it is full, so they never run far ahead of the consumer.
+
+    @param items: The items to handle.
+    @param worker_count: The maximum number of items produced at the same time.
+    @param produce: Coroutine function running the first stage for a single item.
+    @param consume: Coroutine function running the second stage for a single item, in the order items are produced.
+    @param queue_size: The maximum number of produced items waiting to be consumed.
+    @raise: The first exception raised by either stage, after cancelling the remaining work.
+    """
+    queue = asyncio.Queue(maxsize=max(1, queue_size))
+
+    async def producer():
+        async def produce_and_forward(item):
+            await produce(item)
+            await queue.put(item)
+
+        await run_workers(items, worker_count, produce_and_forward)
+        await queue.put(_END_OF_STAGE)
+
+    async def consumer():
+        while True:
+            item = await queue.get()
+            if item is _END_OF_STAGE:
+                return
+            await consume(item)
+
+    stages = [asyncio.create_task(producer()), asyncio.create_task(consumer())]
+    try:
+        await asyncio.gather(*stages)
+    finally:
+        for task in stages:
+            task.cancel()
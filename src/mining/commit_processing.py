@@ -1,57 +1,70 @@
+from bisect import bisect_left
 from collections import defaultdict
+import logging
+import timeit
+from src.infrastructure import commit_database
+from src.infrastructure import result_cache
 from src.mining import commit_retrieval as retrieval
+from src.mining import csv_export
+from src.mining.implementation_index import ImplementationIndex
+from src.models.file_handlers.CachedFileHandler import CachedFileHandler
 from src.models.file_handlers.LanguageFileHandler import LanguageFileHandler
+from src.models.MiningOptions import FILE_STORE, SQLITE_STORE
 
-def gather_commits_and_tests(repo_name, file_handler: LanguageFileHandler):
-    """
-    Read commits from file and analyse tests to produce a test_files array
-    @param repo_name: A String representing the repository which we will search and retrieve commits from
-    @param file_handler: Object containing information required to retrieve commits that modify files of a particular programming language
-    @return: A tuple containing an Array with CustomCommit objects and an Array of tuples of the form (test file name, commit index)
-    """
-    commits = retrieval.read_repo_info(repo_name)
-    test_files = []
-    for i in range(0, len(commits)):
-        for file in commits[i].modified_files:
-            if file_handler.is_test_file(file):
-                test_files.append((i, file))
-
-    return commits, test_files
+BEFORE = 0
+AFTER = 1
+DURING = 2
+# Incremented whenever the way repositories are processed changes, so their stored results are computed again
+PROCESSING_VERSION = 2
 
-
-def precompute_commit_map(commits):
+class RepoMetrics():
     """
-    Precompute a mapping from filenames to their commit indices.
-    @param commits: An Array containing CustomCommit objects
-    @return: A map of files to commit indexes where they are modified
+    Metrics of a processed repository, as exported to the repository and author CSV files.
+    @param test_counts: Number of tests written before, after and during their implementation.
+    @param average_sizes: Average size of the distinct commits holding tests written before, after and during their implementation,
+                          followed by the average of the three.
+    @param author_counts: A map of authors to their number of tests written before, after and during their implementation,
+                          in the order the authors are exported.
     """
-    file_to_commit_map = defaultdict(list)
-    for i, commit in enumerate(commits):
-        for file in commit.modified_files:
-            file_to_commit_map[file].append(i)
-    return file_to_commit_map
+    def __init__(self, commit_count: int, test_counts: list, average_sizes: list, author_counts: dict):
+        self.commit_count = commit_count
+        self.test_counts = test_counts
+        self.average_sizes = average_sizes
+        self.author_counts = author_counts
+
+    def to_dict(self):
+        return {"commit_count": self.commit_count, "test_counts": self.test_counts, "average_sizes": self.average_sizes,
+                "author_counts": self.author_counts}
 
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data["commit_count"], data["test_counts"], data["average_sizes"], data["author_counts"])
 
-def find_nearest_implementation(test_file, commits, commit_map, file_handler: LanguageFileHandler):
+def find_nearest_implementation(test_file, commits, commit_map, file_handler: LanguageFileHandler,
+                                implementation_index: ImplementationIndex = None):
     """
     Function to take a test_file tuple and list of commits and find the nearest commit taking before and after into account
     @param test_file: A Tuple holding the tests file name and the index in 'Commits' it can be found
     @param commits: An Array containing CustomCommit objects
-    @param commit_map: A map of files to commit indexes where they are modified
+    @param commit_map: A map of files to commit indexes where they are modified, in ascending order
+    @param implementation_index: The index of the repository's implementation files. Without it, the implementation file
+                                 is the exact path derived from the test file by the file handler.
     @return: Integer index where the tests nearest implementation file is (only searching future commits) or None.
     """
-    implementation_file = file_handler.get_implementation_file(test_file[1])
+    if implementation_index is not None:
+        implementation_file = implementation_index.get_implementation_file(test_file[1])
+    else:
+        implementation_file = file_handler.get_implementation_file(test_file[1])
 
-    candidate_indices = commit_map.get(implementation_file, [])
+    candidate_indices = commit_map.get(implementation_file, []) if implementation_file is not None else []
     if not candidate_indices:
         return None
     
+    # The candidates are sorted, so the nearest ones on either side of the test are found by binary search
     test_index = test_file[0]
-    before_candidates = [i for i in candidate_indices if i < test_index]
-    after_candidates = [i for i in candidate_indices if i >= test_index]
-
-    before_index = max(before_candidates, default=None)
-    after_index = min(after_candidates, default=None)
+    position = bisect_left(candidate_indices, test_index)
+    before_index = candidate_indices[position - 1] if position > 0 else None
+    after_index = candidate_indices[position] if position < len(candidate_indices) else None
 
     if after_index == before_index:
         return after_index
@@ -65,21 +78,107 @@ def find_nearest_implementation(test_file, commits, commit_map, file_handler: La
 
     return before_index if distance_before <= distance_after else after_index
 
-def calculate_average_commit_size(commits, test_files):
-    '''
-    Calculate the average commit size for commits containing tests
+def compute_repo_metrics(commits, file_handler: LanguageFileHandler, commit_map = None):
+    """
+    Computes the metrics of a repository, traversing its commits once and then the modifications of its test files once.
+    Each test file modification is categorised by its nearest implementation commit, matched through an ImplementationIndex.
     @param commits: An Array containing CustomCommit objects
-    @param test_files: The test files to iterate over
-    @return: The average commit size
-    '''
-    total = 0
-    counter = 0
-    complete_indexes = []
-
-    for test_file in test_files:
-        if test_file[0] not in complete_indexes:
-            total += commits[test_file[0]].size
-            counter += 1
-            complete_indexes.append(test_file[0])
-
-    return round(total/counter, 1) if counter != 0 else 0
+    @param file_handler: Object containing information required to recognise the test files of a particular programming language
+    @param commit_map: A map of files to the commit indexes where they are modified, built from the commits when not given.
+                       The commits then do not need their modified files.
+    @return: The RepoMetrics of the repository, or None if it has no test files.
+    """
+    if commit_map is None:
+        commit_map = defaultdict(list)
+        test_files = []
+        for i, commit in enumerate(commits):
+            for file in commit.modified_files:
+                commit_map[file].append(i)
+                if file_handler.is_test_file(file):
+                    test_files.append((i, file))
+    else:
+        # The modifications of the test files are taken from the map, in the order of the commits
+        test_files = sorted((i, file) for file, indices in commit_map.items() if file_handler.is_test_file(file) for i in indices)
+    if not test_files:
+        return None
+    implementation_index = ImplementationIndex(commit_map, file_handler)
+
+    test_counts = [0, 0, 0]
+    size_totals = [0, 0, 0]
+    test_commits = [set(), set(), set()]
+    author_counts = {}
+    # Authors are exported in the order they first appear among the tests written before, then after, then during their implementation
+    author_order = {}
+    for position, test_file in enumerate(test_files):
+        nearest_implementation = find_nearest_implementation(test_file, commits, commit_map, file_handler, implementation_index)
+        if nearest_implementation is None:
+            continue
+
+        test_index = test_file[0]
+        category = BEFORE if test_index < nearest_implementation else AFTER if test_index > nearest_implementation else DURING
+        test_counts[category] += 1
+        if test_index not in test_commits[category]:
+            test_commits[category].add(test_index)
+            size_totals[category] += commits[test_index].size
+
+        author = str(commits[test_index].author).split(',')[0]
+        author_counts.setdefault(author, [0, 0, 0])[category] += 1
+        if author not in author_order or category < author_order[author][0]:
+            author_order[author] = (category, position)
+
+    average_sizes = [round(size_totals[category] / len(test_commits[category]), 1) if test_commits[category] else 0
+                     for category in (BEFORE, AFTER, DURING)]
+    average_sizes.append(round(sum(average_sizes) / 3, 1))
+    author_counts = {author: author_counts[author] for author in sorted(author_order, key=author_order.get)}
+    return RepoMetrics(len(commits), test_counts, average_sizes, author_counts)
+
+def process_repository(repo_name: str, file_handler: LanguageFileHandler, store: str = FILE_STORE, anonymisation_key: bytes = None):
+    """
+    Reads the commits of a mined repository and computes its metrics.
+    Only takes and returns picklable values, so that repositories can be processed on worker processes.
+    @param repo_name: The name of the repository
+    @param file_handler: Object containing information required to recognise the test files of a particular programming language
+    @param store: The commit store the repository was mined to
+    @param anonymisation_key: The key of the author IDs. None to read the key of the project.
+    @return: A tuple of the RepoMetrics of the repository (None if it has no test files, or its commits cannot be read)
+             and the processing duration, in seconds. Its authors are anonymised, see 'csv_export.anonymise_author_counts', so author names are never stored.
+             The results of a repository whose commits, handler rules and processing are unchanged are those stored by a previous run,
+             along with the duration of that run.
+    """
+    logging.notify('Started processing ' + repo_name)
+    anonymisation_key = anonymisation_key if anonymisation_key is not None else csv_export.read_anonymisation_key()
+    digest = retrieval.get_cache_digest(repo_name, store)
+    # Stored author IDs only hold for the key they were given with. The result key is a digest, which does not reveal it.
+    key = result_cache.get_key(digest, file_handler.name, file_handler.rules_version, PROCESSING_VERSION,
+                               anonymisation_key.hex()) if digest is not None else None
+    result = result_cache.read_result(key) if key is not None else None
+    if result is not None:
+        logging.notify(f"Reused the processed results of {repo_name}.")
+        metrics = RepoMetrics.from_dict(result["metrics"]) if result["metrics"] is not None else None
+        return metrics, result["duration"]
+
+    start_time = timeit.default_timer()
+    # Paths are classified and resolved once per repository, however many commits modify them
+    file_handler = CachedFileHandler(file_handler)
+
+    try:
+        if store == SQLITE_STORE:
+            # The commits modifying each file are read at once from the database's file index, so the commits are read without their files
+            commits = commit_database.read_commits(repo_name, with_files=False)
+            commit_map = commit_database.read_commit_map(repo_name)
+        else:
+            commits, commit_map = retrieval.read_repo_info(repo_name, store), None
+    except Exception as e:
+        # Metrics of part of the commits must never be stored as those of the repository
+        logging.error(f"Could not read the commits of {repo_name}: {e}")
+        return None, round((timeit.default_timer() - start_time), 1)
+    metrics = compute_repo_metrics(commits, file_handler, commit_map)
+
+    if metrics is not None:
+        metrics.author_counts = csv_export.anonymise_author_counts(metrics.author_counts, anonymisation_key)
+
+    logging.info(f"Resolved the paths of {repo_name} with {file_handler.hits} cache hits and {file_handler.misses} misses.")
+    duration = round((timeit.default_timer() - start_time), 1)
+    if key is not None:
+        result_cache.write_result(key, {"metrics": metrics.to_dict() if metrics is not None else None, "duration": duration})
+    return metrics, duration
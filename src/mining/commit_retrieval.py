@@ -1,65 +1,405 @@
 import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
 import logging
+import multiprocessing
 import os
+import sys
+import time
 from src.infrastructure import repository_utils as repository_utils
+from src.infrastructure import git_log as git_log
+from src.infrastructure import commit_cache as commit_cache
+from src.infrastructure import commit_database as commit_database
 from src.infrastructure import file_utils as file_utils
 from src.infrastructure import serialize as serializer
 from src.models.file_handlers.LanguageFileHandler import LanguageFileHandler
 from src.models.CustomCommit import CustomCommit
+from src.models.MiningOptions import FILE_STORE, GIT_LOG_BACKEND, SQLITE_STORE, MiningOptions
 from src.models.Repository import Repository
 
+_OPEN_ATTEMPTS = 10
+
+def _get_path(modified_file) -> str:
+    # Deleted files only have their old path. PyDriller gives paths with the separator of the platform.
+    path = modified_file.new_path if modified_file.new_path is not None else modified_file.old_path
+    return path.replace(os.sep, "/")
+
 def _retrieve_files(modified_files, file_handler: LanguageFileHandler):
     files = []
 
     for file in modified_files:
         if any(file_extension in file.filename for file_extension in file_handler.file_extensions):
-            files.append(file.filename)
+            # Files are stored by their path in the repository, so tests can be matched with implementation files in other directories.
+            # Each commit gets its own copy of a path, while the processing only needs one per file.
+            files.append(sys.intern(_get_path(file)))
 
     return files
 
-def _retrieve_commits(repo_url, file_handler: LanguageFileHandler, final_date = None):
-    commits = []
+def _to_custom_commit(commit, file_handler: LanguageFileHandler):
+    return CustomCommit(commit.hash, _retrieve_files(commit.modified_files, file_handler), commit.author, commit.author_date)
+
+def _get_clone_filter(options: MiningOptions):
+    return repository_utils.PARTIAL_CLONE_FILTER if options.partial_clone else None
+
+def _get_source(repo_url, options: MiningOptions):
+    return repository_utils.mirror_repository(repo_url, _get_clone_filter(options)) if options.use_mirror else repo_url
+
+def _read_commits(repository_path, file_handler: LanguageFileHandler, final_date, from_commit, options: MiningOptions):
+    if options.backend == GIT_LOG_BACKEND:
+        return git_log.read_commits(repository_path, file_handler.file_extensions, final_date, from_commit)
+    return repository_utils.read_commits(repository_path, file_handler.file_extensions, final_date, from_commit)
+
+def _read_window(repository_path, file_handler: LanguageFileHandler, window, final_date, backend):
+    since, until = window
+    # A window ending in the future (commits with skewed dates) is bounded like a serial traversal instead
+    until = until if until < datetime.now(timezone.utc) else final_date
+
+    if backend == GIT_LOG_BACKEND:
+        commits = git_log.read_commits(repository_path, file_handler.file_extensions, until, since=since)
+        return {commit.hash: _to_custom_commit(commit, file_handler) for commit in commits}
+
+    for attempt in range(_OPEN_ATTEMPTS):
+        try:
+            commits = repository_utils.read_commits(repository_path, file_handler.file_extensions, until, since=since)
+            return {commit.hash: _to_custom_commit(commit, file_handler) for commit in commits}
+        except OSError as e:
+            # PyDriller writes to the repository configuration when opening it, which fails while another window holds its lock
+            if "config.lock" not in str(e) or attempt == _OPEN_ATTEMPTS - 1:
+                raise
+            time.sleep(0.05 * (attempt + 1))
+
+def _window_executor(backend, window_count):
+    # 'git log' runs in subprocesses, but PyDriller holds the GIL while reading commits, so its windows need separate processes
+    if backend == GIT_LOG_BACKEND:
+        return ThreadPoolExecutor(max_workers=max(1, window_count))
+    return ProcessPoolExecutor(max_workers=max(1, window_count), mp_context=multiprocessing.get_context("spawn"))
+
+def _iterate_sharded_commits(repository_path, file_handler: LanguageFileHandler, final_date, options: MiningOptions):
+    """
+    Traverses the date windows of a repository's history concurrently, against one local clone.
+    The commits of every window are kept in memory, and yielded once all windows are read, in the order of a serial traversal.
+    """
+    # PyDriller always stops at the current time, while 'git log' has no limit by default
+    history_end = final_date if final_date is not None or options.backend == GIT_LOG_BACKEND else datetime.now()
+    commit_dates = repository_utils.read_commit_dates(repository_path, history_end)
+    windows = repository_utils.split_date_windows(commit_dates, options.shards)
+
+    commits = {}
+    with _window_executor(options.backend, len(windows)) as executor:
+        futures = [executor.submit(_read_window, repository_path, file_handler, window, final_date, options.backend) for window in windows]
+        for future in futures:
+            commits.update(future.result())
+
+    for commit_hash, _ in commit_dates:
+        if commit_hash in commits:
+            yield commits[commit_hash]
+
+def _iterate_commits(repository_path, file_handler: LanguageFileHandler, final_date = None, from_commit = None, options: MiningOptions = None):
+    options = options if options else MiningOptions()
+    # Incremental traversals only read recent commits, so they are not worth sharding
+    if options.shards > 1 and from_commit is None:
+        yield from _iterate_sharded_commits(repository_path, file_handler, final_date, options)
+        return
+
+    for commit in _read_commits(repository_path, file_handler, final_date, from_commit, options):
+        yield _to_custom_commit(commit, file_handler)
+
+def _get_serialized_file_name(repo_name: str):
+    return os.path.join(file_utils.COMMITS_PATH, f"{repo_name}.commits")
+
+def _get_legacy_file_name(repo_name: str):
+    return os.path.join(file_utils.COMMITS_PATH, f"{repo_name}.pkl")
+
+def _migrate_legacy_cache(repo_name: str):
+    """
+    Converts a cache pickled by earlier versions to the columnar format, so that it can be read and extended like any other cache.
+    """
+    legacy_path = _get_legacy_file_name(repo_name)
+    if not file_utils.file_exists(legacy_path) or file_utils.file_exists(_get_serialized_file_name(repo_name)):
+        return
+
+    def legacy_commits():
+        for chunk in serializer.deserialize_chunks(legacy_path):
+            yield from chunk
 
     try:
-        for commit in repository_utils.read_commits(repo_url, file_handler.file_extensions, final_date):
-            files = _retrieve_files(commit.modified_files, file_handler)
-            commits.append(CustomCommit(commit.hash, files, commit.author, commit.author_date))
+        commit_cache.write_commits(_get_serialized_file_name(repo_name), legacy_commits())
     except Exception as e:
-        logging.error(f"Could not drill repository {repo_url}: {e}")
-        return []
+        # The repository is then mined again
+        logging.warning(f"Could not convert the commit cache of {repo_name}: {e}")
+        return
+    os.remove(legacy_path)
+    logging.info(f"Converted the commit cache of {repo_name} to the columnar format.")
 
-    return commits
+def _get_metadata_file_name(repo_name: str, store: str = FILE_STORE):
+    # Each store keeps its own metadata, as a repository can be mined to both
+    file_name = f"{repo_name}.json" if store == FILE_STORE else f"{repo_name}.{store}.json"
+    return os.path.join(file_utils.COMMITS_PATH, file_name)
 
-def _get_serialized_file_name(repo_name: str):
-    return os.path.join(file_utils.COMMITS_PATH, f"{repo_name}.pkl") 
+def _get_cache_key(file_handler: LanguageFileHandler, final_date, store: str = FILE_STORE):
+    """
+    The settings a cache was mined with. A cache mined with other settings holds other commits, and cannot be reused.
+    """
+    format_version = commit_database.SCHEMA_VERSION if store == SQLITE_STORE else commit_cache.FORMAT_VERSION
+    return {"final_date": final_date, "extensions": sorted(file_handler.file_extensions), "format_version": format_version}
 
-async def retrieve_and_store_repo_info(repo: Repository, file_handler: LanguageFileHandler, final_date = None, force_mine: bool = False):
+def _get_changed_settings(metadata, key):
+    # Caches mined before a setting was recorded are assumed to match it
+    return [setting for setting, value in key.items() if setting in metadata and metadata[setting] != value]
+
+def _can_extend(metadata, key):
+    """
+    Whether the commits missing from a cache mined with the given metadata can be appended to it.
+    """
+    if any(setting != "final_date" for setting in _get_changed_settings(metadata, key)):
+        return False
+    if "final_date" not in metadata or metadata["final_date"] == key["final_date"]:
+        return True
+    # Commits cached up to a later final date, or up to the time of mining, would be kept
+    return metadata["final_date"] is not None and (key["final_date"] is None or key["final_date"] > metadata["final_date"])
+
+def _write_metadata(repo_name: str, metadata, store: str = FILE_STORE):
+    serialized = dict(metadata, last_date=metadata["last_date"].isoformat())
+    if "final_date" in metadata:
+        serialized["final_date"] = metadata["final_date"].isoformat() if metadata["final_date"] is not None else None
+    with open(_get_metadata_file_name(repo_name, store), "w", encoding="utf-8") as file:
+        json.dump(serialized, file)
+
+def _is_stored(repo_name: str, store: str = FILE_STORE):
+    if store == SQLITE_STORE:
+        return commit_database.has_commits(repo_name)
+    return file_utils.file_exists(_get_serialized_file_name(repo_name))
+
+def read_metadata(repo_name: str, store: str = FILE_STORE):
+    '''
+    Reads the manifest entry of a mined repository, which describes its cache without reading it.
+    Caches written before this information was stored fall back to their last commit.
+    @param repo_name: The name of the repository.
+    @param store: The commit store the repository was mined to.
+    @return: A dictionary with the 'last_commit' hash, the 'last_date' datetime, whether the mining was 'complete' and the 'commit_count'
+             (None if unknown), along with the traversed 'head' commit, the 'final_date', the file 'extensions' and the 'format_version'
+             the cache was mined with, when they were recorded. None if the repository was not mined.
+    '''
+    if store == FILE_STORE:
+        _migrate_legacy_cache(repo_name)
+    if not _is_stored(repo_name, store):
+        return None
+
+    metadata_path = _get_metadata_file_name(repo_name, store)
+    if file_utils.file_exists(metadata_path):
+        with open(metadata_path, "r", encoding="utf-8") as file:
+            stored = json.load(file)
+        metadata = {"last_commit": stored["last_commit"], "last_date": datetime.fromisoformat(stored["last_date"]),
+                    "complete": stored.get("complete", True), "commit_count": stored.get("commit_count")}
+        for setting in ["head", "final_date", "extensions", "format_version"]:
+            if setting in stored:
+                metadata[setting] = stored[setting]
+        # Caches mined before their format was recorded have the first format, which only held the names of the files
+        metadata.setdefault("format_version", 1)
+        if metadata.get("final_date") is not None:
+            metadata["final_date"] = datetime.fromisoformat(metadata["final_date"])
+        return metadata
+
+    last_commit = None
+    commit_count = 0
+    try:
+        for commit_count, last_commit in enumerate(iterate_repo_info(repo_name, store), start=1):
+            pass
+    except Exception as e:
+        # The repository is then mined again
+        logging.warning(f"Could not read the commit cache of {repo_name}: {e}")
+        return None
+    if last_commit is None:
+        return None
+    return {"last_commit": last_commit.hash, "last_date": last_commit.date, "complete": True, "commit_count": commit_count, "format_version": 1}
+
+def get_cache_digest(repo_name: str, store: str = FILE_STORE):
+    '''
+    Computes a digest of the commits stored for a repository, which changes whenever they change.
+    @param repo_name: The name of the repository.
+    @param store: The commit store the repository was mined to.
+    @return: A hexadecimal digest, or None if the repository was not mined.
+    '''
+    if store == SQLITE_STORE:
+        # The database holds every repository, so its manifest entry stands in for the commits.
+        # It names the last commit, whose hash is itself a digest of the history before it.
+        file_path = _get_metadata_file_name(repo_name, store)
+        if not _is_stored(repo_name, store):
+            return None
+    else:
+        _migrate_legacy_cache(repo_name)
+        file_path = _get_serialized_file_name(repo_name)
+
+    if not file_utils.file_exists(file_path):
+        return None
+    with open(file_path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+def _mine_to_file(repo: Repository, file_handler: LanguageFileHandler, final_date, metadata, options: MiningOptions):
+    """
+    Streams the commits of a repository to its commit cache, in chunks, while the repository is being traversed.
+    With the metadata of an existing cache, the commits missing from the history of its last traversed commit are appended to it,
+    including those of branches merged since.
+    @return: The number of commits written.
+    """
+    last_commit = None
+    head = None
+
+    def track_last_commit(commits):
+        nonlocal last_commit
+        for last_commit in commits:
+            yield last_commit
+
+    append = metadata is not None
+    # Caches written before the traversed commit was recorded, or by an interrupted mining, only know their last cached commit
+    cached_hashes = _read_cached_hashes(repo.name, options.store) if append and "head" not in metadata else set()
+    try:
+        with repository_utils.local_repository(_get_source(repo.url, options), _get_clone_filter(options)) as repository_path:
+            head = repository_utils.read_head(repository_path)
+            if append:
+                commits = _iterate_new_commits(repository_path, file_handler, final_date, metadata, options)
+            else:
+                commits = _iterate_commits(repository_path, file_handler, final_date, None, options)
+            commits = track_last_commit(commit for commit in commits if commit.hash not in cached_hashes)
+            if options.store == SQLITE_STORE:
+                count = commit_database.write_commits(repo.name, commits, options.chunk_size, append=append)
+            else:
+                count = commit_cache.write_commits(_get_serialized_file_name(repo.name), commits, options.chunk_size, append=append)
+    except Exception as e:
+        logging.error(f"Could not drill repository {repo.url}: {e}")
+        return 0
+
+    if count > 0 or append:
+        # An extended cache records its new head even without new commits, so the same history is not traversed again
+        _write_metadata(repo.name, _get_updated_metadata(metadata, last_commit, count, _get_cache_key(file_handler, final_date, options.store), head=head),
+                        options.store)
+    return count
+
+def _iterate_new_commits(repository_path, file_handler: LanguageFileHandler, final_date, metadata, options: MiningOptions):
+    """
+    Traverses the commits missing from a cache: those missing from the history of its last traversed commit, preceded,
+    when the final date is later than the one the cache was mined with, by the commits of that history dated after the previous final date.
+    """
+    from_commit = metadata.get("head", metadata["last_commit"])
+    previous_final_date = metadata.get("final_date")
+    if previous_final_date is not None and previous_final_date != final_date:
+        # Git dates are whole seconds, and the previous traversal read the commits of its final date
+        since = previous_final_date + timedelta(seconds=1)
+        read_commits = git_log.read_commits if options.backend == GIT_LOG_BACKEND else repository_utils.read_commits
+        for commit in read_commits(repository_path, file_handler.file_extensions, final_date, since=since, to_commit=from_commit):
+            yield _to_custom_commit(commit, file_handler)
+
+    yield from _iterate_commits(repository_path, file_handler, final_date, from_commit, options)
+
+def _read_cached_hashes(repo_name: str, store: str = FILE_STORE):
+    return {commit.hash for commit in iterate_repo_info(repo_name, store)}
+
+def _get_updated_metadata(metadata, last_commit: CustomCommit, count: int, key, complete: bool = True, head: str = None):
+    updated = {"last_commit": metadata["last_commit"], "last_date": metadata["last_date"]} if metadata is not None else {}
+    if last_commit is not None:
+        updated = {"last_commit": last_commit.hash, "last_date": last_commit.date}
+    # Only a complete traversal covers the whole history of its head
+    if head is not None:
+        updated["head"] = head
+
+    commit_count = count
+    if metadata is not None:
+        commit_count = metadata["commit_count"] + count if metadata.get("commit_count") is not None else None
+    return {**updated, "complete": complete, "commit_count": commit_count, **key}
+
+def store_repo_info(repo: Repository, file_handler: LanguageFileHandler, final_date = None, force_mine: bool = False, options: MiningOptions = None):
     """
     Retrieve, serialize, and write repository information to a file with the repo name under results/commits.
+    Runs synchronously, so it can be used from worker threads and processes alike.
+    A cache is reused when its manifest entry matches the final date, file extensions and format of this mining, and it was mined completely.
     @param repo: The URL to the repository.
     @param file_handler: Object containing information required to retrieve files specific to the a particular programming language
+    @param options: How to mine the repository. In incremental mode, an existing cache mined with the same settings, or up to an earlier
+                    final date, is extended with the commits missing from it.
     """
-    file_path = _get_serialized_file_name(repo.name)
+    options = options if options else MiningOptions()
+    key = _get_cache_key(file_handler, final_date, options.store)
+    metadata = read_metadata(repo.name, options.store) if not force_mine else None
 
-    if not force_mine and file_utils.file_exists(file_path):
-        return
+    if metadata is not None:
+        if options.incremental and _can_extend(metadata, key):
+            if _mine_to_file(repo, file_handler, final_date, metadata, options) == 0:
+                logging.notify(f"No new commits found for {repo.name} since {metadata['last_commit']}.")
+            return
 
-    commits = await asyncio.to_thread(_retrieve_commits, repo.url, file_handler, final_date)
-    if len(commits) == 0:
-        return
+        changed_settings = _get_changed_settings(metadata, key)
+        if changed_settings:
+            logging.notify(f"The commits of {repo.name} were mined with a different {', '.join(changed_settings).replace('_', ' ')}. Mining them again...")
+        elif not metadata["complete"]:
+            logging.notify(f"The commits of {repo.name} were only partially mined. Mining them again...")
+        else:
+            return
+
+    _mine_to_file(repo, file_handler, final_date, None, options)
 
-    await asyncio.to_thread(serializer.serialize, file_path, commits)
+def recover_repo_info(repo: Repository, file_handler: LanguageFileHandler, final_date = None, force_mine: bool = False,
+                      options: MiningOptions = None) -> int:
+    """
+    Keeps the commits written to the cache of a repository whose mining was interrupted, e.g. when it exceeded its budget.
+    The cache is marked as incomplete: it is mined again on the next run, or extended in incremental mode, skipping the commits it holds.
+    Must be called with the same arguments as the interrupted 'store_repo_info' call.
+    @param repo: The repository that was being mined.
+    @return: The number of commits kept.
+    """
+    options = options if options else MiningOptions()
+    key = _get_cache_key(file_handler, final_date, options.store)
+    # Nothing is written to the cache before the mining ends, so it still tells whether commits were being appended to it
+    metadata = read_metadata(repo.name, options.store) if not force_mine else None
+    if metadata is not None and not (options.incremental and _can_extend(metadata, key)):
+        metadata = None
+    append = metadata is not None
+    if append and "final_date" in metadata:
+        # The commits dated after the previous final date may not all have been read, so they are read again by the next extension
+        key = dict(key, final_date=metadata["final_date"])
+
+    if options.store == SQLITE_STORE:
+        count, last_commit = commit_database.recover_commits(repo.name, append)
+    else:
+        count, last_commit = commit_cache.recover_commits(_get_serialized_file_name(repo.name), append)
+    if count > 0:
+        _write_metadata(repo.name, _get_updated_metadata(metadata, last_commit, count, key, complete=False), options.store)
+    return count
+
+async def retrieve_and_store_repo_info(repo: Repository, file_handler: LanguageFileHandler, final_date = None, force_mine: bool = False, options: MiningOptions = None):
+    """
+    Retrieve, serialize, and write repository information to a file with the repo name under results/commits.
+    The work is done on a separate thread.
+    @param repo: The URL to the repository.
+    @param file_handler: Object containing information required to retrieve files specific to the a particular programming language
+    @param options: How to mine the repository.
+    """
+    await asyncio.to_thread(store_repo_info, repo, file_handler, final_date, force_mine, options)
     
-def read_repo_info(repo_name: str):
+def iterate_repo_info(repo_name: str, store: str = FILE_STORE):
     '''
-    Reads repo information from a file.
+    Lazily reads repo information from a file, one stored segment at a time, or from the commit database.
     @param repo_name: The name of the repository.
-    @return: An Array containing CustomCommit objects, or None if the deserialization fails.
+    @param store: The commit store the repository was mined to.
+    @return: A generator of CustomCommit objects, which is empty if the repository was not mined.
+             A cache that cannot be read raises its error, rather than ending the commits early.
     '''
-    file_path = _get_serialized_file_name(repo_name)
+    if store == SQLITE_STORE:
+        yield from commit_database.iterate_commits(repo_name)
+        return
+    _migrate_legacy_cache(repo_name)
     try:
-        repo_info = serializer.deserialize(file_path)
-    except Exception as e:
+        yield from commit_cache.iterate_commits(_get_serialized_file_name(repo_name))
+    except FileNotFoundError as e:
+        # Raised before any commit is read
         logging.warning(f"No 'commits' file found for repository '{repo_name}': {e}")
-        return []
-    return repo_info
\ No newline at end of file
+
+def read_repo_info(repo_name: str, store: str = FILE_STORE):
+    '''
+    Reads repo information from a file, which is memory-mapped rather than read into memory, or from the commit database.
+    @param repo_name: The name of the repository.
+    @param store: The commit store the repository was mined to.
+    @return: An Array containing CustomCommit objects, which is empty if the repository was not mined.
+    '''
+    return list(iterate_repo_info(repo_name, store))
@@ -1,71 +1,200 @@
+import asyncio
+import hashlib
+import hmac
 import logging
 import os.path
+import secrets
+import tempfile
+from typing import Optional
 from src.infrastructure import file_utils
 
 AUTHOR_FILE_NAME = "author_data"
 AUTHOR_CSV_PATH = os.path.join(file_utils.RESULTS_PATH, f"{AUTHOR_FILE_NAME}.csv")
 REPO_CSV_PATH = os.path.join(file_utils.RESULTS_PATH, "repo_data.csv")
+MINING_STATUS_CSV_PATH = os.path.join(file_utils.RESULTS_PATH, "mining_status.csv")
 
 REPO_HEADER = ["Repo Name", "Language", "Commit Count", "Test Before", "Test After", "Test During", "Duration (s)", 
                 "Avg Before Commit Size", "Avg After Commit Size", "Avg During Commit Size", "Avg Commit Size"]
 
 AUTHOR_HEADER = ["Author", "Test Before", "Test After", "Test During"]
 
-def _update_author_data_from_csv_line(data: list[str], csv_data: list[str]):
-    if len(data) != len(csv_data):
-        raise IndexError("Author data and CSV author data don't match!")
-    
-    updated_data = [str(int(data[i]) + int(csv_data[i])) for i in range (1, len(data))]
-    return [data[0]] + updated_data
+MINING_STATUS_HEADER = ["Repo Name", "Status", "Duration (s)", "Commits Kept"]
 
-def update_author_data(data: list[str]):
+# Length of the hexadecimal author IDs, long enough for millions of authors to never share an ID
+AUTHOR_ID_LENGTH = 16
+
+def update_mining_status(data: list[str]):
     """
-    Update the author's CSV file with new data
+    Update the mining status CSV with the outcome of mining a repository
     @param data: The data to update the file with
     """
-    author_name = data[0]
-    author_update_function = lambda data, csv_data: _update_author_data_from_csv_line(data, csv_data)
-    file_utils.create_or_update_csv(AUTHOR_CSV_PATH, AUTHOR_HEADER, data, author_name, author_update_function)
-    logging.notify("Wrote author data to " + AUTHOR_CSV_PATH)
+    repo_name = data[0]
+    file_utils.create_or_update_csv(MINING_STATUS_CSV_PATH, MINING_STATUS_HEADER, data, repo_name)
+    logging.notify("Wrote mining status to " + MINING_STATUS_CSV_PATH)
 
-def update_repo_data(data: list[str]):
+class ResultsAggregator():
     """
-    Update the repo CSV with the new data
-    @param data: The data to update the file with
+    Accumulates the rows of the repository and author CSV files in memory, and writes each file at once when flushed,
+    instead of reading and rewriting it for every row.
+    A repository added again replaces its row, and the counts of an author added again are added to theirs.
+    The files are replaced with the rows added since the aggregator was created, ordered by the positions of their repositories,
+    so they do not depend on the order in which the results are added.
+    Memory is not bounded: every repository and every distinct author added, across all the repositories of the run, is kept until
+    the aggregator is discarded, checkpoints included, as the files are rewritten from them. It grows with the number of distinct
+    authors, by about 300 bytes per author, i.e. around 300 MB for a million authors.
+    @param checkpoint_interval: Number of repositories added between two writes of the files, so an interrupted run keeps its results.
+                                None to only write them when flushed.
     """
-    repo_name = data[0]
-    file_utils.create_or_update_csv(REPO_CSV_PATH, REPO_HEADER, data, repo_name)
-    logging.notify("Wrote repo data to " + REPO_CSV_PATH)
-
-def update_author_count(commits, author_counts, test_files, index_to_update):
-    '''
-    Update all commit author's counts for a particular test file array
-    @param commits: An Array containing CustomCommit objects
-    @param author_counts: A map of authors to an array of commit types (before, after, during), each with the number of commits of that type for this author
-    @param test_files: The test files to iterate over
-    @index_to_update: The index of the commit type to update (before, after, during)
-    '''
-    for test_file in test_files:
-        author = str(commits[test_file[0]].author).split(',')[0]
-        if author not in author_counts.keys():
-            author_counts[author] = [0, 0, 0]
-        author_counts[author][index_to_update] += 1
-
-def anonymyse_authors():
-    '''
-    Update the author CSV file to replace author names with numeric values
-    '''
-    author_data = file_utils.read_csv(AUTHOR_FILE_NAME)
-    if len(author_data) == 0:
-        return
-
-    header = list(author_data[0].keys())
-
-    updated_data = [header]
-    for index, row in enumerate(author_data, start=1):
-        updated_row = row.copy()
-        updated_row["Author"] = str(index)
-        updated_data.append(list(updated_row.values()))
-
-    file_utils.write_csv(updated_data, AUTHOR_FILE_NAME)
-    logging.notify("Anonymized author data.")
+    def __init__(self, checkpoint_interval: Optional[int] = None):
+        self.checkpoint_interval = checkpoint_interval
+        self._repo_rows = {}
+        self._author_counts = {}
+        self._added = 0
+        self._pending = 0
+
+    def add_repo_results(self, repo_data: list, author_counts: dict, position=None):
+        """
+        Adds the results of a repository.
+        @param repo_data: The row of the repository in the repository CSV file.
+        @param author_counts: A map of author IDs, see 'anonymise_author_counts', to their counts of tests written before,
+                              after and during their implementation.
+        @param position: The position of the repository in the files, comparable with those of the other repositories.
+                         Defaults to the order in which the repositories are first added.
+        """
+        if position is None:
+            position = self._repo_rows[repo_data[0]][0] if repo_data[0] in self._repo_rows else (self._added,)
+        self._added += 1
+
+        self._repo_rows[repo_data[0]] = (position, list(repo_data))
+        for index, (author, counts) in enumerate(author_counts.items()):
+            author_position = (position, index)
+            first_position, author_row = self._author_counts.get(author, (author_position, [0] * len(counts)))
+            for i, count in enumerate(counts):
+                author_row[i] += int(count)
+            # An author is written where they first appear, whichever repository was added first
+            self._author_counts[author] = (min(first_position, author_position), author_row)
+
+        self._pending += 1
+        if self.checkpoint_interval is not None and self._pending >= self.checkpoint_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the repository and author CSV files, if results were added since they were last written.
+        """
+        if self._pending == 0:
+            return
+
+        repo_rows = [row for _, row in sorted(self._repo_rows.values(), key=lambda entry: entry[0])]
+        file_utils.replace_csv(REPO_CSV_PATH, [REPO_HEADER] + repo_rows)
+        logging.notify("Wrote repo data to " + REPO_CSV_PATH)
+        if self._author_counts:
+            authors = sorted(self._author_counts.items(), key=lambda entry: entry[1][0])
+            file_utils.replace_csv(AUTHOR_CSV_PATH, [AUTHOR_HEADER] + [[author] + counts for author, (_, counts) in authors])
+            logging.notify("Wrote author data to " + AUTHOR_CSV_PATH)
+        self._pending = 0
+
+_END_OF_RESULTS = object()
+
+class ResultsWriter():
+    """
+    Single writer of the repository and author CSV files.
+    Any number of producers, e.g. the tasks waiting for processing workers, submit the results of their repositories as messages.
+    A single task consumes them, merges them with a 'ResultsAggregator' and writes the files in batches, so the files are never
+    read or written by two producers at once and never miss a result.
+    @param aggregator: The aggregator merging the results, which writes the files at its checkpoints.
+    @param queue_size: The maximum number of results waiting to be merged, after which producers wait.
+    """
+    def __init__(self, aggregator: ResultsAggregator, queue_size: int = 0):
+        self.aggregator = aggregator
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._task = None
+
+    def start(self):
+        """
+        Starts the task merging the submitted results, on the running event loop.
+        """
+        self._task = asyncio.create_task(self._consume())
+
+    async def submit(self, repo_data: list, author_counts: dict, position=None):
+        """
+        Submits the results of a repository. See 'ResultsAggregator.add_repo_results' for the parameters.
+        @raise: The exception that stopped the writer, if any.
+        """
+        if self._task.done():
+            self._task.result()
+        await self._queue.put((repo_data, author_counts, position))
+
+    async def close(self):
+        """
+        Merges the results submitted so far, writes the files and stops the writer.
+        @raise: The exception that stopped the writer, if any.
+        """
+        if self._task is None:
+            return
+        if not self._task.done():
+            await self._queue.put(_END_OF_RESULTS)
+        try:
+            await self._task
+        finally:
+            self._task = None
+
+    async def _consume(self):
+        while True:
+            message = await self._queue.get()
+            if message is _END_OF_RESULTS:
+                break
+            self.aggregator.add_repo_results(*message)
+        self.aggregator.flush()
+
+def read_anonymisation_key(file_path: str = None) -> bytes:
+    """
+    Reads the key of the author IDs, generating a random key the first time.
+    Runs sharing this file, e.g. incremental runs or shards run on other machines with a copy of it, give the same IDs to the same authors.
+    The file must be kept private: anyone with the key can check whether a given name is behind an ID.
+    @param file_path: The path of the key file. Defaults to 'anonymisation.key' at the root of the project.
+    @return: The key.
+    """
+    file_path = file_path if file_path is not None else file_utils.ANONYMISATION_KEY_PATH
+    if not file_utils.file_exists(file_path):
+        directory = os.path.dirname(file_path)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix=".partial")
+        try:
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+                file.write(secrets.token_hex(32))
+            # Linking fails if another process created the key in the meantime, whose key is then used
+            os.link(temp_path, file_path)
+            logging.notify("Generated anonymisation key in " + file_path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temp_path)
+
+    with open(file_path, "r", encoding="utf-8") as file:
+        return bytes.fromhex(file.read().strip())
+
+def anonymise_author(author: str, key: bytes) -> str:
+    """
+    Gives the ID of an author, derived from their name and a secret key, so the name cannot be recovered from the ID.
+    The same name always gives the same ID with the same key, without keeping a table of the IDs given so far.
+    @param author: The name of the author.
+    @param key: The key of the author IDs, see 'read_anonymisation_key'.
+    @return: A hexadecimal ID of 'AUTHOR_ID_LENGTH' characters.
+    """
+    return hmac.new(key, author.encode("utf-8"), hashlib.sha256).hexdigest()[:AUTHOR_ID_LENGTH]
+
+def anonymise_author_counts(author_counts: dict, key: bytes) -> dict:
+    """
+    Replaces the names of the authors of a repository by their IDs, before the results of the repository are stored or exported.
+    @param author_counts: A map of author names to their counts of tests written before, after and during their implementation.
+    @param key: The key of the author IDs, see 'read_anonymisation_key'.
+    @return: A map of author IDs to their counts, in the order of the names. Names sharing an ID have their counts added.
+    """
+    anonymised_counts = {}
+    for author, counts in author_counts.items():
+        author_id = anonymise_author(author, key)
+        if author_id in anonymised_counts:
+            anonymised_counts[author_id] = [total + count for total, count in zip(anonymised_counts[author_id], counts)]
+        else:
+            anonymised_counts[author_id] = list(counts)
+    return anonymised_counts
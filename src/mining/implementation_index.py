@@ -0,0 +1,48 @@
+from typing import Dict, Iterable, Optional, Tuple
+from src.models.file_handlers.LanguageFileHandler import LanguageFileHandler
+
+class ImplementationIndex:
+    """
+    Index of the implementation files of a repository, finding the file tested by each test file.
+    The handlers derive an implementation path from the path of a test file, e.g. 'src/test/java/org/FooTest.java' gives
+    'src/test/java/org/Foo.java', which rarely exists in Maven, Gradle or pytest layouts, where tests have their own source root.
+    The tested file is instead the implementation file with the same name whose directories share the longest suffix with that path,
+    e.g. 'src/main/java/org/Foo.java', so a file in the same package is preferred over a file with the same name elsewhere.
+    Among equally close files, the one with the fewest directories is chosen, then the first one in alphabetical order.
+    """
+    def __init__(self, paths: Iterable[str], file_handler: LanguageFileHandler):
+        self.file_handler = file_handler
+        # Every implementation file is indexed under its name followed by each suffix of its directories
+        self._files: Dict[Tuple[str, ...], str] = {}
+        for path in paths:
+            if file_handler.is_test_file(path):
+                continue
+            *directories, name = path.split("/")
+            for depth in range(len(directories) + 1):
+                key = (name, *directories[len(directories) - depth:])
+                indexed_path = self._files.get(key)
+                if indexed_path is None or _rank(path) < _rank(indexed_path):
+                    self._files[key] = path
+        self._resolved: Dict[str, Optional[str]] = {}
+
+    def get_implementation_file(self, test_file: str) -> Optional[str]:
+        """
+        Finds the implementation file tested by a test file.
+        @param test_file: The path of the test file.
+        @return: The path of the implementation file, or None if the repository has no implementation file with the expected name.
+        """
+        if test_file in self._resolved:
+            return self._resolved[test_file]
+
+        *directories, name = self.file_handler.get_implementation_file(test_file).split("/")
+        implementation_file = None
+        for depth in range(len(directories), -1, -1):
+            implementation_file = self._files.get((name, *directories[len(directories) - depth:]))
+            if implementation_file is not None:
+                break
+
+        self._resolved[test_file] = implementation_file
+        return implementation_file
+
+def _rank(path: str):
+    return path.count("/"), path
@@ -0,0 +1,251 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional
+from src.infrastructure import configuration
+from src.mining import commit_retrieval as retrieval
+from src.models.file_handlers import get_handler
+from src.models.file_handlers.LanguageFileHandler import LanguageFileHandler
+from src.models.MiningOptions import MiningOptions
+from src.models.Repository import Repository
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where memory budgets are not supported
+    resource = None
+
+COMPLETED = "completed"
+TIMED_OUT = "timed out"
+MEMORY_EXCEEDED = "memory exceeded"
+FAILED = "failed"
+
+_MEMORY_EXCEEDED_EXIT_CODE = 75
+_POLL_INTERVAL = 0.1
+
+class MiningJob():
+    """
+    Picklable description of a single repository to mine.
+    Only plain values are stored, so that jobs can be sent to spawned worker processes.
+    """
+    def __init__(self, repo_name: str, repo_url: str, handler_name: str, final_date: Optional[datetime] = None, force_mine: bool = False,
+                 options: Optional[MiningOptions] = None):
+        self.repo_name = repo_name
+        self.repo_url = repo_url
+        self.handler_name = handler_name
+        self.final_date = final_date
+        self.force_mine = force_mine
+        self.options = options
+
+    @classmethod
+    def from_repository(cls, repo: Repository, file_handler: LanguageFileHandler, final_date: Optional[datetime] = None, force_mine: bool = False,
+                        options: Optional[MiningOptions] = None):
+        return cls(repo.name, repo.url, file_handler.name, final_date, force_mine, options)
+
+class MiningResult():
+    """
+    Outcome of a mining job.
+    @param status: COMPLETED, TIMED_OUT, MEMORY_EXCEEDED or FAILED.
+    @param duration: Wall time of the job, in seconds.
+    @param commits_kept: Number of commits kept from an interrupted job, None if the job was not interrupted.
+    """
+    def __init__(self, repo_name: str, status: str, duration: float, commits_kept: Optional[int] = None):
+        self.repo_name = repo_name
+        self.status = status
+        self.duration = duration
+        self.commits_kept = commits_kept
+
+def _initialise_worker(log_path: str):
+    configuration.setup_logging(log_path, filemode="a")
+
+def _get_peak_memory() -> int:
+    # The children only count once they have exited, and only the largest of them is reported
+    peak_memory = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Reported in bytes on macOS, and in kilobytes elsewhere
+    return peak_memory if sys.platform == "darwin" else peak_memory * 1024
+
+def _get_group_memory(group_id: int) -> int:
+    """
+    Sums the resident memory of the processes of a process group, as listed in /proc.
+    """
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    memory = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as file:
+                stat = file.read()
+        except OSError:
+            # The process exited in the meantime
+            continue
+        # The fields are counted from the end of the command name, which can hold spaces
+        fields = stat[stat.rindex(b")") + 2:].split()
+        if int(fields[2]) == group_id:
+            memory += int(fields[21]) * page_size
+    return memory
+
+def _get_memory() -> int:
+    # The job runs in its own process group, along with the git processes and shard workers it starts
+    if os.path.isdir("/proc"):
+        return _get_group_memory(os.getpgrp())
+    return _get_peak_memory()
+
+def _watch_memory(memory_budget: int):
+    while _get_memory() <= memory_budget:
+        time.sleep(_POLL_INTERVAL)
+    # Exiting without any clean up keeps the commits already written to disk
+    os._exit(_MEMORY_EXCEEDED_EXIT_CODE)
+
+def _run_with_budget(function: Callable, argument, log_path: str, memory_budget: Optional[int], temp_dir: str):
+    """
+    Entry point of the supervised processes running jobs with a budget.
+    """
+    if hasattr(os, "setpgrp"):
+        # The git processes started by the job can then be stopped along with it
+        os.setpgrp()
+    # Clones are made in a directory removed by the supervisor, even if the job is killed
+    tempfile.tempdir = temp_dir
+    _initialise_worker(log_path)
+
+    if memory_budget is not None:
+        threading.Thread(target=_watch_memory, args=(memory_budget,), daemon=True).start()
+    function(argument)
+
+def _stop(process):
+    if process.pid is None:
+        return
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        elif process.is_alive():
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+def run_mining_job(job: MiningJob):
+    """
+    Mines the repository described by the job and stores its commits.
+    This is the entry point of the worker processes.
+    @param job: The job to run.
+    @return: The name of the mined repository.
+    """
+    repo = Repository(job.repo_name, job.repo_url)
+    retrieval.store_repo_info(repo, get_handler(job.handler_name), job.final_date, job.force_mine, job.options)
+    return job.repo_name
+
+class MiningExecutor():
+    """
+    Runs mining jobs on a pool of worker processes, so that repository traversals do not share one GIL.
+    The pool uses the 'spawn' start method on every platform, so workers never inherit the parent's state.
+
+    With a time or memory budget, each job runs in its own supervised process instead, which is killed when it exceeds its budget.
+    The commits it already wrote are kept, and its repository is marked as incompletely mined.
+    @param workers: The maximum number of jobs run at the same time. Defaults to the number of CPU cores.
+    @param time_budget: The maximum wall time of a job, in seconds.
+    @param memory_budget: The maximum resident memory of a job, in megabytes. Not supported on Windows.
+                          On Linux, it is the memory of the job's process group, which includes the git processes and shard workers
+                          the job starts. Elsewhere, it is the peak memory of the job's process, or of its largest exited child.
+    """
+    def __init__(self, workers: Optional[int] = None, time_budget: Optional[float] = None, memory_budget: Optional[int] = None):
+        if memory_budget is not None and resource is None:
+            raise ValueError("Memory budgets are not supported on this platform.")
+
+        self.workers = workers if workers else os.cpu_count()
+        self.time_budget = time_budget
+        self.memory_budget = memory_budget
+        self._pool = None
+        self._slots = None
+
+    @property
+    def budgeted(self):
+        return self.time_budget is not None or self.memory_budget is not None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.shutdown()
+
+    def start(self):
+        if self.budgeted:
+            if self._slots is None:
+                self._slots = asyncio.Semaphore(self.workers)
+        elif self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialise_worker,
+                initargs=(configuration.log_path,))
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        self._slots = None
+
+    async def _run_supervised(self, function: Callable, argument) -> str:
+        """
+        Runs a function in a new process, killing it if it exceeds the budget.
+        @return: The status of the run.
+        """
+        memory_budget = self.memory_budget * 1024 * 1024 if self.memory_budget is not None else None
+        temp_dir = tempfile.mkdtemp(prefix="mining-")
+        process = multiprocessing.get_context("spawn").Process(
+            target=_run_with_budget, args=(function, argument, configuration.log_path, memory_budget, temp_dir))
+
+        try:
+            start_time = timeit.default_timer()
+            process.start()
+            while process.is_alive():
+                if self.time_budget is not None and timeit.default_timer() - start_time > self.time_budget:
+                    _stop(process)
+                    process.join()
+                    return TIMED_OUT
+                await asyncio.sleep(_POLL_INTERVAL)
+
+            process.join()
+            if process.exitcode == _MEMORY_EXCEEDED_EXIT_CODE:
+                return MEMORY_EXCEEDED
+            return COMPLETED if process.exitcode == 0 else FAILED
+        finally:
+            # Also stops the git processes left behind by a job that exceeded its memory budget
+            _stop(process)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    async def mine(self, job: MiningJob) -> MiningResult:
+        """
+        Mines a repository on one of the worker processes, or in a supervised process when the executor has a budget.
+        @param job: The job to run.
+        @return: The result of the job.
+        """
+        if self._pool is None and self._slots is None:
+            raise RuntimeError("The mining executor has not been started.")
+
+        if not self.budgeted:
+            start_time = timeit.default_timer()
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._pool, run_mining_job, job)
+            return MiningResult(job.repo_name, COMPLETED, timeit.default_timer() - start_time)
+
+        async with self._slots:
+            start_time = timeit.default_timer()
+            status = await self._run_supervised(run_mining_job, job)
+            duration = timeit.default_timer() - start_time
+
+        if status == COMPLETED:
+            return MiningResult(job.repo_name, status, duration)
+
+        repo = Repository(job.repo_name, job.repo_url)
+        commits_kept = retrieval.recover_repo_info(repo, get_handler(job.handler_name), job.final_date, job.force_mine, job.options)
+        return MiningResult(job.repo_name, status, duration, commits_kept)
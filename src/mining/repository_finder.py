@@ -66,3 +66,5 @@ class RepositoryFinder():
                 print(f"Could not perform analysis on repo {repo}: {e}")
 
         file_utils.write_csv(csv_contents, "repositories")
+        # Kept with the repository lists too, since 'results/' is cleared by every analysis run
+        file_utils.write_csv(csv_contents, f"{language}_repositories", file_utils.RESOURCES_PATH)
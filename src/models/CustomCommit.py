@@ -1,14 +1,28 @@
 class CustomCommit:
+    """
+    Commit as stored in the commit caches. Every cached commit of a repository is held in memory while it is processed,
+    so instances have no '__dict__' and keep their modified files in a tuple.
+    The file paths and authors are expected to be shared between commits, as they are when read from a commit cache.
+    """
+    __slots__ = ("hash", "modified_files", "author", "date", "size")
+
     def __init__(self, hash, modified_files, author, date):
         self.hash = hash
-        self.modified_files = modified_files
+        self.modified_files = tuple(modified_files)
         self.author = author
         self.date = date
         self.size = len(self.modified_files)
 
+    def __setstate__(self, state):
+        # Commits pickled before '__slots__' were used hold their attributes in a dictionary
+        attributes = state[1] if isinstance(state, tuple) else state
+        for name, value in attributes.items():
+            setattr(self, name, value)
+        self.modified_files = tuple(self.modified_files)
+
     def __str__(self):
         return ("\nCOMMIT - " + self.hash +
                 "\nMODIFIED - " + str(self.modified_files) +
                 "\nAUTHOR - " + str(self.author) +
                 "\nDATE - " + str(self.date) +
-                "\nSIZE - " + str(self.size))
\ No newline at end of file
+                "\nSIZE - " + str(self.size))
@@ -0,0 +1,43 @@
+PYDRILLER_BACKEND = "pydriller"
+GIT_LOG_BACKEND = "gitlog"
+BACKENDS = [PYDRILLER_BACKEND, GIT_LOG_BACKEND]
+
+FILE_STORE = "files"
+SQLITE_STORE = "sqlite"
+STORES = [FILE_STORE, SQLITE_STORE]
+
+class MiningOptions():
+    """
+    Settings controlling how repositories are mined.
+    @param incremental: Only traverse the commits after the last mined commit, appending them to the existing commit cache.
+    @param use_mirror: Traverse a persistent local bare mirror of the repository (under 'mirrors/') instead of a temporary clone.
+    @param backend: How commits are read: with PyDriller, or by parsing 'git log --name-only' without computing diffs.
+    @param chunk_size: Number of commits written to the commit cache at a time while a repository is traversed.
+    @param shards: Number of date windows of the history traversed concurrently, against one local clone. 1 traverses the history serially.
+    @param partial_clone: Clone repositories without their file contents, which are fetched on demand. Only supported by the git log backend.
+    @param time_budget: The maximum wall time spent mining a single repository, in seconds. Only enforced when mining on worker processes.
+    @param memory_budget: The maximum resident memory used to mine a single repository, including the processes it starts, in megabytes. Only enforced when mining on worker processes.
+    @param store: Where the mined commits are stored: in one commit cache file per repository, or in a single SQLite database.
+    """
+    def __init__(self, incremental: bool = False, use_mirror: bool = False, backend: str = PYDRILLER_BACKEND, chunk_size: int = 1000,
+                 shards: int = 1, partial_clone: bool = False, time_budget: float = None, memory_budget: int = None,
+                 store: str = FILE_STORE):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown mining backend '{backend}'. Expected one of: {', '.join(BACKENDS)}")
+        if store not in STORES:
+            raise ValueError(f"Unknown commit store '{store}'. Expected one of: {', '.join(STORES)}")
+        if shards < 1:
+            raise ValueError("The number of shards cannot be lower than 1.")
+        if partial_clone and backend != GIT_LOG_BACKEND:
+            # PyDriller reads the content of every modified file, which would be fetched one commit at a time
+            raise ValueError(f"Partial clones are only supported by the '{GIT_LOG_BACKEND}' backend.")
+
+        self.incremental = incremental
+        self.use_mirror = use_mirror
+        self.backend = backend
+        self.chunk_size = chunk_size
+        self.shards = shards
+        self.partial_clone = partial_clone
+        self.time_budget = time_budget
+        self.memory_budget = memory_budget
+        self.store = store
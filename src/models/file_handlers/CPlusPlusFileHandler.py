@@ -1,13 +1,19 @@
 import re
 
+_LOWERCASE_TEST_AFFIX = re.compile(r'(_test|test_)')
+_UPPERCASE_TEST_SUFFIX = re.compile(r'(Tests|Test)')
+
 class CPlusPlusFileHandler:
     name = "C++"
     file_extensions = [".cpp", ".cc", ".c++"]
+    rules_version = 2
 
     def is_test_file(self, file: str) -> bool:
-        return "test" in file or "Test" in file
+        name = file.rpartition("/")[2]
+        return "test" in name or "Test" in name
     
     def get_implementation_file(self, test_file: str) -> str:
-        remove_lowercase = re.sub(r'(_test|test_)', '', test_file)
-        remove_uppercase = re.sub(r'(Tests|Test)', '', remove_lowercase)
-        return remove_uppercase
\ No newline at end of file
+        directory, separator, name = test_file.rpartition("/")
+        remove_lowercase = _LOWERCASE_TEST_AFFIX.sub('', name)
+        remove_uppercase = _UPPERCASE_TEST_SUFFIX.sub('', remove_lowercase)
+        return directory + separator + remove_uppercase
\ No newline at end of file
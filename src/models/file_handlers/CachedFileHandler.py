@@ -0,0 +1,32 @@
+from functools import lru_cache
+from src.models.file_handlers.LanguageFileHandler import LanguageFileHandler
+
+DEFAULT_CACHE_SIZE = 65536
+
+class CachedFileHandler:
+    """
+    Wraps any file handler, remembering whether each path is a test file and which implementation file it tests.
+    The same paths are modified in many commits of a repository, so the handler's rules run once per distinct path.
+    At most 'max_size' paths are remembered per method, the least recently used ones being forgotten first.
+    """
+    def __init__(self, file_handler: LanguageFileHandler, max_size: int = DEFAULT_CACHE_SIZE):
+        self.file_handler = file_handler
+        self.name = file_handler.name
+        self.file_extensions = file_handler.file_extensions
+        self.rules_version = file_handler.rules_version
+        self._is_test_file = lru_cache(maxsize=max_size)(file_handler.is_test_file)
+        self._get_implementation_file = lru_cache(maxsize=max_size)(file_handler.get_implementation_file)
+
+    def is_test_file(self, file: str) -> bool:
+        return self._is_test_file(file)
+
+    def get_implementation_file(self, test_file: str) -> str:
+        return self._get_implementation_file(test_file)
+
+    @property
+    def hits(self) -> int:
+        return self._is_test_file.cache_info().hits + self._get_implementation_file.cache_info().hits
+
+    @property
+    def misses(self) -> int:
+        return self._is_test_file.cache_info().misses + self._get_implementation_file.cache_info().misses
@@ -1,11 +1,15 @@
 import re
 
+_TEST_SUFFIX = re.compile(r'(Tests|Test)')
+
 class JavaFileHandler:
     name = "Java"
     file_extensions = [".java"]
+    rules_version = 2
 
     def is_test_file(self, file: str) -> bool:
-        return "Test" in file
+        return "Test" in file.rpartition("/")[2]
     
     def get_implementation_file(self, test_file: str) -> str:
-        return re.sub(r'(Tests|Test)', '', test_file)
\ No newline at end of file
+        directory, separator, name = test_file.rpartition("/")
+        return directory + separator + _TEST_SUFFIX.sub('', name)
\ No newline at end of file
@@ -3,6 +3,9 @@ from typing import List, Protocol
 class LanguageFileHandler(Protocol):
     name: str
     file_extensions: List[str]
+    # Version of the rules recognising test files and their implementation files. Every handler increments it whenever its rules change,
+    # so that repositories processed with the previous rules are processed again.
+    rules_version: int
 
     def is_test_file(self, file: str) -> bool:
         ...
@@ -1,11 +1,15 @@
 import re
 
+_TEST_AFFIX = re.compile(r'(_test|test_)')
+
 class PythonFileHandler:
     name = "Python"
     file_extensions = [".py", ".ipy"]
+    rules_version = 2
 
     def is_test_file(self, file: str) -> bool:
-        return "test" in file
+        return "test" in file.rpartition("/")[2]
     
     def get_implementation_file(self, test_file: str) -> str:
-        return re.sub(r'(_test|test_)', '', test_file)
\ No newline at end of file
+        directory, separator, name = test_file.rpartition("/")
+        return directory + separator + _TEST_AFFIX.sub('', name)
\ No newline at end of file
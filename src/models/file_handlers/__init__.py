@@ -2,4 +2,25 @@ from .JavaFileHandler import JavaFileHandler
 from .PythonFileHandler import PythonFileHandler
 from .CSharpFileHandler import CSharpFileHandler
 from .KotlinFileHandler import KotlinFileHandler
-from .CPlusPlusFileHandler import CPlusPlusFileHandler
\ No newline at end of file
+from .CPlusPlusFileHandler import CPlusPlusFileHandler
+from .CachedFileHandler import CachedFileHandler
+
+def get_handler(language: str):
+    """
+    Creates the file handler for the given programming language.
+    @param language: The language name (e.g., "Java", "c#", "cplusplus"), case insensitive.
+    @return: A new file handler for the language.
+    """
+    match language.lower():
+        case "java":
+            return JavaFileHandler()
+        case "c#" | "csharp":
+            return CSharpFileHandler()
+        case "python":
+            return PythonFileHandler()
+        case "kotlin":
+            return KotlinFileHandler()
+        case "c++" | "cplusplus":
+            return CPlusPlusFileHandler()
+        case _:
+            raise ValueError(f"No file handler found for language {language}")
@@ -1,120 +1,173 @@
 import asyncio
+import copy
 import logging
-import timeit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from tqdm.asyncio import tqdm
+from src.infrastructure import configuration
 from src.infrastructure import repository_utils as repository_utils
+from src.infrastructure.work_queue import run_pipeline
 from src.models.file_handlers import LanguageFileHandler
 from src.mining import commit_processing as process
 from src.mining import commit_retrieval as retrieval
-from src.mining.csv_export import update_author_count, update_author_data, update_repo_data, anonymyse_authors
+from src.mining.mining_executor import COMPLETED, MiningExecutor, MiningJob
+from src.mining.csv_export import ResultsAggregator, ResultsWriter, read_anonymisation_key, update_mining_status
+from src.models.MiningOptions import MiningOptions
 from src.models.Repository import Repository
 from src.analysis import analysis
 
 class AnalysisManager():
-    def __init__(self, date_of_experiment: datetime):
+    def __init__(self, date_of_experiment: datetime, workers: int = None, mining_options: MiningOptions = None, largest_first: bool = False,
+                 processing_workers: int = 0, checkpoint_interval: int = None):
         self.date_of_experiment = date_of_experiment
-        
-
-    def _categorise_test_files(self, test_files, commits, commit_map, file_handler):
-        array_before = []
-        array_after = []
-        array_during = []
-
-        for test_file in test_files:
-            nearest_implementation = process.find_nearest_implementation(test_file, commits, commit_map, file_handler)
-            if nearest_implementation is None:
-                continue
-
-            if test_file[0] < nearest_implementation:
-                array_before.append(test_file)
-            elif test_file[0] > nearest_implementation:
-                array_after.append(test_file)
-            else:
-                array_during.append(test_file)
-        
-        return array_before, array_after, array_during
-
-    def _calculate_commit_metrics(self, commits, before, after, during):
-        avg_size_before = process.calculate_average_commit_size(commits, before)
-        avg_size_after = process.calculate_average_commit_size(commits, after)
-        avg_size_during = process.calculate_average_commit_size(commits, during)
-        avg_size_total = round((avg_size_before + avg_size_after + avg_size_during) / 3, 1)
-        return avg_size_before, avg_size_after, avg_size_during, avg_size_total
-
-    def _export_data(self, repo_name, commits, duration, avg_sizes, before, after, during, file_handler):
-        test_before = len(before)
-        test_after = len(after)
-        test_during = len(during)
-        data_for_repo_csv = [repo_name, file_handler.name, len(commits), test_before, test_after, test_during, duration, *avg_sizes]
-        
-        update_repo_data(data_for_repo_csv)
-
-        author_counts = {}
-        update_author_count(commits, author_counts, before, 0)
-        update_author_count(commits, author_counts, after, 1)
-        update_author_count(commits, author_counts, during, 2)
+        self.workers = workers
+        self.mining_options = mining_options if mining_options else MiningOptions()
+        self.largest_first = largest_first
+        self.processing_workers = processing_workers
+        # Results are merged in memory, and written once every 'checkpoint_interval' repositories and at the end of each language
+        self.results = ResultsAggregator(checkpoint_interval)
+        self._runs = 0
 
-        for key in author_counts.keys():
-            update_author_data([key] + author_counts[key])
 
-    def process_repo(self, repo, file_handler):
-        processing_started_message = 'Started processing ' + repo.name
-        logging.notify(processing_started_message)
-        start_time = timeit.default_timer()
+    async def _export_data(self, writer: ResultsWriter, repo_name, metrics: process.RepoMetrics, duration, file_handler, position):
+        data_for_repo_csv = [repo_name, file_handler.name, metrics.commit_count, *metrics.test_counts, duration, *metrics.average_sizes]
         
-        commits, test_files = process.gather_commits_and_tests(repo.name, file_handler)
-        if len(test_files) == 0:
-            logging.notify(f"No test files found for {repo.name}. Skipping...")
-            return
+        await writer.submit(data_for_repo_csv, metrics.author_counts, position)
 
-        commit_map = process.precompute_commit_map(commits)
-        before, after, during = self._categorise_test_files(test_files, commits, commit_map, file_handler)
+    async def _export_results(self, writer: ResultsWriter, repo_name, metrics: process.RepoMetrics, duration, file_handler, position):
+        if metrics is None:
+            logging.notify(f"No test files found for {repo_name}. Skipping...")
+            return
 
-        avg_sizes = self._calculate_commit_metrics(commits, before, after, during)
-        duration = round((timeit.default_timer() - start_time), 1)
-        self._export_data(repo.name, commits, duration, avg_sizes, before, after, during, file_handler)
+        await self._export_data(writer, repo_name, metrics, duration, file_handler, position)
 
-        processing_finished_message = "Finished processing " + repo.name
+        processing_finished_message = "Finished processing " + repo_name
         logging.notify(processing_finished_message)
 
-    async def _store_repo_data(self, repo, file_handler, force_mine):
+    async def _store_repo_data(self, repo, file_handler, force_mine, executor: MiningExecutor = None, mining_options: MiningOptions = None):
         processing_started_message = 'Started data retrieval for ' + repo.name
         logging.notify(processing_started_message)
-
-        await retrieval.retrieve_and_store_repo_info(repo, file_handler, final_date=self.date_of_experiment, force_mine=force_mine)
+        mining_options = mining_options if mining_options else self.mining_options
+
+        if executor is not None:
+            result = await executor.mine(MiningJob.from_repository(repo, file_handler, self.date_of_experiment, force_mine, mining_options))
+            if executor.budgeted:
+                commits_kept = result.commits_kept if result.commits_kept is not None else ""
+                update_mining_status([repo.name, result.status, round(result.duration, 1), commits_kept])
+            if result.status != COMPLETED:
+                logging.warning(f"Data retrieval for {repo.name} stopped ({result.status}). Kept {result.commits_kept} mined commits.")
+        else:
+            await retrieval.retrieve_and_store_repo_info(repo, file_handler, final_date=self.date_of_experiment, force_mine=force_mine,
+                                                         options=mining_options)
 
         processing_finished_message = "Finished data retrieval for " + repo.name
         logging.notify(processing_finished_message)
 
-    async def _process_repositories(self, repositories, file_handler: LanguageFileHandler, batch_size: int, force_mine: bool):
-        retrieval_message = f"Retrieval ({file_handler.name}):"
-        logging.notify(retrieval_message)
-        print(retrieval_message)
+    def _get_mining_options(self, concurrent_repositories: int) -> MiningOptions:
+        """
+        Caps the shards of each repository, so that the windows of the repositories mined at the same time never outnumber the CPU cores.
+        """
+        shards = max(1, os.cpu_count() // max(1, concurrent_repositories))
+        if self.mining_options.shards <= shards:
+            return self.mining_options
 
-        with tqdm(total=len(repositories)) as progress_bar:
-            async def process_and_update(repo):
-                await self._store_repo_data(repo, file_handler, force_mine)
-                progress_bar.update(1)
+        logging.warning(f"Mining {concurrent_repositories} repositories at a time with {self.mining_options.shards} shards each "
+                        f"would exceed the {os.cpu_count()} CPU cores. Using {shards} shards.")
+        mining_options = copy.copy(self.mining_options)
+        mining_options.shards = shards
+        return mining_options
 
-            for i in range(0, len(repositories), batch_size):
-                repo_batch = repositories[i:i + batch_size]
-                tasks = [process_and_update(repo) for repo in repo_batch]
-                await asyncio.gather(*tasks)
+    def _schedule(self, repositories, file_handler: LanguageFileHandler):
+        if not self.largest_first:
+            return repositories
 
-        processing_message = f"\nProcessing ({file_handler.name}):"
-        logging.notify(processing_message)
-        print(processing_message)
+        # The largest repositories are started first, so they do not end up alone at the end of the run
+        sizes = repository_utils.read_repository_sizes(file_handler.name.lower())
+        return repository_utils.sort_by_size(repositories, sizes)
 
-        timed_list = tqdm(repositories)
-        for repo in timed_list:
-            self.process_repo(repo, file_handler)
+    async def _process_repositories(self, repositories, file_handler: LanguageFileHandler, batch_size: int, force_mine: bool):
+        pipeline_message = f"Retrieval and processing ({file_handler.name}):"
+        logging.notify(pipeline_message)
+        print(pipeline_message)
+
+        # Without workers, mining falls back to threads in this process
+        executor = MiningExecutor(self.workers, self.mining_options.time_budget, self.mining_options.memory_budget) if self.workers != 0 else None
+        if executor is not None:
+            executor.start()
+        processing_pool = None
+        if self.processing_workers > 0:
+            processing_pool = ProcessPoolExecutor(
+                max_workers=self.processing_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=configuration.setup_logging,
+                initargs=(configuration.log_path, "a"))
+        processing_slots = asyncio.Semaphore(max(1, self.processing_workers))
+        processing_tasks = set()
+
+        # Results are written in the order of the repository list, whichever repository is processed first
+        self._runs += 1
+        repositories = self._schedule(repositories, file_handler)
+        positions = {repo.name: (self._runs, index) for index, repo in enumerate(repositories)}
+        # Read once, so the processing workers never generate the key themselves
+        anonymisation_key = read_anonymisation_key()
+        # As many repositories are mined at a time as there are mining workers (or CPU cores, when mining on threads),
+        # and mining waits while 'batch_size' mined repositories are waiting to be processed
+        mining_slots = executor.workers if executor is not None else os.cpu_count()
+        mining_options = self._get_mining_options(min(mining_slots, len(repositories)))
+        writer = ResultsWriter(self.results)
+        writer.start()
+
+        try:
+            with tqdm(total=len(repositories), desc="Retrieval", position=0) as retrieval_bar, \
+                 tqdm(total=len(repositories), desc="Processing", position=1) as processing_bar:
+                async def retrieve(repo):
+                    await self._store_repo_data(repo, file_handler, force_mine, executor, mining_options)
+                    retrieval_bar.update(1)
+
+                async def process_on_pool(repo):
+                    try:
+                        metrics, duration = await asyncio.get_running_loop().run_in_executor(
+                            processing_pool, process.process_repository, repo.name, file_handler, self.mining_options.store, anonymisation_key)
+                    finally:
+                        processing_slots.release()
+                    await self._export_results(writer, repo.name, metrics, duration, file_handler, positions[repo.name])
+                    processing_bar.update(1)
+                    processing_tasks.discard(asyncio.current_task())
+
+                async def process_and_export(repo):
+                    if processing_pool is None:
+                        # Repositories are processed one at a time, in the order their commits were stored
+                        metrics, duration = await asyncio.to_thread(
+                            process.process_repository, repo.name, file_handler, self.mining_options.store, anonymisation_key)
+                        await self._export_results(writer, repo.name, metrics, duration, file_handler, positions[repo.name])
+                        processing_bar.update(1)
+                        return
+
+                    # Repositories are processed on the pool, and their results are sent to the writer as soon as they are ready
+                    for task in list(processing_tasks):
+                        if task.done():
+                            task.result()
+                    await processing_slots.acquire()
+                    processing_tasks.add(asyncio.create_task(process_on_pool(repo)))
+
+                await run_pipeline(repositories, mining_slots, retrieve, process_and_export, queue_size=batch_size)
+                await asyncio.gather(*processing_tasks)
+        finally:
+            for task in processing_tasks:
+                task.cancel()
+            # The results received so far are written, even when the run is interrupted
+            await writer.close()
+            if executor is not None:
+                executor.shutdown()
+            if processing_pool is not None:
+                processing_pool.shutdown(wait=True)
 
         print()
 
     async def perform_analysis_on_repo(self, repo: Repository, file_handler: LanguageFileHandler, force_mine: bool):
         await self._process_repositories([repo], file_handler, batch_size=1, force_mine=force_mine)
-        anonymyse_authors()
         analysis.create_plots()
 
     async def perform_analysis(self, file_handlers: list, batch_size: int, force_mine: bool):
@@ -122,5 +175,4 @@ class AnalysisManager():
             repositories = repository_utils.read_repositories(file_handler.name.lower())
             await self._process_repositories(repositories, file_handler, batch_size, force_mine)
 
-        anonymyse_authors()
         analysis.create_plots()
\ No newline at end of file
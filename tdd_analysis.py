@@ -4,16 +4,12 @@ import argparse
 import asyncio
 from datetime import datetime
 import logging
+import os
 import sys
 from src.infrastructure import configuration, repository_utils
+from src.models.MiningOptions import BACKENDS, FILE_STORE, GIT_LOG_BACKEND, PYDRILLER_BACKEND, STORES, MiningOptions
 from src.presentation.analysis_manager import AnalysisManager
-from src.models.file_handlers import (
-    JavaFileHandler,
-    CSharpFileHandler,
-    PythonFileHandler,
-    KotlinFileHandler,
-    CPlusPlusFileHandler
-)
+from src.models.file_handlers import get_handler
 
 DEFAULT_EXPERIMENT_DATE = datetime(2024, 12, 1, 0, 0, 0)
 DEFAULT_LANGUAGES = ["Java", "C#", "C++", "Kotlin", "Python"]
@@ -55,13 +51,89 @@ def _get_parameters():
         "--batch_size",
         type=int,
         default = 8,
-        help="Batch size for asynchronous repository retrieval using PyDriller."
+        help="Number of mined repositories waiting to be processed, after which mining pauses until one of them is processed."
+    )
+    parser.add_argument(
+        "--largest_first",
+        action="store_true",
+        help="Retrieve the repositories with the most commits first, using the commit counts recorded by the repository finder."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of repositories retrieved concurrently, each on its own worker process. Use 0 to mine on threads of the main process instead, as many as there are CPU cores."
+    )
+    parser.add_argument(
+        "--processing_workers",
+        type=int,
+        default=0,
+        help="Number of worker processes used to process mined repositories. Use 0 to process them one at a time in the main process."
+    )
+    parser.add_argument(
+        "--checkpoint_interval",
+        type=int,
+        default=None,
+        help="Number of processed repositories between two writes of the result CSV files. By default, they are written once per language."
     )
     parser.add_argument(
         "--force_mine",
         action="store_true",
         help="Forcefully mine the repository/repositories, even if they have already been retrieved."
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only mine the commits made since the last mined commit of already retrieved repositories, and append them to the stored commits."
+    )
+    parser.add_argument(
+        "--mirror",
+        action="store_true",
+        help="Keep a local bare mirror of each repository under 'mirrors/', fetching updates instead of cloning it again on every run."
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        choices=BACKENDS,
+        default=PYDRILLER_BACKEND,
+        help="How commits are read: with PyDriller, or by parsing 'git log --name-only' output, which skips computing diffs."
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=1000,
+        help="Number of commits written to disk at a time while a repository is mined. Bounds the memory used per repository."
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Number of date windows of each repository's history mined concurrently. Speeds up very large repositories on multi-core machines. Capped at the CPU cores divided by the repositories mined at a time."
+    )
+    parser.add_argument(
+        "--partial_clone",
+        action="store_true",
+        help="Clone repositories without their file contents, which the analysis does not need. Requires the gitlog backend."
+    )
+    parser.add_argument(
+        "--time_budget",
+        type=float,
+        default=None,
+        help="Maximum time in seconds spent mining a single repository. Repositories over budget keep the commits mined so far."
+    )
+    parser.add_argument(
+        "--memory_budget",
+        type=int,
+        default=None,
+        help="Maximum peak memory in megabytes used to mine a single repository. Repositories over budget keep the commits mined so far."
+    )
+    parser.add_argument(
+        "--store",
+        type=str,
+        choices=STORES,
+        default=FILE_STORE,
+        help="Where mined commits are stored: in one file per repository under 'commits/', or in a single SQLite database indexed by file."
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -80,40 +152,46 @@ def _get_parameters():
     
     if args.batch_size < 1:
         raise argparse.ArgumentError(None, "--batch_size cannot be lower than 1.")
-    elif args.batch_size > 16:
-        response = input(f"Warning: --batch_size ({args.batch_size}) is greater than 16. Are you sure you want to continue? (Y/N): ").strip().lower()
-        while response not in {'y', 'n', 'yes', 'no'}:
-            response = input("Invalid input. Please enter 'yes'/'y' or 'no'/'n': ").strip().lower()
-        if response in {'no', 'n'}:
-            raise argparse.ArgumentError(None, "Operation aborted by the user.")
+
+    if args.workers < 0:
+        raise argparse.ArgumentError(None, "--workers cannot be lower than 0.")
+
+    if args.processing_workers < 0:
+        raise argparse.ArgumentError(None, "--processing_workers cannot be lower than 0.")
+
+    if args.checkpoint_interval is not None and args.checkpoint_interval < 1:
+        raise argparse.ArgumentError(None, "--checkpoint_interval cannot be lower than 1.")
+
+    if args.chunk_size < 1:
+        raise argparse.ArgumentError(None, "--chunk_size cannot be lower than 1.")
+
+    if args.shards < 1:
+        raise argparse.ArgumentError(None, "--shards cannot be lower than 1.")
+
+    if args.partial_clone and args.backend != GIT_LOG_BACKEND:
+        raise argparse.ArgumentError(None, f"--partial_clone requires --backend {GIT_LOG_BACKEND}.")
+
+    if args.time_budget is not None and args.time_budget <= 0:
+        raise argparse.ArgumentError(None, "--time_budget must be greater than 0.")
+
+    if args.memory_budget is not None and args.memory_budget <= 0:
+        raise argparse.ArgumentError(None, "--memory_budget must be greater than 0.")
+
+    if (args.time_budget is not None or args.memory_budget is not None) and args.workers == 0:
+        raise argparse.ArgumentError(None, "--time_budget and --memory_budget require --workers to be greater than 0.")
 
     return args
 
-def _get_handler(language):
-    match language.lower():
-        case "java":
-            return JavaFileHandler()
-        case "c#" | "csharp":
-            return CSharpFileHandler()
-        case "python":
-            return PythonFileHandler()
-        case "kotlin":
-            return KotlinFileHandler()
-        case "c++" | "cplusplus":
-            return CPlusPlusFileHandler()
-        case _:
-            raise ValueError(f"No file handler found for language {language}")
-        
 def _get_handlers(languages):
-    return [_get_handler(language) for language in languages]
+    return [get_handler(language) for language in languages]
 
 async def _process_single_repo(args, analysis: AnalysisManager):
     repo = repository_utils.repo_from_url(args.repository)
-    await analysis.perform_analysis_on_repo(repo, _get_handler(args.language), args.force_mine)
+    await analysis.perform_analysis_on_repo(repo, get_handler(args.language), args.force_mine)
 
 async def _process_all_repos(args, analysis: AnalysisManager):
     if (args.language is not None):
-        handlers = [_get_handler(args.language)]
+        handlers = [get_handler(args.language)]
     elif (args.languages is not None):
         handlers = _get_handlers(args.languages)
     else:
@@ -134,7 +212,12 @@ async def main():
 
         logging.notify(f"Running analysis for {args.date}...")
 
-        analysis = AnalysisManager(args.date)
+        mining_options = MiningOptions(incremental=args.incremental, use_mirror=args.mirror, backend=args.backend,
+                                       chunk_size=args.chunk_size, shards=args.shards,
+                                       partial_clone=args.partial_clone, time_budget=args.time_budget,
+                                       memory_budget=args.memory_budget, store=args.store)
+        analysis = AnalysisManager(args.date, args.workers, mining_options, args.largest_first, args.processing_workers,
+                                   args.checkpoint_interval)
 
         if args.repository is not None:
             await _process_single_repo(args, analysis)
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.analysis.adjustments import make_adjustments
+from src.analysis.results_table import read_results_table
+from src.infrastructure import file_utils
+from src.mining.csv_export import AUTHOR_HEADER, REPO_HEADER
+
+REPO_ROWS = [
+    ["owner/repo, with comma", "C#", 120, 4, 2, 1, 0.5, 3.0, 2.5, 1.0, 2.2],
+    ["other/repo", "Java", 30, 0, 0, 3, 1.25, 0, 0, 4.0, 1.3],
+    ["empty/repo", "Python", 0, 0, 0, 0, 0.0, 0, 0, 0, 0.0],
+]
+AUTHOR_ROWS = [["0123456789abcdef", 1, 2, 3], ["fedcba9876543210", 0, 0, 2]]
+
+# Files written by the original row by row adjustments, from the rows above
+BASELINE_REPO_DATA_ADJUSTED = (
+    "Repo Name,Language,Commit Count,Test Before,Test After,Test During,Duration (s),Avg Before Commit Size,Avg After Commit Size,"
+    "Avg During Commit Size,Avg Commit Size,Adjusted Test Before,Adjusted Test After\n"
+    "\"owner/repo, with comma\",C#,120,4,2,1,0.5,3.0,2.5,1.0,2.2,4,2\n"
+    "other/repo,Java,30,0,0,3,1.25,0,0,4.0,1.3,0,3\n"
+    "empty/repo,Python,0,0,0,0,0.0,0,0,0,0.0,0,0\n"
+)
+BASELINE_AUTHOR_DATA_ADJUSTED = (
+    "Author,Test Before,Test After,Test During,Adjusted Test Before,Adjusted Test After\n"
+    "0123456789abcdef,1,2,3,2,4\n"
+    "fedcba9876543210,0,0,2,0,2\n"
+)
+
+class TestAdjustments(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        file_utils.write_csv([REPO_HEADER] + REPO_ROWS, "repo_data", self.directory)
+        file_utils.write_csv([AUTHOR_HEADER] + AUTHOR_ROWS, "author_data", self.directory)
+        for patcher in [patch("src.analysis.results_table.file_utils.RESULTS_PATH", self.directory),
+                        patch("src.infrastructure.file_utils.RESULTS_PATH", self.directory)]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _read_adjusted(self, file_name):
+        with open(os.path.join(self.directory, f"{file_name}_adjusted.csv"), "r", encoding="utf-8") as file:
+            return file.read()
+
+    def test_make_adjustments_matches_baseline_repo_data(self):
+        # Act
+        make_adjustments("repo_data", read_results_table("repo_data"))
+
+        # Assert
+        self.assertEqual(self._read_adjusted("repo_data"), BASELINE_REPO_DATA_ADJUSTED)
+
+    def test_make_adjustments_matches_baseline_author_data(self):
+        # Act
+        make_adjustments("author_data", read_results_table("author_data"))
+
+        # Assert
+        self.assertEqual(self._read_adjusted("author_data"), BASELINE_AUTHOR_DATA_ADJUSTED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.analysis import analysis
+from src.infrastructure import file_utils
+from src.mining.csv_export import AUTHOR_HEADER, REPO_HEADER
+
+REPO_ROWS = [
+    ["owner/java-repo", "Java", 120, 4, 2, 1, 0.5, 3.0, 2.5, 1.0, 2.2],
+    ["owner/python-repo", "Python", 30, 0, 5, 3, 1.25, 0, 2.0, 4.0, 2.0],
+    ["owner/kotlin-repo", "Kotlin", 800, 9, 1, 0, 3.5, 1.5, 6.0, 0, 2.5],
+]
+AUTHOR_ROWS = [["0123456789abcdef", 3, 1, 0], ["fedcba9876543210", 0, 2, 2]]
+
+class TestAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        file_utils.write_csv([REPO_HEADER] + REPO_ROWS, "repo_data", self.directory)
+        file_utils.write_csv([AUTHOR_HEADER] + AUTHOR_ROWS, "author_data", self.directory)
+        for patcher in [patch("src.analysis.results_table.file_utils.RESULTS_PATH", self.directory),
+                        patch("src.analysis.analysis.make_adjustments")]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _create_plots(self):
+        charts_path = os.path.join(self.directory, "charts")
+        os.makedirs(charts_path)
+        with patch("src.analysis.analysis.file_utils.CHARTS_PATH", charts_path):
+            analysis.create_plots()
+        return sorted(os.listdir(charts_path))
+
+    def test_create_plots_renders_every_chart(self):
+        # Act
+        charts = self._create_plots()
+
+        # Assert
+        self.assertEqual(len(charts), 8)
+        self.assertIn("8 - TDD Repo Categories.jpg", charts)
+
+
+if __name__ == "__main__":
+    unittest.main()
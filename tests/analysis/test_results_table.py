@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+from src.analysis.adjustments import get_adjusted_tests
+from src.analysis.results_table import ResultsTable, read_results_table
+from src.infrastructure import file_utils
+from src.mining.csv_export import AUTHOR_HEADER, REPO_HEADER
+
+REPO_ROWS = [
+    ["owner/repo, with comma", "C#", 120, 4, 2, 1, 0.5, 3.0, 2.5, 1.0, 2.2],
+    ["other/repo", "Java", 30, 0, 0, 3, 1.25, 0, 0, 4.0, 1.3],
+]
+
+class TestResultsTable(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        results_patcher = patch("src.analysis.results_table.file_utils.RESULTS_PATH", self.directory)
+        results_patcher.start()
+        self.addCleanup(results_patcher.stop)
+
+    def test_read_results_table_parses_columns(self):
+        # Arrange
+        file_utils.write_csv([REPO_HEADER] + REPO_ROWS, "repo_data", self.directory)
+
+        # Act
+        repos = read_results_table("repo_data")
+
+        # Assert
+        self.assertEqual(list(repos.dtype.names), REPO_HEADER)
+        self.assertEqual(repos["Repo Name"].tolist(), ["owner/repo, with comma", "other/repo"])
+        self.assertEqual(repos["Language"].tolist(), ["C#", "Java"])
+        self.assertEqual(repos["Test Before"].dtype, np.int64)
+        self.assertEqual(repos["Test Before"].tolist(), [4, 0])
+        self.assertEqual(repos["Duration (s)"].tolist(), [0.5, 1.25])
+
+    def test_read_results_table_without_rows(self):
+        # Arrange
+        file_utils.write_csv([AUTHOR_HEADER], "author_data", self.directory)
+
+        # Act
+        authors = read_results_table("author_data")
+
+        # Assert
+        self.assertEqual(len(authors), 0)
+        self.assertEqual(list(authors.dtype.names), AUTHOR_HEADER)
+
+    def test_read_results_table_file_not_found(self):
+        # Act & Assert
+        with self.assertRaises(FileNotFoundError):
+            read_results_table("repo_data")
+
+    def test_results_table_read(self):
+        # Arrange
+        file_utils.write_csv([REPO_HEADER] + REPO_ROWS, "repo_data", self.directory)
+        file_utils.write_csv([AUTHOR_HEADER, ["0123456789abcdef", 1, 2, 3]], "author_data", self.directory)
+
+        # Act
+        results = ResultsTable.read()
+
+        # Assert
+        self.assertEqual(len(results.repos), 2)
+        self.assertEqual(results.authors["Author"].tolist(), ["0123456789abcdef"])
+        self.assertEqual(results.authors["Test During"].tolist(), [3])
+
+    def test_get_adjusted_tests(self):
+        # Arrange
+        file_utils.write_csv([REPO_HEADER] + REPO_ROWS, "repo_data", self.directory)
+        repos = read_results_table("repo_data")
+
+        # Act
+        adjusted_test_before, adjusted_test_after = get_adjusted_tests(repos)
+
+        # Assert
+        # 4 of the 6 tests written before or after the implementation were written before it, so 2/3 of the test written during it are
+        # counted as written before it, and a repository without such tests counts all its tests as written after it
+        self.assertEqual(adjusted_test_before.tolist(), [4, 0])
+        self.assertEqual(adjusted_test_after.tolist(), [2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
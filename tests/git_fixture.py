@@ -0,0 +1,34 @@
+import os
+import subprocess
+
+def git(*arguments, cwd, date=None):
+    """
+    Runs a git command in the given directory, optionally with fixed author and committer dates.
+    """
+    environment = dict(os.environ)
+    if date is not None:
+        environment["GIT_AUTHOR_DATE"] = date
+        environment["GIT_COMMITTER_DATE"] = date
+    return subprocess.run(["git", "-c", "user.name=Author", "-c", "user.email=author@example.com", *arguments],
+                          cwd=cwd, env=environment, check=True, capture_output=True, text=True).stdout
+
+def init_repository(path):
+    os.makedirs(path, exist_ok=True)
+    git("init", "-q", "-b", "main", cwd=path)
+    return path
+
+def commit_files(repo_path, files, date=None, message="Change files"):
+    """
+    Writes the given files (a mapping of relative path to content, or None to delete) and commits them.
+    """
+    for file_name, content in files.items():
+        file_path = os.path.join(repo_path, file_name)
+        if content is None:
+            git("rm", "-q", file_name, cwd=repo_path)
+            continue
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write(content)
+        git("add", file_name, cwd=repo_path)
+    git("commit", "-q", "-m", message, cwd=repo_path, date=date)
+    return git("rev-parse", "HEAD", cwd=repo_path).strip()
@@ -0,0 +1,184 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pydriller.domain.developer import Developer
+from src.models.CustomCommit import CustomCommit
+
+from src.infrastructure.commit_cache import (
+    FORMAT_VERSION,
+    write_commits,
+    recover_commits,
+    iterate_commits,
+    read_commits
+)
+
+def _describe(commits):
+    return [(commit.hash, commit.modified_files, commit.author, commit.date, commit.size) for commit in commits]
+
+class TestCommitCache(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+        self.file_path = os.path.join(self.temp_dir, "repo.commits")
+
+        author = Developer("Author1", "author1@apache.org")
+        time_zone = timezone(timedelta(hours=2))
+        self.commits = [
+            CustomCommit("a" * 40, ["src/Main.java", "src/MainTest.java"], author, datetime(2023, 1, 1, 10, tzinfo=time_zone)),
+            CustomCommit("b" * 40, [], Developer("Author2", "author2@apache.org"), datetime(2023, 1, 2, tzinfo=timezone.utc)),
+            CustomCommit("c" * 40, ["src/Main.java", "src/Ünïcode.java"], author, datetime(2023, 1, 3, 8, 30, 15, tzinfo=time_zone)),
+            CustomCommit("abc123", ["Other.java"], "Plain Author", datetime(2023, 1, 4)),
+        ]
+
+    def _write_interrupted_commits(self):
+        # Two complete segments, followed by the start of a third one
+        write_commits(self.file_path, self.commits, chunk_size=1)
+        with open(self.file_path, "rb") as file:
+            data = file.read()
+        os.remove(self.file_path)
+        with open(self.file_path + ".partial", "wb") as file:
+            file.write(data[:len(data) - 60])
+
+    def test_write_and_read_commits(self):
+        # Act
+        count = write_commits(self.file_path, self.commits, chunk_size=3)
+        result = read_commits(self.file_path)
+
+        # Assert
+        self.assertEqual(count, 4)
+        self.assertEqual(_describe(result), _describe(self.commits))
+        self.assertEqual(os.listdir(self.temp_dir), ["repo.commits"])
+
+    def test_read_commits_shares_paths_and_authors(self):
+        # Arrange
+        write_commits(self.file_path, self.commits, chunk_size=2)
+
+        # Act
+        result = read_commits(self.file_path)
+
+        # Assert
+        self.assertIs(result[0].modified_files[0], result[2].modified_files[0])
+        self.assertIs(result[0].author, result[2].author)
+
+    def test_write_commits_without_commits(self):
+        # Act
+        count = write_commits(self.file_path, iter([]))
+
+        # Assert
+        self.assertEqual(count, 0)
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_write_commits_append(self):
+        # Arrange
+        write_commits(self.file_path, self.commits[:2])
+
+        # Act
+        count = write_commits(self.file_path, self.commits[2:], chunk_size=1, append=True)
+        result = read_commits(self.file_path)
+
+        # Assert
+        self.assertEqual(count, 2)
+        self.assertEqual(_describe(result), _describe(self.commits))
+
+    def test_write_commits_with_failing_generator(self):
+        # Arrange
+        write_commits(self.file_path, self.commits[:1])
+
+        def failing_commits():
+            yield self.commits[1]
+            raise RuntimeError("Test exception")
+
+        # Act & Assert
+        with self.assertRaises(RuntimeError):
+            write_commits(self.file_path, failing_commits(), chunk_size=1)
+
+        self.assertEqual(_describe(read_commits(self.file_path)), _describe(self.commits[:1]))
+        self.assertEqual(os.listdir(self.temp_dir), ["repo.commits"])
+
+    def test_iterate_commits_reads_segments_lazily(self):
+        # Arrange
+        write_commits(self.file_path, self.commits, chunk_size=1)
+
+        # Act
+        result = next(iterate_commits(self.file_path))
+
+        # Assert
+        self.assertEqual(result.hash, "a" * 40)
+
+    def test_iterate_commits_file_not_exist(self):
+        # Act & Assert
+        with self.assertRaises(FileNotFoundError):
+            list(iterate_commits(self.file_path))
+
+    def test_iterate_commits_with_other_version(self):
+        # Arrange
+        write_commits(self.file_path, self.commits)
+        with open(self.file_path, "r+b") as file:
+            file.seek(8)
+            file.write(struct.pack("<H", FORMAT_VERSION + 1))
+
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            list(iterate_commits(self.file_path))
+
+    def test_recover_commits_keeps_complete_segments(self):
+        # Arrange
+        self._write_interrupted_commits()
+
+        # Act
+        count, last_commit = recover_commits(self.file_path)
+        result = read_commits(self.file_path)
+
+        # Assert
+        self.assertEqual(count, 3)
+        self.assertEqual(last_commit.hash, "c" * 40)
+        self.assertEqual(_describe(result), _describe(self.commits[:3]))
+        self.assertEqual(os.listdir(self.temp_dir), ["repo.commits"])
+
+    def test_recover_commits_append(self):
+        # Arrange
+        write_commits(self.file_path, self.commits[:2])
+        partial_path = self.file_path + ".partial"
+
+        def interrupted_commits():
+            yield from self.commits[2:]
+            shutil.copyfile(partial_path, partial_path + ".copy")
+            raise RuntimeError("Test exception")
+
+        with self.assertRaises(RuntimeError):
+            write_commits(self.file_path, interrupted_commits(), chunk_size=1, append=True)
+        os.replace(partial_path + ".copy", partial_path)
+
+        # Act
+        count, last_commit = recover_commits(self.file_path, append=True)
+        result = read_commits(self.file_path)
+
+        # Assert
+        self.assertEqual(count, 2)
+        self.assertEqual(last_commit.hash, "abc123")
+        self.assertEqual(_describe(result), _describe(self.commits))
+
+    def test_recover_commits_without_complete_segments(self):
+        # Arrange
+        write_commits(self.file_path, self.commits[:1])
+        with open(self.file_path + ".partial", "wb") as file:
+            file.write(b"TDD")
+
+        # Act
+        result = recover_commits(self.file_path)
+        no_partial_result = recover_commits(self.file_path)
+
+        # Assert
+        self.assertEqual(result, (0, None))
+        self.assertEqual(no_partial_result, (0, None))
+        self.assertEqual(_describe(read_commits(self.file_path)), _describe(self.commits[:1]))
+        self.assertEqual(os.listdir(self.temp_dir), ["repo.commits"])
+
+
+if __name__ == "__main__":
+    unittest.main()
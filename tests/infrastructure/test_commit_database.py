@@ -0,0 +1,222 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from pydriller.domain.developer import Developer
+from src.models.CustomCommit import CustomCommit
+
+from src.infrastructure.commit_database import (
+    DATABASE_NAME,
+    _connect,
+    write_commits,
+    recover_commits,
+    has_commits,
+    iterate_commits,
+    read_commits,
+    read_commit_map
+)
+
+def _describe(commits):
+    return [(commit.hash, commit.modified_files, commit.author, commit.date, commit.size) for commit in commits]
+
+class TestCommitDatabase(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+        commits_path_patcher = patch("src.infrastructure.file_utils.COMMITS_PATH", self.temp_dir)
+        commits_path_patcher.start()
+        self.addCleanup(commits_path_patcher.stop)
+
+        author = Developer("Author1", "author1@apache.org")
+        time_zone = timezone(timedelta(hours=-5))
+        self.commits = [
+            CustomCommit("a" * 40, ["src/Main.java", "src/MainTest.java"], author, datetime(2023, 1, 1, 10, tzinfo=time_zone)),
+            CustomCommit("b" * 40, [], Developer("Author2", "author2@apache.org"), datetime(2023, 1, 2, tzinfo=timezone.utc)),
+            CustomCommit("c" * 40, ["src/Main.java", "src/Other.java"], author, datetime(2023, 1, 3, 8, 30, 15, tzinfo=time_zone)),
+            CustomCommit("abc123", ["src/MainTest.java"], "Plain Author", datetime(2023, 1, 4)),
+        ]
+
+    def test_write_and_read_commits(self):
+        # Act
+        count = write_commits("repo", self.commits, chunk_size=3)
+        result = read_commits("repo")
+
+        # Assert
+        self.assertEqual(count, 4)
+        self.assertEqual(_describe(result), _describe(self.commits))
+        self.assertIn(DATABASE_NAME, os.listdir(self.temp_dir))
+
+    def test_read_commits_shares_paths_and_authors(self):
+        # Arrange
+        write_commits("repo", self.commits)
+
+        # Act
+        result = read_commits("repo")
+
+        # Assert
+        self.assertIs(result[0].modified_files[0], result[2].modified_files[0])
+        self.assertIs(result[0].author, result[2].author)
+
+    def test_read_commits_of_unknown_repository(self):
+        # Arrange
+        write_commits("repo", self.commits)
+
+        # Act
+        result = read_commits("other_repo")
+
+        # Assert
+        self.assertEqual(result, [])
+        self.assertFalse(has_commits("other_repo"))
+        self.assertTrue(has_commits("repo"))
+
+    def test_has_commits_without_database(self):
+        # Act
+        result = has_commits("repo")
+
+        # Assert
+        self.assertFalse(result)
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_write_commits_keeps_repositories_apart(self):
+        # Act
+        write_commits("repo", self.commits[:2])
+        write_commits("other_repo", self.commits[2:])
+
+        # Assert
+        self.assertEqual(_describe(read_commits("repo")), _describe(self.commits[:2]))
+        self.assertEqual(_describe(read_commits("other_repo")), _describe(self.commits[2:]))
+
+    def test_write_commits_replaces_stored_commits(self):
+        # Arrange
+        write_commits("repo", self.commits[:2])
+
+        # Act
+        write_commits("repo", self.commits[2:])
+
+        # Assert
+        self.assertEqual(_describe(read_commits("repo")), _describe(self.commits[2:]))
+
+    def test_write_commits_append(self):
+        # Arrange
+        write_commits("repo", self.commits[:2])
+
+        # Act
+        count = write_commits("repo", self.commits[2:], chunk_size=1, append=True)
+
+        # Assert
+        self.assertEqual(count, 2)
+        self.assertEqual(_describe(read_commits("repo")), _describe(self.commits))
+
+    def test_write_commits_without_commits(self):
+        # Arrange
+        write_commits("repo", self.commits)
+
+        # Act
+        count = write_commits("repo", iter([]), append=True)
+
+        # Assert
+        self.assertEqual(count, 0)
+        self.assertEqual(_describe(read_commits("repo")), _describe(self.commits))
+
+    def test_write_commits_with_failing_generator(self):
+        # Arrange
+        write_commits("repo", self.commits[:1])
+
+        def failing_commits():
+            yield self.commits[1]
+            raise RuntimeError("Test exception")
+
+        # Act & Assert
+        with self.assertRaises(RuntimeError):
+            write_commits("repo", failing_commits(), chunk_size=1)
+
+        self.assertEqual(_describe(read_commits("repo")), _describe(self.commits[:1]))
+        self.assertFalse(has_commits("repo.partial"))
+
+    def test_recover_commits_keeps_committed_chunks(self):
+        # Arrange
+        write_commits("repo", self.commits[:1])
+
+        def interrupted_commits():
+            yield from self.commits[1:]
+            # Stands in for the process being killed, which leaves the committed chunks behind
+            raise SystemExit()
+
+        with patch("src.infrastructure.commit_database._delete_repository"), self.assertRaises(SystemExit):
+            write_commits("repo", interrupted_commits(), chunk_size=2, append=True)
+
+        # Act
+        count, last_commit = recover_commits("repo", append=True)
+        result = read_commits("repo")
+
+        # Assert
+        self.assertEqual(count, 2)
+        self.assertEqual(last_commit.hash, "c" * 40)
+        self.assertEqual(_describe(result), _describe(self.commits[:3]))
+        self.assertFalse(has_commits("repo.partial"))
+
+    def test_recover_commits_without_interrupted_write(self):
+        # Arrange
+        write_commits("repo", self.commits)
+
+        # Act
+        result = recover_commits("repo")
+
+        # Assert
+        self.assertEqual(result, (0, None))
+        self.assertEqual(_describe(read_commits("repo")), _describe(self.commits))
+
+    def test_iterate_commits_reads_commits_lazily(self):
+        # Arrange
+        write_commits("repo", self.commits)
+
+        # Act
+        result = next(iterate_commits("repo"))
+
+        # Assert
+        self.assertEqual(result.hash, "a" * 40)
+
+    def test_read_commits_without_files(self):
+        # Arrange
+        write_commits("repo", self.commits)
+
+        # Act
+        result = read_commits("repo", with_files=False)
+
+        # Assert
+        self.assertEqual([commit.modified_files for commit in result], [()] * 4)
+        self.assertEqual([commit.size for commit in result], [commit.size for commit in self.commits])
+
+    def test_read_commit_map(self):
+        # Arrange
+        write_commits("repo", self.commits[:2])
+        write_commits("repo", self.commits[2:], append=True)
+        write_commits("other_repo", self.commits[2:])
+
+        # Act
+        result = read_commit_map("repo")
+
+        # Assert
+        self.assertEqual(result, {"src/Main.java": [0, 2], "src/MainTest.java": [0, 3], "src/Other.java": [2]})
+        self.assertEqual(read_commit_map("missing_repo"), {})
+
+    def test_authors_are_stored_once(self):
+        # Arrange
+        write_commits("repo", self.commits)
+
+        # Act
+        write_commits("other_repo", self.commits)
+
+        # Assert
+        connection = _connect()
+        try:
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM authors").fetchone()[0], 3)
+        finally:
+            connection.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
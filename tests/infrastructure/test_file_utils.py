@@ -1,4 +1,6 @@
+import csv
 import os
+import tempfile
 import unittest
 from unittest.mock import mock_open, patch
 import unittest.mock
@@ -9,6 +11,7 @@ from src.infrastructure.file_utils import (
     file_exists,
     read_csv,
     write_csv,
+    replace_csv,
     create_or_update_csv,
 )
 
@@ -136,5 +139,35 @@ class TestFileUtils(unittest.TestCase):
         mock_open_file().write.assert_called()
 
 
+    def test_replace_csv(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            file_path = os.path.join(directory, "data.csv")
+            replace_csv(file_path, [["name", "count"], ["old", 1]])
+
+            # Act
+            replace_csv(file_path, [["name", "count"], ["new", 2]])
+
+            # Assert
+            with open(file_path, "r", encoding="utf-8") as file:
+                self.assertEqual(file.read().splitlines(), ["name,count", "new,2"])
+            self.assertEqual(os.listdir(directory), ["data.csv"])
+
+    def test_replace_csv_invalid_content(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            file_path = os.path.join(directory, "data.csv")
+            replace_csv(file_path, [["name", "count"]])
+
+            # Act
+            with self.assertRaises(csv.Error):
+                replace_csv(file_path, [1])
+
+            # Assert
+            with open(file_path, "r", encoding="utf-8") as file:
+                self.assertEqual(file.read().splitlines(), ["name,count"])
+            self.assertEqual(os.listdir(directory), ["data.csv"])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,130 @@
+from datetime import datetime
+import io
+import os
+import tempfile
+import unittest
+from src.infrastructure import repository_utils
+from tests.git_fixture import commit_files, git, init_repository
+
+from src.infrastructure.git_log import (
+    read_commits,
+    _parse_log,
+)
+
+def _describe(commits):
+    # Deleted files only have an old path in PyDriller
+    return [(commit.hash, [(file.filename, file.new_path or file.old_path) for file in commit.modified_files], str(commit.author),
+             commit.author_date) for commit in commits]
+
+class TestGitLog(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.repo_path = init_repository(os.path.join(cls.temp_dir.name, "fixture"))
+
+        commit_files(cls.repo_path, {"README.md": "readme"}, date="2023-01-01T10:00:00+00:00")
+        commit_files(cls.repo_path, {"src/main/java/Foo.java": "foo", "src/main/Util.py": "util"}, date="2023-01-02T10:00:00+02:00")
+        cls.third_commit = commit_files(cls.repo_path, {"src/test/java/FooTest.java": "test"}, date="2023-01-03T10:00:00-05:00")
+        git("checkout", "-q", "-b", "feature", cwd=cls.repo_path)
+        commit_files(cls.repo_path, {"src/main/java/Bar Ünicode.java": "bar"}, date="2023-01-04T10:00:00+00:00")
+        git("checkout", "-q", "main", cwd=cls.repo_path)
+        cls.fifth_commit = commit_files(cls.repo_path, {"docs/notes.txt": "notes"}, date="2023-01-05T10:00:00+00:00")
+        git("merge", "-q", "--no-ff", "-m", "Merge feature", "feature", cwd=cls.repo_path, date="2023-01-06T10:00:00+00:00")
+        git("mv", "src/main/java/Foo.java", "src/main/java/Baz.java", cwd=cls.repo_path)
+        git("commit", "-q", "-m", "Rename", cwd=cls.repo_path, date="2023-01-07T10:00:00+00:00")
+        commit_files(cls.repo_path, {"src/test/java/FooTest.java": None, "src/main/Util.py": "changed"}, date="2023-01-08T10:00:00+00:00")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    def test_read_commits_matches_pydriller(self):
+        # Act
+        expected = _describe(repository_utils.read_commits(self.repo_path, [".java"]))
+        result = _describe(read_commits(self.repo_path, [".java"]))
+
+        # Assert
+        self.assertEqual(len(result), 5)
+        self.assertEqual(result, expected)
+
+    def test_read_commits_matches_pydriller_with_final_date(self):
+        # Arrange
+        final_date = datetime(2023, 1, 5)
+
+        # Act
+        expected = _describe(repository_utils.read_commits(self.repo_path, [".java", ".py"], final_date))
+        result = _describe(read_commits(self.repo_path, [".java", ".py"], final_date))
+
+        # Assert
+        self.assertEqual(result, expected)
+
+    def test_read_commits_from_commit_matches_pydriller(self):
+        # Act
+        expected = _describe(repository_utils.read_commits(self.repo_path, [".java"], from_commit=self.third_commit))
+        result = _describe(read_commits(self.repo_path, [".java"], from_commit=self.third_commit))
+
+        # Assert
+        self.assertEqual(len(result), 3)
+        self.assertNotIn(self.third_commit, [commit[0] for commit in result])
+        self.assertEqual(result, expected)
+
+    def test_read_commits_from_commit_reads_branches_merged_since(self):
+        # Act
+        # The feature branch was forked before the starting commit, and merged after it
+        expected = _describe(repository_utils.read_commits(self.repo_path, [".java"], from_commit=self.fifth_commit))
+        result = _describe(read_commits(self.repo_path, [".java"], from_commit=self.fifth_commit))
+
+        # Assert
+        self.assertEqual(len(result), 3)
+        self.assertEqual(result[0][1], [("Bar Ünicode.java", "src/main/java/Bar Ünicode.java")])
+        self.assertEqual(result, expected)
+
+    def test_read_commits_from_bare_clone(self):
+        # Act
+        expected = _describe(read_commits(self.repo_path, [".java"]))
+        with repository_utils.local_repository(f"file://{self.repo_path}") as clone_path:
+            result = _describe(read_commits(clone_path, [".java"]))
+
+        # Assert
+        self.assertEqual(result, expected)
+
+    def test_read_commits_from_empty_repository(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            repo_path = init_repository(temp_dir)
+
+            # Act
+            result = list(read_commits(repo_path, [".java"]))
+
+        # Assert
+        self.assertEqual(result, [])
+
+    def test_read_commits_when_datetime_is_in_the_future(self):
+        # Act, Assert
+        with self.assertRaises(ValueError):
+            list(read_commits(self.repo_path, [".java"], datetime(3000, 1, 1)))
+
+    def test_read_commits_from_invalid_repository(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Act, Assert
+            with self.assertRaises(RuntimeError):
+                list(read_commits(temp_dir, [".java"]))
+
+    def test_parse_log(self):
+        # Arrange
+        output = (b"\x1eabc\x1fAuthor\x1fa@b.com\x1f2023-01-01T10:00:00+00:00\0\ndir/File.java\0Other.py\0"
+                  b"\x1edef\x1fAuthor\x1fa@b.com\x1f2023-01-02T10:00:00+00:00\0")
+
+        # Act
+        result = list(_parse_log(io.BytesIO(output)))
+
+        # Assert
+        self.assertEqual([commit.hash for commit in result], ["abc", "def"])
+        self.assertEqual([file.path for file in result[0].modified_files], ["dir/File.java", "Other.py"])
+        self.assertEqual([file.filename for file in result[0].modified_files], ["File.java", "Other.py"])
+        self.assertEqual(result[1].modified_files, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
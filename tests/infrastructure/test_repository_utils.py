@@ -1,13 +1,25 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import os
+import tempfile
 import unittest
 from unittest.mock import MagicMock, mock_open, patch
 from src.models.Repository import Repository
+from tests.git_fixture import commit_files, git, init_repository
 
 from src.infrastructure.repository_utils import (
     read_repositories, 
     read_commits,
     repo_from_url,
-    apache_repo_from_name
+    apache_repo_from_name,
+    get_mirror_path,
+    mirror_repository,
+    local_repository,
+    PARTIAL_CLONE_FILTER,
+    read_repository_sizes,
+    sort_by_size,
+    read_commit_dates,
+    read_head,
+    split_date_windows
 )
     
 class TestRepositoryUtils(unittest.TestCase):
@@ -134,7 +146,24 @@ class TestRepositoryUtils(unittest.TestCase):
         self.assertEqual(result[0].hash, "abc123")
         mock_repository.assert_called_once_with(repo_url, only_modifications_with_file_types=['.java'], to=test_date)
 
-    
+    def test_read_commits_from_commit_reads_branches_merged_since(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            repo_path = init_repository(os.path.join(temp_dir, "repo"))
+            commit_files(repo_path, {"File.java": "first"}, date="2023-01-01T10:00:00+00:00")
+            git("checkout", "-q", "-b", "feature", cwd=repo_path)
+            branch_commit = commit_files(repo_path, {"Feature.java": "feature"}, date="2023-01-02T10:00:00+00:00")
+            git("checkout", "-q", "main", cwd=repo_path)
+            last_mined = commit_files(repo_path, {"File.java": "second"}, date="2023-01-03T10:00:00+00:00")
+            git("merge", "-q", "--no-ff", "-m", "Merge feature", "feature", cwd=repo_path, date="2023-01-04T10:00:00+00:00")
+            new_commit = commit_files(repo_path, {"File.java": "third"}, date="2023-01-05T10:00:00+00:00")
+
+            # Act
+            result = [commit.hash for commit in read_commits(repo_path, [".java"], from_commit=last_mined)]
+
+        # Assert
+        self.assertEqual(result, [branch_commit, new_commit])
+
     def test_repo_from_url_valid(self):
         # Arrange
         valid_url = "https://github.com/apache/test-repo.git"
@@ -168,6 +197,268 @@ class TestRepositoryUtils(unittest.TestCase):
         self.assertEqual(result.name, expected_repo.name)
         self.assertEqual(result.url, expected_repo.url)
 
+    def test_get_mirror_path(self):
+        # Act
+        first = get_mirror_path("https://github.com/apache/repo1.git")
+        second = get_mirror_path("https://github.com/other/repo1.git")
+
+        # Assert
+        self.assertTrue(os.path.basename(first).startswith("repo1-"))
+        self.assertTrue(first.endswith(".git"))
+        self.assertNotEqual(first, second)
+
+    def test_mirror_repository_clones_then_fetches(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            source_path = init_repository(os.path.join(temp_dir, "source"))
+            commit_files(source_path, {"File.java": "first"})
+            source_url = f"file://{source_path}"
+
+            with patch("src.infrastructure.repository_utils.file_utils.MIRRORS_PATH", os.path.join(temp_dir, "mirrors")):
+                # Act
+                mirror_path = mirror_repository(source_url)
+                commit_files(source_path, {"FileTest.java": "second"})
+                updated_mirror_path = mirror_repository(source_url)
+                commit_count = git("rev-list", "--count", "HEAD", cwd=updated_mirror_path).strip()
+                is_bare = git("rev-parse", "--is-bare-repository", cwd=updated_mirror_path).strip()
+
+            # Assert
+            self.assertEqual(mirror_path, updated_mirror_path)
+            self.assertEqual(commit_count, "2")
+            self.assertEqual(is_bare, "true")
+
+    def test_mirror_repository_only_fetches_branches_and_tags(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            source_path = init_repository(os.path.join(temp_dir, "source"))
+            first = commit_files(source_path, {"File.java": "first"})
+            git("tag", "v1", cwd=source_path)
+            git("update-ref", "refs/pull/1/head", first, cwd=source_path)
+            source_url = f"file://{source_path}"
+
+            with patch("src.infrastructure.repository_utils.file_utils.MIRRORS_PATH", os.path.join(temp_dir, "mirrors")):
+                # Act
+                mirror_path = mirror_repository(source_url)
+                second = commit_files(source_path, {"FileTest.java": "second"})
+                git("update-ref", "refs/pull/2/head", second, cwd=source_path)
+                mirror_repository(source_url)
+                refs = git("for-each-ref", "--format=%(refname)", cwd=mirror_path).split()
+                head = git("rev-parse", "HEAD", cwd=mirror_path).strip()
+
+        # Assert
+        self.assertEqual(sorted(refs), ["refs/heads/main", "refs/tags/v1"])
+        self.assertEqual(head, second)
+
+    def test_mirror_repository_updates_mirror_clones(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            source_path = init_repository(os.path.join(temp_dir, "source"))
+            first = commit_files(source_path, {"File.java": "first"})
+            source_url = f"file://{source_path}"
+
+            with patch("src.infrastructure.repository_utils.file_utils.MIRRORS_PATH", os.path.join(temp_dir, "mirrors")):
+                # Mirrors used to be cloned with '--mirror'
+                git("clone", "--mirror", "--quiet", source_url, get_mirror_path(source_url), cwd=temp_dir)
+                git("update-ref", "refs/pull/1/head", first, cwd=source_path)
+
+                # Act
+                mirror_path = mirror_repository(source_url)
+                refs = git("for-each-ref", "--format=%(refname)", cwd=mirror_path).split()
+
+        # Assert
+        self.assertEqual(refs, ["refs/heads/main"])
+
+    def test_mirror_repository_with_invalid_url(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with patch("src.infrastructure.repository_utils.file_utils.MIRRORS_PATH", temp_dir):
+                # Act, Assert
+                with self.assertRaises(RuntimeError):
+                    mirror_repository(f"file://{os.path.join(temp_dir, 'missing')}")
+                self.assertEqual(os.listdir(temp_dir), [])
+
+    def _create_filtering_source(self, temp_dir, allow_filter=True):
+        source_path = init_repository(os.path.join(temp_dir, "source"))
+        # Local upload-pack serving partial clones, as GitHub does
+        git("config", "uploadpack.allowFilter", "true" if allow_filter else "false", cwd=source_path)
+        commit_files(source_path, {"src/Foo.java": "foo " * 1000})
+        commit_files(source_path, {"src/Foo.java": "changed " * 1000, "src/FooTest.java": "test"})
+        return f"file://{source_path}"
+
+    def test_local_repository_with_partial_clone(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            source_url = self._create_filtering_source(temp_dir)
+
+            # Act
+            with local_repository(source_url, PARTIAL_CLONE_FILTER) as clone_path:
+                promisor = git("config", "--get", "remote.origin.promisor", cwd=clone_path).strip()
+                clone_filter = git("config", "--get", "remote.origin.partialclonefilter", cwd=clone_path).strip()
+                missing_objects = git("rev-list", "--objects", "--all", "--missing=print", cwd=clone_path)
+                files = git("log", "--format=", "--name-only", "HEAD", cwd=clone_path).split()
+
+        # Assert
+        self.assertEqual(promisor, "true")
+        self.assertEqual(clone_filter, PARTIAL_CLONE_FILTER)
+        self.assertEqual(sum(1 for line in missing_objects.splitlines() if line.startswith("?")), 3)
+        self.assertEqual(sorted(files), ["src/Foo.java", "src/Foo.java", "src/FooTest.java"])
+
+    def test_local_repository_with_partial_clone_unsupported_by_server(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            source_url = self._create_filtering_source(temp_dir, allow_filter=False)
+
+            # Act
+            with local_repository(source_url, PARTIAL_CLONE_FILTER) as clone_path:
+                missing_objects = git("rev-list", "--objects", "--all", "--missing=print", cwd=clone_path)
+                commit_count = git("rev-list", "--count", "HEAD", cwd=clone_path).strip()
+
+        # Assert
+        self.assertFalse(any(line.startswith("?") for line in missing_objects.splitlines()))
+        self.assertEqual(commit_count, "2")
+
+    @patch("src.infrastructure.repository_utils.logging.warning")
+    def test_local_repository_falls_back_to_full_clone(self, mock_logging_warning):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            source_url = self._create_filtering_source(temp_dir)
+
+            # Act
+            with local_repository(source_url, "invalid:filter") as clone_path:
+                commit_count = git("rev-list", "--count", "HEAD", cwd=clone_path).strip()
+
+        # Assert
+        mock_logging_warning.assert_called_once()
+        self.assertEqual(commit_count, "2")
+
+    def test_mirror_repository_with_partial_clone(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            source_url = self._create_filtering_source(temp_dir)
+
+            with patch("src.infrastructure.repository_utils.file_utils.MIRRORS_PATH", os.path.join(temp_dir, "mirrors")):
+                # Act
+                mirror_path = mirror_repository(source_url, PARTIAL_CLONE_FILTER)
+                commit_files(source_url.removeprefix("file://"), {"src/Bar.java": "bar"})
+                mirror_repository(source_url, PARTIAL_CLONE_FILTER)
+                promisor = git("config", "--get", "remote.origin.promisor", cwd=mirror_path).strip()
+                commit_count = git("rev-list", "--count", "HEAD", cwd=mirror_path).strip()
+
+        # Assert
+        self.assertEqual(promisor, "true")
+        self.assertEqual(commit_count, "3")
+
+    @patch("src.infrastructure.repository_utils.os.path.exists", return_value=True)
+    @patch("src.infrastructure.repository_utils.open", new_callable=mock_open,
+           read_data="Repository Name,Repository URL,Java Usage (%),Commit Count\nrepo1,url1,95.00,120\nrepo2,url2,99.00,invalid\n")
+    def test_read_repository_sizes(self, mock_open, _):
+        # Act
+        result = read_repository_sizes("java")
+
+        # Assert
+        self.assertEqual(result, {"repo1": 120})
+
+    @patch("src.infrastructure.repository_utils.os.path.exists", return_value=False)
+    def test_read_repository_sizes_without_file(self, _):
+        # Act
+        result = read_repository_sizes("java")
+
+        # Assert
+        self.assertEqual(result, {})
+
+    def test_sort_by_size(self):
+        # Arrange
+        repositories = [apache_repo_from_name(name) for name in ["small", "unknown1", "large", "unknown2", "medium"]]
+        sizes = {"small": 5, "large": 500, "medium": 50}
+
+        # Act
+        result = sort_by_size(repositories, sizes)
+
+        # Assert
+        self.assertEqual([repo.name for repo in result], ["large", "medium", "small", "unknown1", "unknown2"])
+
+    def test_read_commit_dates_in_traversal_order(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            repo_path = init_repository(os.path.join(temp_dir, "repo"))
+            first = commit_files(repo_path, {"File.java": "first"}, date="2023-01-01T10:00:00+00:00")
+            second = commit_files(repo_path, {"File.java": "second"}, date="2023-01-03T10:00:00+00:00")
+            third = commit_files(repo_path, {"File.java": "third"}, date="2023-01-05T10:00:00+00:00")
+
+            # Act
+            result = read_commit_dates(repo_path)
+            result_with_final_date = read_commit_dates(repo_path, datetime(2023, 1, 4, tzinfo=timezone.utc))
+
+        # Assert
+        self.assertEqual(result, [(first, 1672567200), (second, 1672740000), (third, 1672912800)])
+        self.assertEqual(result_with_final_date, [(first, 1672567200), (second, 1672740000)])
+
+    def test_read_commit_dates_without_commits(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            repo_path = init_repository(os.path.join(temp_dir, "repo"))
+
+            # Act
+            result = read_commit_dates(repo_path)
+
+        # Assert
+        self.assertEqual(result, [])
+
+    def test_read_head(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            repo_path = init_repository(os.path.join(temp_dir, "repo"))
+            commit_files(repo_path, {"File.java": "first"}, date="2023-01-01T10:00:00+00:00")
+            head = commit_files(repo_path, {"File.java": "second"}, date="2023-01-03T10:00:00+00:00")
+
+            # Act
+            result = read_head(repo_path)
+
+        # Assert
+        self.assertEqual(result, head)
+
+    def test_read_head_without_commits(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            repo_path = init_repository(os.path.join(temp_dir, "repo"))
+
+            # Act
+            result = read_head(repo_path)
+
+        # Assert
+        self.assertIsNone(result)
+
+    def test_split_date_windows(self):
+        # Arrange
+        commit_dates = [(str(timestamp), timestamp) for timestamp in [40, 10, 20, 30, 50, 60, 70, 80]]
+
+        # Act
+        result = split_date_windows(commit_dates, 4)
+
+        # Assert
+        self.assertEqual([(since.timestamp(), until.timestamp()) for since, until in result], [(10, 20), (30, 40), (50, 60), (70, 80)])
+
+    def test_split_date_windows_keeps_equal_dates_together(self):
+        # Arrange
+        commit_dates = [(str(index), timestamp) for index, timestamp in enumerate([10, 20, 20, 20, 20, 30])]
+
+        # Act
+        result = split_date_windows(commit_dates, 3)
+
+        # Assert
+        self.assertEqual([(since.timestamp(), until.timestamp()) for since, until in result], [(10, 20), (30, 30)])
+
+    def test_split_date_windows_with_more_shards_than_commits(self):
+        # Arrange
+        commit_dates = [("a", 10), ("b", 20)]
+
+        # Act
+        result = split_date_windows(commit_dates, 8)
+        empty_result = split_date_windows([], 8)
+
+        # Assert
+        self.assertEqual([(since.timestamp(), until.timestamp()) for since, until in result], [(10, 10), (20, 20)])
+        self.assertEqual(empty_result, [])
+
 
 if __name__ == "__main__":
     unittest.main()
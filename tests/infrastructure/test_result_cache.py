@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.infrastructure.result_cache import get_key, read_result, write_result
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.processed_path = os.path.join(temp_dir.name, "processed")
+        processed_path_patcher = patch("src.infrastructure.file_utils.PROCESSED_PATH", self.processed_path)
+        processed_path_patcher.start()
+        self.addCleanup(processed_path_patcher.stop)
+
+    def test_write_and_read_result(self):
+        # Arrange
+        key = get_key("digest", "Java", 1)
+        result = {"metrics": {"test_counts": [1, 2, 3]}, "duration": 0.5}
+
+        # Act
+        write_result(key, result)
+
+        # Assert
+        self.assertEqual(read_result(key), result)
+        self.assertEqual(os.listdir(self.processed_path), [f"{key}.json"])
+
+    def test_read_result_without_result(self):
+        # Act
+        result = read_result(get_key("digest"))
+
+        # Assert
+        self.assertIsNone(result)
+
+    def test_read_result_with_damaged_result(self):
+        # Arrange
+        key = get_key("digest")
+        os.makedirs(self.processed_path)
+        with open(os.path.join(self.processed_path, f"{key}.json"), "w", encoding="utf-8") as file:
+            file.write("{\"metrics\": ")
+
+        # Act
+        result = read_result(key)
+
+        # Assert
+        self.assertIsNone(result)
+
+    def test_get_key_depends_on_every_input(self):
+        # Act
+        keys = {get_key("digest", "Java", 1, 1), get_key("digest", "Java", 2, 1), get_key("digest", "Kotlin", 1, 1),
+                get_key("other", "Java", 1, 1), get_key("digest", "Java", 1, 2), get_key("digestJava", 1, 1)}
+
+        # Assert
+        self.assertEqual(len(keys), 6)
+        self.assertEqual(get_key("digest", "Java", 1, 1), get_key("digest", "Java", 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,13 @@
+import os
+import pickle
+import tempfile
 import unittest
 from unittest.mock import mock_open, patch
 
 from src.infrastructure.serialize import (
     serialize,
-    deserialize
+    deserialize,
+    deserialize_chunks
 )
 
 class TestSerialize(unittest.TestCase):
@@ -49,6 +53,39 @@ class TestSerialize(unittest.TestCase):
         mock_pickle_load.assert_called_once_with(mock_open_file())
         self.assertEqual(result, expected_data)
 
+    def test_deserialize_chunks(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            file_path = os.path.join(temp_dir, "data.pkl")
+            with open(file_path, "wb") as file:
+                for chunk in [[0, 1], [2, 3], [4]]:
+                    pickle.dump(chunk, file)
+
+            # Act
+            result = list(deserialize_chunks(file_path))
+
+            # Assert
+            self.assertEqual(result, [[0, 1], [2, 3], [4]])
+
+    def test_deserialize_chunks_reads_single_pickle(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            file_path = os.path.join(temp_dir, "data.pkl")
+            with open(file_path, "wb") as file:
+                pickle.dump([0, 1, 2], file)
+
+            # Act
+            result = list(deserialize_chunks(file_path))
+
+            # Assert
+            self.assertEqual(result, [[0, 1, 2]])
+
+    @patch("src.infrastructure.serialize.file_utils.file_exists", return_value=False)
+    def test_deserialize_chunks_file_not_exist(self, _):
+        # Act & Assert
+        with self.assertRaises(FileNotFoundError):
+            list(deserialize_chunks("non_existent_file.pkl"))
+
 
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,162 @@
+import asyncio
+import unittest
+
+from src.infrastructure.work_queue import run_pipeline, run_workers
+
+class TestWorkQueue(unittest.TestCase):
+
+    def test_run_workers_handles_every_item_in_order(self):
+        # Arrange
+        handled = []
+
+        async def handle(item):
+            handled.append(item)
+
+        # Act
+        asyncio.run(run_workers(range(10), 3, handle))
+
+        # Assert
+        self.assertEqual(handled, list(range(10)))
+
+    def test_run_workers_limits_concurrency(self):
+        # Arrange
+        running = 0
+        max_running = 0
+
+        async def handle(_):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+
+        # Act
+        asyncio.run(run_workers(range(20), 4, handle))
+
+        # Assert
+        self.assertEqual(max_running, 4)
+
+    def test_run_workers_does_not_wait_for_slow_items(self):
+        # Arrange
+        durations = [0.3, 0.01, 0.01, 0.01, 0.01, 0.01]
+        finished = []
+
+        async def handle(index):
+            await asyncio.sleep(durations[index])
+            finished.append(index)
+
+        # Act
+        asyncio.run(run_workers(range(len(durations)), 2, handle))
+
+        # Assert
+        self.assertEqual(finished, [1, 2, 3, 4, 5, 0])
+
+    def test_run_workers_without_items(self):
+        # Arrange
+        async def handle(_):
+            raise AssertionError("No item should be handled")
+
+        # Act, Assert
+        asyncio.run(run_workers([], 4, handle))
+
+    def test_run_workers_propagates_exceptions(self):
+        # Arrange
+        async def handle(item):
+            if item == 2:
+                raise ValueError("Test exception")
+            await asyncio.sleep(0.001)
+
+        # Act, Assert
+        with self.assertRaises(ValueError):
+            asyncio.run(run_workers(range(10), 2, handle))
+
+    def test_run_pipeline_consumes_every_produced_item(self):
+        # Arrange
+        produced = []
+        consumed = []
+
+        async def produce(item):
+            produced.append(item)
+
+        async def consume(item):
+            consumed.append(item)
+
+        # Act
+        asyncio.run(run_pipeline(range(10), 3, produce, consume))
+
+        # Assert
+        self.assertEqual(produced, list(range(10)))
+        self.assertEqual(consumed, list(range(10)))
+
+    def test_run_pipeline_consumes_items_while_producing(self):
+        # Arrange
+        events = []
+
+        async def produce(item):
+            await asyncio.sleep(0.01 * item)
+            events.append(("produced", item))
+
+        async def consume(item):
+            events.append(("consumed", item))
+
+        # Act
+        asyncio.run(run_pipeline(range(4), 4, produce, consume, queue_size=4))
+
+        # Assert
+        self.assertLess(events.index(("consumed", 0)), events.index(("produced", 3)))
+
+    def test_run_pipeline_applies_backpressure(self):
+        # Arrange
+        produced = 0
+        consumed = 0
+        max_ahead = 0
+
+        async def produce(_):
+            nonlocal produced, max_ahead
+            produced += 1
+            max_ahead = max(max_ahead, produced - consumed)
+
+        async def consume(_):
+            nonlocal consumed
+            await asyncio.sleep(0.005)
+            consumed += 1
+
+        # Act
+        asyncio.run(run_pipeline(range(20), 2, produce, consume, queue_size=1))
+
+        # Assert
+        self.assertEqual(consumed, 20)
+        # One item being consumed, one waiting in the queue and one blocked per producer
+        self.assertLessEqual(max_ahead, 4)
+
+    def test_run_pipeline_propagates_consumer_exceptions(self):
+        # Arrange
+        async def produce(_):
+            await asyncio.sleep(0.001)
+
+        async def consume(item):
+            if item == 1:
+                raise ValueError("Test exception")
+
+        # Act, Assert
+        with self.assertRaises(ValueError):
+            asyncio.run(run_pipeline(range(10), 2, produce, consume, queue_size=1))
+
+    def test_run_pipeline_propagates_producer_exceptions(self):
+        # Arrange
+        consumed = []
+
+        async def produce(item):
+            if item == 3:
+                raise ValueError("Test exception")
+
+        async def consume(item):
+            consumed.append(item)
+
+        # Act, Assert
+        with self.assertRaises(ValueError):
+            asyncio.run(run_pipeline(range(10), 1, produce, consume))
+
+
+if __name__ == "__main__":
+    unittest.main()
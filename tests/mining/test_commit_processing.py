@@ -1,102 +1,118 @@
 from datetime import datetime
+import os
+import tempfile
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 from collections import defaultdict
+from src.infrastructure import commit_database, configuration
 from src.models.CustomCommit import CustomCommit
+from src.mining.csv_export import anonymise_author_counts
+from src.models.MiningOptions import SQLITE_STORE
 from src.models.file_handlers.JavaFileHandler import JavaFileHandler
 
 from src.mining.commit_processing import (
-    gather_commits_and_tests,
-    precompute_commit_map,
     find_nearest_implementation,
-    calculate_average_commit_size
+    compute_repo_metrics,
+    process_repository
 )
 
+KEY = bytes(range(32))
+
 class TestCommitProcessing(unittest.TestCase):
 
     def setUp(self):
         self.java_file_handler = JavaFileHandler()
 
-    def test_precompute_commit_map_with_empty_commits(self):
+    def test_find_nearest_implementation_with_no_candidates(self):
         # Arrange
-        commits = []
+        commits = [
+            CustomCommit("hash1", ["TestFile.java"], "Author1", datetime(2023, 1, 1)),
+            CustomCommit("hash2", ["Implementation.java"], "Author2", datetime(2023, 1, 2)),
+        ]
+        test_file = (0, "TestFile.java")
+        commit_map = defaultdict(list)
 
         # Act
-        result = precompute_commit_map(commits)
+        result = find_nearest_implementation(test_file, commits, commit_map, self.java_file_handler)
 
         # Assert
-        self.assertEqual(result, {})
+        self.assertIsNone(result)
 
-    def test_precompute_commit_map_with_multiple_files(self):
+    def test_find_nearest_implementation_with_only_after_candidates(self):
         # Arrange
         commits = [
-            CustomCommit("hash1", ["FileA.java"], "Author1", datetime(2023, 1, 1)),
-            CustomCommit("hash2", ["FileB.java", "FileC.java"], "Author2", datetime(2023, 1, 2)),
-            CustomCommit("hash3", ["FileA.java", "FileC.java"], "Author3", datetime(2023, 1, 3)),
+            CustomCommit("hash1", ["TestFile.java"], "Author1", datetime(2023, 1, 1)),
+            CustomCommit("hash2", ["File.java"], "Author2", datetime(2023, 1, 2)),
+            CustomCommit("hash3", ["File.java"], "Author3", datetime(2023, 1, 3)),
         ]
+        test_file = (0, "TestFile.java")
+        commit_map = defaultdict(list, {"File.java": [1, 2]})
 
         # Act
-        result = precompute_commit_map(commits)
+        result = find_nearest_implementation(test_file, commits, commit_map, self.java_file_handler)
 
         # Assert
-        self.assertEqual(result["FileA.java"], [0, 2])
-        self.assertEqual(result["FileB.java"], [1])
-        self.assertEqual(result["FileC.java"], [1, 2])
+        self.assertEqual(result, 1)
 
-    def test_precompute_commit_map_with_no_files(self):
+    def test_find_nearest_implementation_with_only_before_candidates(self):
         # Arrange
         commits = [
-            CustomCommit("hash1", [], "Author1", datetime(2023, 1, 1)),
-            CustomCommit("hash2", [], "Author2", datetime(2023, 1, 2)),
+            CustomCommit("hash1", ["TestFile.java"], "Author1", datetime(2023, 1, 1)),
+            CustomCommit("hash2", ["File.java"], "Author2", datetime(2023, 1, 2)),
+            CustomCommit("hash3", ["File.java"], "Author3", datetime(2023, 1, 3)),
         ]
+        test_file = (2, "TestFile.java")
+        commit_map = defaultdict(list, {"File.java": [0, 1]})
 
         # Act
-        result = precompute_commit_map(commits)
+        result = find_nearest_implementation(test_file, commits, commit_map, self.java_file_handler)
 
         # Assert
-        self.assertEqual(result, {})
-
+        self.assertEqual(result, 1)
 
-    def test_find_nearest_implementation_with_no_candidates(self):
+    def test_find_nearest_implementation_with_closer_after_candidate(self):
         # Arrange
         commits = [
-            CustomCommit("hash1", ["TestFile.java"], "Author1", datetime(2023, 1, 1)),
-            CustomCommit("hash2", ["Implementation.java"], "Author2", datetime(2023, 1, 2)),
+            CustomCommit("hash1", ["File.java"], "Author1", datetime(2023, 1, 1)),
+            CustomCommit("hash2", ["File.java"], "Author2", datetime(2023, 1, 2)),
+            CustomCommit("hash3", ["TestFile.java"], "Author3", datetime(2023, 1, 5)),
+            CustomCommit("hash4", ["File.java"], "Author4", datetime(2023, 1, 6)),
+            CustomCommit("hash5", ["File.java"], "Author5", datetime(2023, 1, 7)),
         ]
-        test_file = (0, "TestFile.java")
-        commit_map = defaultdict(list)
+        test_file = (2, "TestFile.java")
+        commit_map = defaultdict(list, {"File.java": [0, 1, 3, 4]})
 
         # Act
         result = find_nearest_implementation(test_file, commits, commit_map, self.java_file_handler)
 
         # Assert
-        self.assertIsNone(result)
+        self.assertEqual(result, 3)
 
-    def test_find_nearest_implementation_with_only_after_candidates(self):
+    def test_find_nearest_implementation_with_equally_distant_candidates(self):
         # Arrange
         commits = [
-            CustomCommit("hash1", ["TestFile.java"], "Author1", datetime(2023, 1, 1)),
-            CustomCommit("hash2", ["File.java"], "Author2", datetime(2023, 1, 2)),
+            CustomCommit("hash1", ["File.java"], "Author1", datetime(2023, 1, 1)),
+            CustomCommit("hash2", ["TestFile.java"], "Author2", datetime(2023, 1, 2)),
             CustomCommit("hash3", ["File.java"], "Author3", datetime(2023, 1, 3)),
         ]
-        test_file = (0, "TestFile.java")
-        commit_map = defaultdict(list, {"File.java": [1, 2]})
+        test_file = (1, "TestFile.java")
+        commit_map = defaultdict(list, {"File.java": [0, 2]})
 
         # Act
         result = find_nearest_implementation(test_file, commits, commit_map, self.java_file_handler)
 
         # Assert
-        self.assertEqual(result, 1)
+        self.assertEqual(result, 0)
 
-    def test_find_nearest_implementation_with_only_before_candidates(self):
+    def test_find_nearest_implementation_in_same_commit(self):
         # Arrange
         commits = [
-            CustomCommit("hash1", ["TestFile.java"], "Author1", datetime(2023, 1, 1)),
-            CustomCommit("hash2", ["File.java"], "Author2", datetime(2023, 1, 2)),
-            CustomCommit("hash3", ["File.java"], "Author3", datetime(2023, 1, 3)),
+            CustomCommit("hash1", ["File.java"], "Author1", datetime(2023, 1, 1)),
+            CustomCommit("hash2", ["File.java", "TestFile.java"], "Author2", datetime(2023, 1, 2)),
+            CustomCommit("hash3", ["File.java"], "Author3", datetime(2023, 1, 2)),
         ]
-        test_file = (2, "TestFile.java")
-        commit_map = defaultdict(list, {"File.java": [0, 1]})
+        test_file = (1, "TestFile.java")
+        commit_map = defaultdict(list, {"File.java": [0, 1, 2]})
 
         # Act
         result = find_nearest_implementation(test_file, commits, commit_map, self.java_file_handler)
@@ -105,67 +121,188 @@ class TestCommitProcessing(unittest.TestCase):
         self.assertEqual(result, 1)
 
 
+    def test_compute_repo_metrics(self):
+        # Arrange
+        commits = [
+            CustomCommit("hash1", ["FileTest.java", "Other.java"], "Author1, author1@apache.org", datetime(2023, 1, 1)),
+            CustomCommit("hash2", ["File.java", "OtherTest.java"], "Author2", datetime(2023, 1, 2)),
+            CustomCommit("hash3", ["File.java", "FileTest.java"], "Author1, author1@apache.org", datetime(2023, 1, 3)),
+            CustomCommit("hash4", ["FileTest.java"], "Author3", datetime(2023, 1, 10)),
+            CustomCommit("hash5", ["MissingTest.java"], "Author4", datetime(2023, 1, 11)),
+        ]
+
+        # Act
+        result = compute_repo_metrics(commits, self.java_file_handler)
+
+        # Assert
+        self.assertEqual(result.commit_count, 5)
+        self.assertEqual(result.test_counts, [1, 2, 1])
+        self.assertEqual(result.average_sizes, [2.0, 1.5, 2.0, 1.8])
+        # Authors are ordered by the first category they wrote a test in
+        self.assertEqual(list(result.author_counts.items()), [("Author1", [1, 0, 1]), ("Author2", [0, 1, 0]), ("Author3", [0, 1, 0])])
+
+    def test_compute_repo_metrics_with_commit_map(self):
+        # Arrange
+        commits = [
+            CustomCommit("hash1", ["FileTest.java"], "Author1", datetime(2023, 1, 1)),
+            CustomCommit("hash2", ["File.java"], "Author2", datetime(2023, 1, 2)),
+        ]
+        commit_map = {"FileTest.java": [0], "File.java": [1]}
+        for commit in commits:
+            commit.modified_files = ()
+
+        # Act
+        result = compute_repo_metrics(commits, self.java_file_handler, commit_map)
+
+        # Assert
+        self.assertEqual(result.test_counts, [1, 0, 0])
+        self.assertEqual(result.average_sizes, [1.0, 0, 0, 0.3])
+
+    @patch("src.mining.commit_retrieval.get_cache_digest", return_value=None)
     @patch("src.mining.commit_retrieval.read_repo_info")
-    def test_gather_commits_and_tests_with_valid_data(self, mock_read_repo_info):
+    def test_process_repository(self, mock_read_repo_info, mock_get_cache_digest):
         # Arrange
+        configuration.setup_logging()
         mock_read_repo_info.return_value = [
-            MagicMock(
-                hash="abc123",
-                modified_files=["TestFile1.java", "File1.java"],
-                author="Author1",
-                date=datetime(2023, 1, 1),
-            )
+            CustomCommit("hash1", ["FileTest.java"], "Author1", datetime(2023, 1, 1)),
+            CustomCommit("hash2", ["File.java"], "Author2", datetime(2023, 1, 2)),
         ]
 
         # Act
-        commits, test_files = gather_commits_and_tests("mock_repo", self.java_file_handler)
+        metrics, duration = process_repository("mock_repo", self.java_file_handler, anonymisation_key=KEY)
 
         # Assert
-        self.assertEqual(len(commits), 1)
-        self.assertEqual(len(test_files), 1)
+        mock_read_repo_info.assert_called_once_with("mock_repo", "files")
+        self.assertEqual(metrics.test_counts, [1, 0, 0])
+        self.assertGreaterEqual(duration, 0)
+
+    @patch("src.mining.commit_retrieval.get_cache_digest", return_value=None)
+    def test_process_repository_with_sqlite_store(self, mock_get_cache_digest):
+        # Arrange
+        configuration.setup_logging()
+        commits = [
+            CustomCommit("hash1", ["src/FileTest.java", "src/Other.java"], "Author1", datetime(2023, 1, 1)),
+            CustomCommit("hash2", ["src/File.java", "src/OtherTest.java"], "Author2", datetime(2023, 1, 2)),
+            CustomCommit("hash3", ["src/File.java", "src/FileTest.java"], "Author1", datetime(2023, 1, 3)),
+            CustomCommit("hash4", ["src/FileTest.java"], "Author3", datetime(2023, 1, 10)),
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir, patch("src.infrastructure.file_utils.COMMITS_PATH", temp_dir):
+            commit_database.write_commits("mock_repo", commits)
 
+            # Act
+            metrics, _ = process_repository("mock_repo", self.java_file_handler, SQLITE_STORE, KEY)
+
+        # Assert
+        expected = compute_repo_metrics(commits, self.java_file_handler)
+        expected.author_counts = anonymise_author_counts(expected.author_counts, KEY)
+        self.assertEqual(metrics.to_dict(), expected.to_dict())
+
+    @patch("src.mining.commit_retrieval.get_cache_digest", return_value="digest")
     @patch("src.mining.commit_retrieval.read_repo_info")
-    def test_gather_commits_and_tests_with_no_commits(self, mock_read_repo_info):
+    def test_process_repository_reuses_stored_results(self, mock_read_repo_info, mock_get_cache_digest):
         # Arrange
-        mock_read_repo_info.return_value = []
+        configuration.setup_logging()
+        mock_read_repo_info.return_value = [
+            CustomCommit("hash1", ["FileTest.java"], "Author1", datetime(2023, 1, 1)),
+            CustomCommit("hash2", ["File.java", "OtherTest.java"], "Author2", datetime(2023, 1, 2)),
+        ]
 
-        # Act
-        commits, test_files = gather_commits_and_tests("mock_repo", self.java_file_handler)
+        class UpdatedJavaFileHandler(JavaFileHandler):
+            rules_version = JavaFileHandler.rules_version + 1
+
+        with tempfile.TemporaryDirectory() as temp_dir, patch("src.infrastructure.file_utils.PROCESSED_PATH", temp_dir):
+            # Act
+            metrics, duration = process_repository("mock_repo", self.java_file_handler, anonymisation_key=KEY)
+            reused_metrics, reused_duration = process_repository("mock_repo", self.java_file_handler, anonymisation_key=KEY)
+            mock_get_cache_digest.return_value = "other_digest"
+            process_repository("mock_repo", self.java_file_handler, anonymisation_key=KEY)
+            process_repository("mock_repo", UpdatedJavaFileHandler(), anonymisation_key=KEY)
 
         # Assert
-        self.assertEqual(commits, [])
-        self.assertEqual(test_files, [])
+        self.assertEqual(mock_read_repo_info.call_count, 3)
+        self.assertEqual(reused_metrics.to_dict(), metrics.to_dict())
+        self.assertEqual(reused_duration, duration)
+
+    @patch("src.mining.commit_retrieval.get_cache_digest", return_value="digest")
+    @patch("src.mining.commit_retrieval.read_repo_info", side_effect=ValueError("Truncated segment"))
+    def test_process_repository_does_not_store_unreadable_commits(self, mock_read_repo_info, mock_get_cache_digest):
+        # Arrange
+        configuration.setup_logging()
 
+        with tempfile.TemporaryDirectory() as temp_dir, patch("src.infrastructure.file_utils.PROCESSED_PATH", temp_dir):
+            # Act
+            metrics, _ = process_repository("mock_repo", self.java_file_handler, anonymisation_key=KEY)
+            process_repository("mock_repo", self.java_file_handler, anonymisation_key=KEY)
 
-    def test_calculate_average_commit_size(self):
+        # Assert
+        self.assertIsNone(metrics)
+        # Nothing was stored, so the commits are read again
+        self.assertEqual(mock_read_repo_info.call_count, 2)
+
+    @patch("src.mining.commit_retrieval.get_cache_digest", return_value="digest")
+    @patch("src.mining.commit_retrieval.read_repo_info")
+    def test_process_repository_stores_anonymised_authors(self, mock_read_repo_info, mock_get_cache_digest):
         # Arrange
-        commits = {
-            0: MagicMock(size=100),
-            1: MagicMock(size=200),
-            2: MagicMock(size=300)
-        }
-        test_files = [(0,), (1,), (2,)]
-        
+        configuration.setup_logging()
+        mock_read_repo_info.return_value = [
+            CustomCommit("hash1", ["FileTest.java"], "Author1", datetime(2023, 1, 1)),
+            CustomCommit("hash2", ["File.java"], "Author2", datetime(2023, 1, 2)),
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir, patch("src.infrastructure.file_utils.PROCESSED_PATH", temp_dir):
+            # Act
+            metrics, _ = process_repository("mock_repo", self.java_file_handler, anonymisation_key=KEY)
+            process_repository("mock_repo", self.java_file_handler, anonymisation_key=bytes(32))
+            stored_results = ""
+            for file_name in os.listdir(temp_dir):
+                with open(os.path.join(temp_dir, file_name), "r", encoding="utf-8") as file:
+                    stored_results += file.read()
+
+        # Assert
+        self.assertEqual(metrics.author_counts, anonymise_author_counts({"Author1": [1, 0, 0]}, KEY))
+        # Results are computed again with another key
+        self.assertEqual(mock_read_repo_info.call_count, 2)
+        self.assertNotIn("Author1", stored_results)
+
+    @patch("src.mining.commit_retrieval.get_cache_digest", return_value="digest")
+    @patch("src.mining.commit_retrieval.read_repo_info")
+    def test_process_repository_reuses_results_without_test_files(self, mock_read_repo_info, mock_get_cache_digest):
+        # Arrange
+        configuration.setup_logging()
+        mock_read_repo_info.return_value = [CustomCommit("hash1", ["File.java"], "Author1", datetime(2023, 1, 1))]
+
+        with tempfile.TemporaryDirectory() as temp_dir, patch("src.infrastructure.file_utils.PROCESSED_PATH", temp_dir):
+            # Act
+            process_repository("mock_repo", self.java_file_handler, anonymisation_key=KEY)
+            metrics, _ = process_repository("mock_repo", self.java_file_handler, anonymisation_key=KEY)
+
+        # Assert
+        mock_read_repo_info.assert_called_once()
+        self.assertIsNone(metrics)
+
+    def test_compute_repo_metrics_with_separate_test_source_root(self):
+        # Arrange
+        commits = [
+            CustomCommit("hash1", ["src/test/java/org/FooTest.java"], "Author1", datetime(2023, 1, 1)),
+            CustomCommit("hash2", ["src/main/java/org/Foo.java"], "Author1", datetime(2023, 1, 2)),
+        ]
+
         # Act
-        average_size = calculate_average_commit_size(commits, test_files)
+        result = compute_repo_metrics(commits, self.java_file_handler)
 
         # Assert
-        self.assertEqual(average_size, 200.0)
+        self.assertEqual(result.test_counts, [1, 0, 0])
 
-    def test_calculate_average_commit_size_when_no_test_files(self):
+    def test_compute_repo_metrics_without_test_files(self):
         # Arrange
-        commits = {
-            0: MagicMock(size=100),
-            1: MagicMock(size=200),
-            2: MagicMock(size=300)
-        }
-        test_files = []
+        commits = [CustomCommit("hash1", ["File.java"], "Author1", datetime(2023, 1, 1))]
 
         # Act
-        result = calculate_average_commit_size(commits, test_files)
+        result = compute_repo_metrics(commits, self.java_file_handler)
 
         # Assert
-        self.assertEqual(result, 0)
+        self.assertIsNone(result)
 
 
 
@@ -1,27 +1,78 @@
 import asyncio
 import os
+import pickle
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
-from datetime import datetime
+from contextlib import contextmanager
+from unittest.mock import call, patch, MagicMock
+from datetime import datetime, timezone
 from src.models.file_handlers.JavaFileHandler import JavaFileHandler
 from src.models.Repository import Repository
-from src.infrastructure import file_utils
+from src.infrastructure import commit_database, configuration, file_utils
+from src.mining import commit_retrieval
+from src.infrastructure.commit_cache import FORMAT_VERSION, write_commits
+from tests.git_fixture import commit_files, git, init_repository
+
+from src.models.MiningOptions import GIT_LOG_BACKEND, SQLITE_STORE, MiningOptions
+from src.models.CustomCommit import CustomCommit
 
 from src.mining.commit_retrieval import (
     retrieve_and_store_repo_info,
     read_repo_info,
+    read_metadata,
+    iterate_repo_info,
+    recover_repo_info,
+    store_repo_info,
+    get_cache_digest,
+    _iterate_commits,
 )
 
+class _SerializedCommits():
+    """
+    Stands in for 'write_commits', keeping the commits streamed to it.
+    """
+    def __init__(self):
+        self.commits = None
+
+    def __call__(self, file_path, items, chunk_size, append=False):
+        self.commits = list(items)
+        return len(self.commits)
+
+HEAD = "fed987"
+
+def _metadata(last_commit="abc123", complete=True, final_date=None, extensions=None, format_version=FORMAT_VERSION, head=HEAD):
+    metadata = {"last_commit": last_commit, "last_date": datetime(2023, 1, 1), "complete": complete, "commit_count": 1,
+                "final_date": final_date, "extensions": extensions if extensions is not None else [".java"], "format_version": format_version}
+    if head is not None:
+        metadata["head"] = head
+    return metadata
+
+@contextmanager
+def _local_repository(repository_source, clone_filter=None):
+    yield repository_source
+
 class TestCommitRetrieval(unittest.TestCase):
 
     def setUp(self):
         self.java_file_handler = JavaFileHandler()
         self.repo = Repository(name="mock_repo", url="https://mock-repo.git")
+        metadata_patcher = patch("src.mining.commit_retrieval._write_metadata")
+        self.mock_write_metadata = metadata_patcher.start()
+        self.addCleanup(metadata_patcher.stop)
+        self.serialized = _SerializedCommits()
+        serialize_patcher = patch("src.infrastructure.commit_cache.write_commits", side_effect=self.serialized)
+        self.mock_write_commits = serialize_patcher.start()
+        self.addCleanup(serialize_patcher.stop)
+        local_repository_patcher = patch("src.infrastructure.repository_utils.local_repository", side_effect=_local_repository)
+        local_repository_patcher.start()
+        self.addCleanup(local_repository_patcher.stop)
+        head_patcher = patch("src.infrastructure.repository_utils.read_head", return_value=HEAD)
+        self.mock_read_head = head_patcher.start()
+        self.addCleanup(head_patcher.stop)
 
     @patch("src.infrastructure.file_utils.file_exists", return_value=False)
-    @patch("src.infrastructure.serialize.serialize")
     @patch("src.infrastructure.repository_utils.read_commits")
-    def test_retrieve_and_store_repo_info_with_no_modified_files(self, mock_read_commits, mock_serialize, mock_file_exists):
+    def test_retrieve_and_store_repo_info_with_no_modified_files(self, mock_read_commits, mock_file_exists):
         # Arrange
         test_date = datetime(2023, 1, 1)
         mock_read_commits.return_value = [
@@ -33,20 +84,19 @@ class TestCommitRetrieval(unittest.TestCase):
             asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler))
 
         # Assert
-        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None)
-        mock_serialize.assert_called_once()
-        commits = mock_serialize.call_args[0][1]
+        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None, None)
+        self.mock_write_commits.assert_called_once()
+        commits = self.serialized.commits
         self.assertEqual(len(commits), 1)
         self.assertEqual(len(commits[0].modified_files), 0)
 
     @patch("src.infrastructure.file_utils.file_exists", return_value=False)
-    @patch("src.infrastructure.serialize.serialize")
     @patch("src.infrastructure.repository_utils.read_commits")
-    def test_retrieve_and_store_repo_info_with_final_date(self, mock_read_commits, mock_serialize, mock_file_exists):
+    def test_retrieve_and_store_repo_info_with_final_date(self, mock_read_commits, mock_file_exists):
         # Arrange
         final_date = datetime(2024, 1, 1)
         mock_read_commits.return_value = [
-            MagicMock(hash="abc123", modified_files=[MagicMock(filename="TestFile1.java")], author="Author1", author_date=final_date)
+            MagicMock(hash="abc123", modified_files=[MagicMock(filename="TestFile1.java", new_path="TestFile1.java")], author="Author1", author_date=final_date)
         ]
 
         # Act
@@ -54,16 +104,15 @@ class TestCommitRetrieval(unittest.TestCase):
             asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, final_date))
 
         # Assert
-        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], final_date)
-        mock_serialize.assert_called_once()
-        commits = mock_serialize.call_args[0][1]
+        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], final_date, None)
+        self.mock_write_commits.assert_called_once()
+        commits = self.serialized.commits
         self.assertEqual(len(commits), 1)
         self.assertEqual(commits[0].hash, "abc123")
 
     @patch("src.infrastructure.file_utils.file_exists", return_value=False)
-    @patch("src.infrastructure.serialize.serialize")
     @patch("src.infrastructure.repository_utils.read_commits")
-    def test_retrieve_and_store_repo_info_with_commits_without_files(self, mock_read_commits, mock_serialize, mock_file_exists):
+    def test_retrieve_and_store_repo_info_with_commits_without_files(self, mock_read_commits, mock_file_exists):
         # Arrange
         test_date = datetime(2023, 1, 1)
         mock_read_commits.return_value = [
@@ -76,9 +125,9 @@ class TestCommitRetrieval(unittest.TestCase):
             asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler))
 
         # Assert
-        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None)
-        mock_serialize.assert_called_once()
-        commits = mock_serialize.call_args[0][1]
+        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None, None)
+        self.mock_write_commits.assert_called_once()
+        commits = self.serialized.commits
         self.assertEqual(len(commits), 2)
         self.assertEqual(len(commits[0].modified_files), 0)
         self.assertEqual(commits[0].hash, "abc123")
@@ -86,10 +135,9 @@ class TestCommitRetrieval(unittest.TestCase):
         self.assertEqual(commits[1].hash, "def456")
 
     @patch("src.infrastructure.file_utils.file_exists", return_value=False)
-    @patch("src.infrastructure.serialize.serialize")
     @patch("src.infrastructure.repository_utils.read_commits")
     @patch("src.infrastructure.repository_utils.logging.error")
-    def test_retrieve_and_store_repo_info_with_failing_commit_generator(self, mock_logging_error, mock_read_commits, mock_serialize, mock_file_exists):
+    def test_retrieve_and_store_repo_info_with_failing_commit_generator(self, mock_logging_error, mock_read_commits, mock_file_exists):
         # Arrange
         mock_read_commits.side_effect = Exception("Test exception")
         
@@ -98,18 +146,17 @@ class TestCommitRetrieval(unittest.TestCase):
             asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler))
 
         # Assert
-        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None)
+        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None, None)
         mock_logging_error.assert_called_once_with(f"Could not drill repository {self.repo.url}: Test exception")
-        mock_serialize.assert_not_called()
+        self.mock_write_metadata.assert_not_called()
 
-    @patch("src.infrastructure.file_utils.file_exists", return_value=True)
-    @patch("src.infrastructure.serialize.serialize")
+    @patch("src.mining.commit_retrieval.read_metadata", return_value=_metadata())
     @patch("src.infrastructure.repository_utils.read_commits")
-    def test_retrieve_and_store_repo_info_file_exists_no_force(self, mock_read_commits, mock_serialize, mock_file_exists):
+    def test_retrieve_and_store_repo_info_file_exists_no_force(self, mock_read_commits, mock_read_metadata):
         # Arrange
         test_date = datetime(2023, 1, 1)
         mock_read_commits.return_value = [
-            MagicMock(hash="abc123", modified_files=[MagicMock(filename="TestFile1.java")], author="Author1", author_date=test_date)
+            MagicMock(hash="abc123", modified_files=[MagicMock(filename="TestFile1.java", new_path="TestFile1.java")], author="Author1", author_date=test_date)
         ]
 
         # Act
@@ -118,16 +165,170 @@ class TestCommitRetrieval(unittest.TestCase):
 
         # Assert
         mock_read_commits.assert_not_called()
-        mock_serialize.assert_not_called()
+        self.mock_write_commits.assert_not_called()
+
+    @patch("src.mining.commit_retrieval.read_metadata", return_value=_metadata(complete=False))
+    @patch("src.infrastructure.repository_utils.read_commits")
+    def test_retrieve_and_store_repo_info_mines_incomplete_cache_again(self, mock_read_commits, mock_read_metadata):
+        # Arrange
+        test_date = datetime(2023, 1, 1)
+        mock_read_commits.return_value = [
+            MagicMock(hash="abc123", modified_files=[MagicMock(filename="TestFile1.java", new_path="TestFile1.java")], author="Author1", author_date=test_date)
+        ]
+
+        # Act
+        with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+            asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler))
+
+        # Assert
+        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None, None)
+        self.assertFalse(self.mock_write_commits.call_args.kwargs["append"])
+
+    @patch("src.mining.commit_retrieval.read_metadata", return_value=_metadata())
+    @patch("src.infrastructure.repository_utils.read_commits")
+    def test_retrieve_and_store_repo_info_mines_again_with_other_final_date(self, mock_read_commits, mock_read_metadata):
+        # Arrange
+        final_date = datetime(2022, 1, 1)
+        mock_read_commits.return_value = [
+            MagicMock(hash="abc123", modified_files=[MagicMock(filename="File1.java", new_path="File1.java")], author="Author1", author_date=final_date)
+        ]
+
+        # Act
+        with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+            asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, final_date, options=MiningOptions(incremental=True)))
+
+        # Assert
+        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], final_date, None)
+        self.assertFalse(self.mock_write_commits.call_args.kwargs["append"])
+        metadata = self.mock_write_metadata.call_args[0][1]
+        self.assertEqual(metadata["final_date"], final_date)
+        self.assertEqual(metadata["commit_count"], 1)
+
+    @patch("src.mining.commit_retrieval.read_metadata", return_value=_metadata(extensions=[".java", ".kt"]))
+    @patch("src.infrastructure.repository_utils.read_commits", return_value=[])
+    def test_retrieve_and_store_repo_info_mines_again_with_other_extensions(self, mock_read_commits, mock_read_metadata):
+        # Act
+        with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+            asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, options=MiningOptions(incremental=True)))
+
+        # Assert
+        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None, None)
+        self.assertFalse(self.mock_write_commits.call_args.kwargs["append"])
+
+    @patch("src.mining.commit_retrieval.read_metadata", return_value=_metadata(format_version=FORMAT_VERSION - 1))
+    @patch("src.infrastructure.repository_utils.read_commits", return_value=[])
+    def test_retrieve_and_store_repo_info_mines_again_with_other_format(self, mock_read_commits, mock_read_metadata):
+        # Act
+        with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+            asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler))
+
+        # Assert
+        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None, None)
+
+    @patch("src.mining.commit_retrieval.read_metadata", return_value={"last_commit": "abc123", "last_date": datetime(2023, 1, 1),
+                                                                      "complete": True, "commit_count": None})
+    @patch("src.infrastructure.repository_utils.read_commits")
+    def test_retrieve_and_store_repo_info_reuses_cache_without_recorded_settings(self, mock_read_commits, mock_read_metadata):
+        # Act
+        with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+            asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, datetime(2024, 1, 1)))
+
+        # Assert
+        mock_read_commits.assert_not_called()
+
+    @patch("src.mining.commit_retrieval.read_metadata", return_value=_metadata(final_date=datetime(2023, 6, 1)))
+    @patch("src.infrastructure.repository_utils.read_commits")
+    def test_retrieve_and_store_repo_info_incremental_extends_to_later_final_date(self, mock_read_commits, mock_read_metadata):
+        # Arrange
+        final_date = datetime(2024, 1, 1)
+        configuration.setup_logging()
+        mock_read_commits.side_effect = [
+            [MagicMock(hash="def456", modified_files=[MagicMock(filename="File1.java", new_path="File1.java")], author="Author1", author_date=datetime(2023, 7, 1))],
+            [MagicMock(hash="ghi789", modified_files=[MagicMock(filename="File2.java", new_path="File2.java")], author="Author2", author_date=datetime(2023, 8, 1))],
+        ]
+
+        # Act
+        with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+            asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, final_date, options=MiningOptions(incremental=True)))
+
+        # Assert
+        # The commits of the traversed history dated after the previous final date, then those missing from that history
+        self.assertEqual(mock_read_commits.call_args_list, [
+            call("https://mock-repo.git", ['.java'], final_date, since=datetime(2023, 6, 1, 0, 0, 1), to_commit=HEAD),
+            call("https://mock-repo.git", ['.java'], final_date, HEAD),
+        ])
+        self.assertTrue(self.mock_write_commits.call_args.kwargs["append"])
+        self.assertEqual([commit.hash for commit in self.serialized.commits], ["def456", "ghi789"])
+        # The new final date is recorded, so the cache is not mined again for it
+        self.mock_write_metadata.assert_called_once_with("mock_repo", {**_metadata("ghi789", final_date=final_date), "last_date": datetime(2023, 8, 1),
+                                                                       "commit_count": 3}, "files")
+
+    @patch("src.infrastructure.commit_cache.recover_commits")
+    @patch("src.mining.commit_retrieval.read_metadata", return_value=_metadata(final_date=datetime(2023, 6, 1)))
+    def test_recover_repo_info_keeps_previous_final_date(self, mock_read_metadata, mock_recover_commits):
+        # Arrange
+        last_commit = CustomCommit("def456", ["File2.java"], "Author2", datetime(2023, 7, 1))
+        mock_recover_commits.return_value = (1, last_commit)
+
+        # Act
+        recover_repo_info(self.repo, self.java_file_handler, datetime(2024, 1, 1), options=MiningOptions(incremental=True))
+
+        # Assert
+        # The next extension reads the commits dated after the previous final date again, skipping those kept
+        metadata = self.mock_write_metadata.call_args[0][1]
+        self.assertEqual((metadata["final_date"], metadata["complete"]), (datetime(2023, 6, 1), False))
+        self.assertNotIn("head", metadata)
+
+    @patch("src.infrastructure.commit_cache.recover_commits")
+    @patch("src.mining.commit_retrieval.read_metadata", return_value=None)
+    def test_recover_repo_info_marks_cache_as_incomplete(self, mock_read_metadata, mock_recover_commits):
+        # Arrange
+        last_commit = CustomCommit("def456", ["File2.java"], "Author2", datetime(2023, 1, 2))
+        mock_recover_commits.return_value = (2, last_commit)
+
+        # Act
+        result = recover_repo_info(self.repo, self.java_file_handler, options=MiningOptions(incremental=True))
+
+        # Assert
+        self.assertEqual(result, 2)
+        mock_recover_commits.assert_called_once_with(os.path.join(file_utils.COMMITS_PATH, "mock_repo.commits"), False)
+        self.mock_write_metadata.assert_called_once_with("mock_repo", {**_metadata("def456", complete=False, head=None), "last_date": datetime(2023, 1, 2),
+                                                                       "commit_count": 2}, "files")
+
+    @patch("src.infrastructure.commit_cache.recover_commits")
+    @patch("src.mining.commit_retrieval.read_metadata", return_value=_metadata())
+    def test_recover_repo_info_when_appending(self, mock_read_metadata, mock_recover_commits):
+        # Arrange
+        last_commit = CustomCommit("def456", ["File2.java"], "Author2", datetime(2023, 1, 2))
+        mock_recover_commits.return_value = (2, last_commit)
+
+        # Act
+        result = recover_repo_info(self.repo, self.java_file_handler, options=MiningOptions(incremental=True))
+
+        # Assert
+        self.assertEqual(result, 2)
+        mock_recover_commits.assert_called_once_with(os.path.join(file_utils.COMMITS_PATH, "mock_repo.commits"), True)
+        metadata = self.mock_write_metadata.call_args[0][1]
+        self.assertEqual((metadata["last_commit"], metadata["complete"], metadata["commit_count"]), ("def456", False, 3))
+
+    @patch("src.infrastructure.commit_cache.recover_commits", return_value=(0, None))
+    @patch("src.mining.commit_retrieval.read_metadata", return_value=_metadata())
+    def test_recover_repo_info_without_commits_when_appending(self, mock_read_metadata, mock_recover_commits):
+        # Act
+        result = recover_repo_info(self.repo, self.java_file_handler, options=MiningOptions(incremental=True))
+
+        # Assert
+        self.assertEqual(result, 0)
+        mock_recover_commits.assert_called_once_with(os.path.join(file_utils.COMMITS_PATH, "mock_repo.commits"), True)
+        self.mock_write_metadata.assert_not_called()
 
     @patch("src.infrastructure.file_utils.file_exists", return_value=True)
-    @patch("src.infrastructure.serialize.serialize")
     @patch("src.infrastructure.repository_utils.read_commits")
-    def test_retrieve_and_store_repo_info_file_exists_with_force(self, mock_read_commits, mock_serialize, mock_file_exists):
+    def test_retrieve_and_store_repo_info_file_exists_with_force(self, mock_read_commits, mock_file_exists):
         # Arrange
         test_date = datetime(2023, 1, 1)
         mock_read_commits.return_value = [
-            MagicMock(hash="abc123", modified_files=[MagicMock(filename="TestFile1.java")], author="Author1", author_date=test_date)
+            MagicMock(hash="abc123", modified_files=[MagicMock(filename="TestFile1.java", new_path="TestFile1.java")], author="Author1", author_date=test_date)
         ]
 
         # Act
@@ -135,57 +336,478 @@ class TestCommitRetrieval(unittest.TestCase):
             asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, force_mine=True))
 
         # Assert
-        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None)
-        mock_serialize.assert_called_once()
-        commits = mock_serialize.call_args[0][1]
+        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None, None)
+        self.mock_write_commits.assert_called_once()
+        commits = self.serialized.commits
         self.assertEqual(len(commits), 1)
         self.assertEqual(commits[0].hash, "abc123")
 
 
-    @patch("src.infrastructure.serialize.deserialize")
-    def test_read_repo_info_with_commits(self, mock_deserialize):
+    @patch("src.mining.commit_retrieval.read_metadata")
+    @patch("src.infrastructure.repository_utils.read_commits")
+    def test_retrieve_and_store_repo_info_incremental_appends_new_commits(self, mock_read_commits, mock_read_metadata):
+        # Arrange
+        test_date = datetime(2023, 1, 1)
+        mock_read_metadata.return_value = _metadata(head="abc123")
+        mock_read_commits.return_value = [
+            MagicMock(hash="def456", modified_files=[MagicMock(filename="TestFile1.java", new_path="TestFile1.java")], author="Author2", author_date=test_date),
+        ]
+
+        # Act
+        with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+            asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, options=MiningOptions(incremental=True)))
+
+        # Assert
+        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None, "abc123")
+        self.assertTrue(self.mock_write_commits.call_args.kwargs["append"])
+        commits = self.serialized.commits
+        self.assertEqual([commit.hash for commit in commits], ["def456"])
+        # The new head is recorded, so the next extension starts from it
+        self.mock_write_metadata.assert_called_once_with("mock_repo", {**_metadata("def456"), "commit_count": 2}, "files")
+
+    @patch("src.mining.commit_retrieval.iterate_repo_info")
+    @patch("src.mining.commit_retrieval.read_metadata", return_value=_metadata("abc123", complete=False, head=None))
+    @patch("src.infrastructure.repository_utils.read_commits")
+    def test_retrieve_and_store_repo_info_incremental_without_recorded_head(self, mock_read_commits, mock_read_metadata, mock_iterate_repo_info):
+        # Arrange
+        test_date = datetime(2023, 1, 1)
+        mock_iterate_repo_info.return_value = [CustomCommit("aaa111", ["File0.java"], "Author1", test_date),
+                                               CustomCommit("abc123", ["File1.java"], "Author1", test_date)]
+        mock_read_commits.return_value = [
+            MagicMock(hash="aaa111", modified_files=[MagicMock(filename="File0.java", new_path="File0.java")], author="Author1", author_date=test_date),
+            MagicMock(hash="def456", modified_files=[MagicMock(filename="TestFile1.java", new_path="TestFile1.java")], author="Author2", author_date=test_date),
+        ]
+
+        # Act
+        with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+            asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, options=MiningOptions(incremental=True)))
+
+        # Assert
+        # An interrupted mining only knows its last cached commit, and the commits outside its history may already be cached
+        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None, "abc123")
+        self.assertEqual([commit.hash for commit in self.serialized.commits], ["def456"])
+        self.mock_write_metadata.assert_called_once_with("mock_repo", {**_metadata("def456"), "commit_count": 2}, "files")
+
+    @patch("src.mining.commit_retrieval.read_metadata")
+    @patch("src.infrastructure.repository_utils.read_commits")
+    def test_retrieve_and_store_repo_info_incremental_without_new_commits(self, mock_read_commits, mock_read_metadata):
+        # Arrange
+        configuration.setup_logging()
+        mock_read_metadata.return_value = _metadata()
+        mock_read_commits.return_value = []
+
+        # Act
+        with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+            asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, options=MiningOptions(incremental=True)))
+
+        # Assert
+        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None, HEAD)
+        self.assertEqual(self.serialized.commits, [])
+        self.mock_write_metadata.assert_called_once_with("mock_repo", _metadata(), "files")
+
+    @patch("src.infrastructure.file_utils.file_exists", return_value=False)
+    @patch("src.mining.commit_retrieval.read_metadata", return_value=None)
+    @patch("src.infrastructure.repository_utils.read_commits")
+    def test_retrieve_and_store_repo_info_incremental_without_cache(self, mock_read_commits, mock_read_metadata, mock_file_exists):
+        # Arrange
+        test_date = datetime(2023, 1, 1)
+        mock_read_commits.return_value = [
+            MagicMock(hash="abc123", modified_files=[MagicMock(filename="File1.java", new_path="File1.java")], author="Author1", author_date=test_date),
+        ]
+
+        # Act
+        with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+            asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, options=MiningOptions(incremental=True)))
+
+        # Assert
+        mock_read_commits.assert_called_once_with("https://mock-repo.git", ['.java'], None, None)
+        self.mock_write_commits.assert_called_once()
+
+    @patch("src.infrastructure.commit_database.has_commits", return_value=False)
+    @patch("src.infrastructure.repository_utils.read_commits")
+    def test_retrieve_and_store_repo_info_with_sqlite_store(self, mock_read_commits, mock_has_commits):
+        # Arrange
+        test_date = datetime(2023, 1, 1)
+        mock_read_commits.return_value = [
+            MagicMock(hash="abc123", modified_files=[MagicMock(filename="File1.java", new_path="File1.java")], author="Author1", author_date=test_date),
+        ]
+        stored = _SerializedCommits()
+
+        # Act
+        with patch("src.infrastructure.commit_database.write_commits", side_effect=stored) as mock_write_database_commits:
+            with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+                asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, options=MiningOptions(store=SQLITE_STORE)))
+
+        # Assert
+        mock_has_commits.assert_called_once_with("mock_repo")
+        self.assertEqual(mock_write_database_commits.call_args[0][0], "mock_repo")
+        self.mock_write_commits.assert_not_called()
+        self.assertEqual([commit.hash for commit in stored.commits], ["abc123"])
+        self.mock_write_metadata.assert_called_once_with("mock_repo", {**_metadata(format_version=commit_database.SCHEMA_VERSION)}, SQLITE_STORE)
+
+    @patch("src.mining.commit_retrieval.read_metadata", return_value=_metadata(format_version=commit_database.SCHEMA_VERSION))
+    @patch("src.infrastructure.repository_utils.read_commits")
+    def test_retrieve_and_store_repo_info_with_sqlite_store_already_stored(self, mock_read_commits, mock_read_metadata):
+        # Act
+        with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+            asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, options=MiningOptions(store=SQLITE_STORE)))
+
+        # Assert
+        mock_read_commits.assert_not_called()
+        mock_read_metadata.assert_called_once_with("mock_repo", SQLITE_STORE)
+
+    def test_mining_options_with_unknown_store(self):
+        # Act & Assert
+        with self.assertRaises(ValueError):
+            MiningOptions(store="unknown")
+
+    @patch("src.infrastructure.file_utils.file_exists", return_value=False)
+    @patch("src.infrastructure.repository_utils.read_commits")
+    @patch("src.infrastructure.repository_utils.mirror_repository", return_value="/mirrors/mock_repo.git")
+    def test_retrieve_and_store_repo_info_with_mirror(self, mock_mirror_repository, mock_read_commits, mock_file_exists):
+        # Arrange
+        test_date = datetime(2023, 1, 1)
+        mock_read_commits.return_value = [
+            MagicMock(hash="abc123", modified_files=[MagicMock(filename="File1.java", new_path="File1.java")], author="Author1", author_date=test_date),
+        ]
+
+        # Act
+        with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+            asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, options=MiningOptions(use_mirror=True)))
+
+        # Assert
+        mock_mirror_repository.assert_called_once_with("https://mock-repo.git", None)
+        mock_read_commits.assert_called_once_with("/mirrors/mock_repo.git", ['.java'], None, None)
+        self.mock_write_commits.assert_called_once()
+
+    @patch("src.infrastructure.file_utils.file_exists", return_value=False)
+    @patch("src.infrastructure.git_log.read_commits")
+    @patch("src.infrastructure.repository_utils.read_commits")
+    def test_retrieve_and_store_repo_info_with_git_log_backend(self, mock_read_commits, mock_read_log_commits, mock_file_exists):
+        # Arrange
+        test_date = datetime(2023, 1, 1)
+        mock_read_log_commits.return_value = [
+            MagicMock(hash="abc123", modified_files=[MagicMock(filename="File1.java", new_path="File1.java")], author="Author1", author_date=test_date),
+        ]
+        options = MiningOptions(backend=GIT_LOG_BACKEND)
+
+        # Act
+        with patch("src.infrastructure.repository_utils.local_repository") as mock_local_repository:
+            mock_local_repository.return_value.__enter__.return_value = "/tmp/clone.git"
+            with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+                asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, options=options))
+
+        # Assert
+        mock_read_commits.assert_not_called()
+        mock_local_repository.assert_called_once_with("https://mock-repo.git", None)
+        mock_read_log_commits.assert_called_once_with("/tmp/clone.git", ['.java'], None, None)
+        commits = self.serialized.commits
+        self.assertEqual(commits[0].modified_files, ("File1.java",))
+
+    @patch("src.infrastructure.file_utils.file_exists", return_value=False)
+    @patch("src.infrastructure.git_log.read_commits", return_value=[])
+    @patch("src.infrastructure.repository_utils.mirror_repository", return_value="/mirrors/mock_repo.git")
+    def test_retrieve_and_store_repo_info_with_partial_clone(self, mock_mirror_repository, mock_read_log_commits, mock_file_exists):
+        # Arrange
+        options = MiningOptions(use_mirror=True, backend=GIT_LOG_BACKEND, partial_clone=True)
+
+        # Act
+        with patch("src.infrastructure.repository_utils.local_repository") as mock_local_repository:
+            mock_local_repository.return_value.__enter__.return_value = "/mirrors/mock_repo.git"
+            with patch("asyncio.to_thread", side_effect=lambda func, *args: func(*args)):
+                asyncio.run(retrieve_and_store_repo_info(self.repo, self.java_file_handler, options=options))
+
+        # Assert
+        mock_mirror_repository.assert_called_once_with("https://mock-repo.git", "blob:none")
+        mock_local_repository.assert_called_once_with("/mirrors/mock_repo.git", "blob:none")
+        mock_read_log_commits.assert_called_once_with("/mirrors/mock_repo.git", ['.java'], None, None)
+
+    def test_mining_options_with_partial_clone_and_pydriller_backend(self):
+        # Act, Assert
+        with self.assertRaises(ValueError):
+            MiningOptions(partial_clone=True)
+
+    def test_mining_options_with_unknown_backend(self):
+        # Act, Assert
+        with self.assertRaises(ValueError):
+            MiningOptions(backend="unknown")
+
+    @patch("src.mining.commit_retrieval.iterate_repo_info")
+    @patch("src.infrastructure.file_utils.file_exists", side_effect=lambda path: path.endswith(".commits"))
+    def test_read_metadata_falls_back_to_cached_commits(self, mock_file_exists, mock_iterate_repo_info):
+        # Arrange
+        test_date = datetime(2023, 1, 2)
+        mock_iterate_repo_info.return_value = [
+            CustomCommit("abc123", ["File1.java"], "Author1", datetime(2023, 1, 1)),
+            CustomCommit("def456", ["File2.java"], "Author2", test_date),
+        ]
+
+        # Act
+        result = read_metadata("mock_repo")
+
+        # Assert
+        self.assertEqual(result, {"last_commit": "def456", "last_date": test_date, "complete": True, "commit_count": 2, "format_version": 1})
+
+    def test_get_cache_digest_changes_with_cached_commits(self):
+        # Arrange
+        commits = [
+            CustomCommit("abc123", ["File1.java"], "Author1", datetime(2023, 1, 1)),
+            CustomCommit("def456", ["File2.java"], "Author2", datetime(2023, 1, 2)),
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir, patch("src.infrastructure.file_utils.COMMITS_PATH", temp_dir):
+            write_commits(os.path.join(temp_dir, "mock_repo.commits"), commits[:1])
+
+            # Act
+            digest = get_cache_digest("mock_repo")
+            unchanged_digest = get_cache_digest("mock_repo")
+            write_commits(os.path.join(temp_dir, "mock_repo.commits"), commits[1:], append=True)
+            changed_digest = get_cache_digest("mock_repo")
+            missing_digest = get_cache_digest("other_repo")
+
+        # Assert
+        self.assertEqual(digest, unchanged_digest)
+        self.assertNotEqual(digest, changed_digest)
+        self.assertIsNone(missing_digest)
+
+    @patch("src.infrastructure.file_utils.file_exists", return_value=False)
+    def test_read_metadata_when_not_mined(self, mock_file_exists):
+        # Act
+        result = read_metadata("mock_repo")
+
+        # Assert
+        self.assertIsNone(result)
+
+    @patch("src.infrastructure.commit_cache.iterate_commits")
+    def test_read_repo_info_with_commits(self, mock_iterate_commits):
         # Arrange
         mock_commits = [
             MagicMock(hash="abc123", modified_files=["TestFile1.java"], author="Author1", author_date="2023-01-01"),
             MagicMock(hash="def456", modified_files=["TestFile2.java"], author="Author2", author_date="2023-01-02"),
         ]
-        mock_deserialize.return_value = mock_commits
+        mock_iterate_commits.return_value = iter(mock_commits)
 
         # Act
         result = read_repo_info("mock_repo")
 
         # Assert
-        mock_deserialize.assert_called_once_with(os.path.join(file_utils.COMMITS_PATH, "mock_repo.pkl"))
+        mock_iterate_commits.assert_called_once_with(os.path.join(file_utils.COMMITS_PATH, "mock_repo.commits"))
         self.assertEqual(len(result), 2)
         self.assertEqual(result[0].hash, "abc123")
         self.assertEqual(result[1].hash, "def456")
         
-    @patch("src.infrastructure.serialize.deserialize")
-    def test_read_repo_info_with_empty_commits(self, mock_deserialize):
+    @patch("src.infrastructure.commit_cache.iterate_commits")
+    def test_iterate_repo_info_reads_commits_lazily(self, mock_iterate_commits):
         # Arrange
-        mock_deserialize.return_value = []
+        def commits():
+            yield MagicMock(hash="abc123")
+            raise AssertionError("The second commit should not be read")
+        mock_iterate_commits.return_value = commits()
+
+        # Act
+        result = next(iterate_repo_info("mock_repo"))
+
+        # Assert
+        self.assertEqual(result.hash, "abc123")
+
+    @patch("src.infrastructure.commit_cache.iterate_commits")
+    def test_read_repo_info_with_empty_commits(self, mock_iterate_commits):
+        # Arrange
+        mock_iterate_commits.return_value = iter([])
 
         # Act
         result = read_repo_info("mock_repo")
 
         # Assert
-        mock_deserialize.assert_called_once_with(os.path.join(file_utils.COMMITS_PATH, "mock_repo.pkl"))
+        mock_iterate_commits.assert_called_once_with(os.path.join(file_utils.COMMITS_PATH, "mock_repo.commits"))
         self.assertEqual(result, [])
 
-    @patch("src.infrastructure.serialize.deserialize")
+    @patch("src.infrastructure.commit_cache.iterate_commits")
     @patch("logging.warning")
-    def test_read_repo_info_with_commits(self, mock_logging_warning, mock_deserialize):
+    def test_read_repo_info_when_not_mined(self, mock_logging_warning, mock_iterate_commits):
         # Arrange
-        mock_deserialize.side_effect = Exception("Test exception")
+        mock_iterate_commits.side_effect = FileNotFoundError("Commit cache not found")
 
         # Act
         result = read_repo_info("mock_repo")
 
         # Assert
-        mock_deserialize.assert_called_once_with(os.path.join(file_utils.COMMITS_PATH, "mock_repo.pkl"))
+        mock_iterate_commits.assert_called_once_with(os.path.join(file_utils.COMMITS_PATH, "mock_repo.commits"))
         self.assertEqual(len(result), 0)
         mock_logging_warning.assert_called_once()
 
+    @patch("src.infrastructure.commit_cache.iterate_commits")
+    def test_read_repo_info_with_failing_deserialization(self, mock_iterate_commits):
+        # Arrange
+        def commits():
+            yield MagicMock(hash="abc123")
+            raise ValueError("Truncated segment")
+        mock_iterate_commits.return_value = commits()
+
+        # Act, Assert
+        with self.assertRaises(ValueError):
+            read_repo_info("mock_repo")
+
+    @patch("src.mining.commit_retrieval.iterate_repo_info", side_effect=ValueError("Truncated segment"))
+    @patch("src.infrastructure.file_utils.file_exists", side_effect=lambda path: path.endswith(".commits"))
+    def test_read_metadata_with_unreadable_cache(self, mock_file_exists, mock_iterate_repo_info):
+        # Act
+        result = read_metadata("mock_repo")
+
+        # Assert
+        # The repository is then mined again
+        self.assertIsNone(result)
+
+    def test_read_repo_info_converts_pickled_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir, patch("src.infrastructure.file_utils.COMMITS_PATH", temp_dir):
+            # Arrange
+            commits = [
+                CustomCommit("abc123", ["File1.java"], "Author1", datetime(2023, 1, 1)),
+                CustomCommit("def456", ["File2.java"], "Author2", datetime(2023, 1, 2)),
+            ]
+            with open(os.path.join(temp_dir, "mock_repo.pkl"), "wb") as file:
+                for commit in commits:
+                    pickle.dump([commit], file)
+            self.mock_write_commits.side_effect = write_commits
+
+            # Act
+            result = read_repo_info("mock_repo")
+
+            # Assert
+            self.assertEqual([(commit.hash, commit.modified_files, commit.author, commit.date) for commit in result],
+                             [(commit.hash, commit.modified_files, commit.author, commit.date) for commit in commits])
+            self.assertEqual(os.listdir(temp_dir), ["mock_repo.commits"])
+
+class TestShardedCommitRetrieval(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.repo_path = init_repository(os.path.join(cls.temp_dir.name, "fixture"))
+        cls.java_file_handler = JavaFileHandler()
+
+        commit_files(cls.repo_path, {"src/Foo.java": "foo"}, date="2023-01-01T10:00:00+00:00")
+        commit_files(cls.repo_path, {"src/FooTest.java": "test"}, date="2023-01-03T10:00:00+00:00")
+        # Committed before its parent, as with a skewed clock
+        commit_files(cls.repo_path, {"src/Foo.java": "skewed"}, date="2023-01-02T10:00:00+00:00")
+        git("checkout", "-q", "-b", "feature", cwd=cls.repo_path)
+        commit_files(cls.repo_path, {"src/Bar.java": "bar"}, date="2023-01-04T10:00:00+00:00")
+        commit_files(cls.repo_path, {"src/BarTest.java": "test"}, date="2023-01-04T10:00:00+00:00")
+        git("checkout", "-q", "main", cwd=cls.repo_path)
+        commit_files(cls.repo_path, {"README.md": "readme"}, date="2023-01-05T10:00:00+00:00")
+        commit_files(cls.repo_path, {"src/Foo.java": "changed"}, date="2023-01-06T10:00:00+00:00")
+        git("merge", "-q", "--no-ff", "-m", "Merge feature", "feature", cwd=cls.repo_path, date="2023-01-07T10:00:00+00:00")
+        commit_files(cls.repo_path, {"src/Baz.java": "baz"}, date="2023-01-08T10:00:00+00:00")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    def _mine(self, options, final_date=None):
+        return [str(commit) for commit in _iterate_commits(self.repo_path, self.java_file_handler, final_date, None, options)]
+
+    def test_sharded_git_log_traversal_matches_serial_traversal(self):
+        # Act
+        expected = self._mine(MiningOptions(backend=GIT_LOG_BACKEND))
+        result = self._mine(MiningOptions(backend=GIT_LOG_BACKEND, shards=3))
+
+        # Assert
+        self.assertEqual(len(result), 7)
+        self.assertEqual(result, expected)
+
+    def test_sharded_git_log_traversal_with_final_date(self):
+        # Arrange
+        final_date = datetime(2023, 1, 5, 12)
+
+        # Act
+        expected = self._mine(MiningOptions(backend=GIT_LOG_BACKEND), final_date)
+        result = self._mine(MiningOptions(backend=GIT_LOG_BACKEND, shards=4), final_date)
+
+        # Assert
+        self.assertEqual(len(result), 5)
+        self.assertEqual(result, expected)
+
+    def test_sharded_pydriller_traversal_matches_serial_traversal(self):
+        # Act
+        expected = self._mine(MiningOptions())
+        result = self._mine(MiningOptions(shards=2))
+
+        # Assert
+        self.assertEqual(len(result), 7)
+        self.assertEqual(result, expected)
+
+    def test_traversals_store_repository_paths(self):
+        # Act
+        result = [list(_iterate_commits(self.repo_path, self.java_file_handler, None, None, options))
+                  for options in [MiningOptions(), MiningOptions(backend=GIT_LOG_BACKEND)]]
+
+        # Assert
+        for commits in result:
+            self.assertEqual([commit.modified_files for commit in commits[:2]], [("src/Foo.java",), ("src/FooTest.java",)])
+
+    def test_mining_options_with_invalid_shards(self):
+        # Act, Assert
+        with self.assertRaises(ValueError):
+            MiningOptions(shards=0)
+
+
+class TestIncrementalCommitRetrieval(unittest.TestCase):
+
+    def _mine_branch_merged_after_mining(self, options):
+        with tempfile.TemporaryDirectory() as temp_dir, patch("src.infrastructure.file_utils.COMMITS_PATH", temp_dir):
+            repo_path = init_repository(os.path.join(temp_dir, "fixture"))
+            repo = Repository(name="fixture", url=repo_path)
+            commit_files(repo_path, {"src/Foo.java": "foo"}, date="2023-01-01T10:00:00+00:00")
+            git("checkout", "-q", "-b", "feature", cwd=repo_path)
+            commit_files(repo_path, {"src/Bar.java": "bar"}, date="2023-01-02T10:00:00+00:00")
+            git("checkout", "-q", "main", cwd=repo_path)
+            commit_files(repo_path, {"src/Foo.java": "changed"}, date="2023-01-03T10:00:00+00:00")
+            store_repo_info(repo, JavaFileHandler(), options=options)
+
+            # The feature branch was forked before the last mined commit, and is merged after it
+            git("merge", "-q", "--no-ff", "-m", "Merge feature", "feature", cwd=repo_path, date="2023-01-04T10:00:00+00:00")
+            commit_files(repo_path, {"src/BarTest.java": "test"}, date="2023-01-05T10:00:00+00:00")
+            store_repo_info(repo, JavaFileHandler(), options=options)
+
+            commits = read_repo_info("fixture", options.store)
+            return [commit.modified_files for commit in commits], read_metadata("fixture", options.store)
+
+    def _mine_to_later_final_date(self, options):
+        with tempfile.TemporaryDirectory() as temp_dir, patch("src.infrastructure.file_utils.COMMITS_PATH", temp_dir):
+            repo_path = init_repository(os.path.join(temp_dir, "fixture"))
+            repo = Repository(name="fixture", url=repo_path)
+            commit_files(repo_path, {"src/Foo.java": "foo"}, date="2023-01-01T10:00:00+00:00")
+            commit_files(repo_path, {"src/FooTest.java": "test"}, date="2023-01-03T10:00:00+00:00")
+            store_repo_info(repo, JavaFileHandler(), datetime(2023, 1, 2, tzinfo=timezone.utc), options=options)
+
+            commit_files(repo_path, {"src/Bar.java": "bar"}, date="2023-01-05T10:00:00+00:00")
+            commit_files(repo_path, {"src/BarTest.java": "test"}, date="2023-01-08T10:00:00+00:00")
+            with patch("src.mining.commit_retrieval._iterate_commits", wraps=commit_retrieval._iterate_commits) as mock_iterate_commits:
+                store_repo_info(repo, JavaFileHandler(), datetime(2023, 1, 6, tzinfo=timezone.utc), options=options)
+
+            commits = read_repo_info("fixture", options.store)
+            return [commit.modified_files for commit in commits], read_metadata("fixture", options.store), mock_iterate_commits.call_args.args[3]
+
+    def test_incremental_mining_extends_to_later_final_date(self):
+        for options in [MiningOptions(incremental=True), MiningOptions(incremental=True, backend=GIT_LOG_BACKEND)]:
+            # Act
+            files, metadata, from_commit = self._mine_to_later_final_date(options)
+
+            # Assert
+            # The test was committed before the first mining, but dated after its final date
+            self.assertEqual(files, [("src/Foo.java",), ("src/FooTest.java",), ("src/Bar.java",)])
+            self.assertIsNotNone(from_commit)
+            self.assertEqual((metadata["final_date"], metadata["commit_count"]), (datetime(2023, 1, 6, tzinfo=timezone.utc), 3))
+
+    def test_incremental_mining_reads_branches_merged_since(self):
+        for options in [MiningOptions(incremental=True), MiningOptions(incremental=True, backend=GIT_LOG_BACKEND)]:
+            # Act
+            files, metadata = self._mine_branch_merged_after_mining(options)
+
+            # Assert
+            self.assertEqual(files, [("src/Foo.java",), ("src/Foo.java",), ("src/Bar.java",), ("src/BarTest.java",)])
+            self.assertEqual(metadata["commit_count"], 4)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,123 +1,217 @@
+import asyncio
+import csv
+import os
+import random
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
-import unittest.mock
+from unittest.mock import patch
 from src.infrastructure import configuration
 from src.mining import csv_export
 
 from src.mining.csv_export import (
-    update_author_data, 
-    update_repo_data, 
-    update_author_count,
-    anonymyse_authors
+    update_mining_status,
+    ResultsAggregator,
+    ResultsWriter,
+    read_anonymisation_key,
+    anonymise_author,
+    anonymise_author_counts
 )
 
+KEY = bytes(range(32))
+
+def _id(author):
+    return anonymise_author(author, KEY)
+
 class TestCsvExport(unittest.TestCase):
     
     def setUp(self):
         configuration.setup_logging()
 
     @patch("src.mining.csv_export.file_utils.create_or_update_csv")
-    def test_update_author_data(self, mock_create_or_update_csv):
+    def test_update_mining_status(self, mock_create_or_update_csv):
         # Arrange
-        data = ["author_name", "data1", "data2"]
+        data = ["repo_name", "timed out", 60.0, 1000]
 
         # Act
-        update_author_data(data)
-        
+        update_mining_status(data)
+
         # Assert
         mock_create_or_update_csv.assert_called_once_with(
-            csv_export.AUTHOR_CSV_PATH,
-            unittest.mock.ANY, 
-            data, 
-            "author_name", 
-            unittest.mock.ANY
+            csv_export.MINING_STATUS_CSV_PATH,
+            csv_export.MINING_STATUS_HEADER,
+            data,
+            "repo_name",
         )
 
-    @patch("src.mining.csv_export.file_utils.create_or_update_csv")
-    def test_update_repo_data(self, mock_create_or_update_csv):
+    def _aggregate(self, results, checkpoint_interval=None, flush=True, export=None):
+        with tempfile.TemporaryDirectory() as directory, \
+             patch("src.mining.csv_export.REPO_CSV_PATH", os.path.join(directory, "repo_data.csv")), \
+             patch("src.mining.csv_export.AUTHOR_CSV_PATH", os.path.join(directory, "author_data.csv")):
+            aggregator = ResultsAggregator(checkpoint_interval)
+            if export is not None:
+                asyncio.run(export(aggregator, results))
+            else:
+                for result in results:
+                    aggregator.add_repo_results(*result)
+            if flush:
+                aggregator.flush()
+            files = {}
+            for file_name in sorted(os.listdir(directory)):
+                with open(os.path.join(directory, file_name), "r", encoding="utf-8") as file:
+                    files[file_name] = list(csv.reader(file))
+            return files
+
+    def test_results_aggregator_replaces_repo_rows_and_merges_author_counts(self):
         # Arrange
-        data = ["repo_name", "data1", "data2"]
+        results = [
+            (["repo1", "Java", 10], {"Alice": [1, 0, 2]}),
+            (["repo2", "Java", 20], {"Alice": [0, 3, 0], "Bob": [1, 1, 1]}),
+            (["repo1", "Java", 15], {"Bob": [2, 0, 0]}),
+        ]
 
         # Act
-        update_repo_data(data)
-        
+        files = self._aggregate(results)
+
         # Assert
-        mock_create_or_update_csv.assert_called_once_with(
-            csv_export.REPO_CSV_PATH,
-            unittest.mock.ANY, 
-            data, 
-            "repo_name",
-        )
+        self.assertEqual(files["repo_data.csv"], [csv_export.REPO_HEADER, ["repo1", "Java", "15"], ["repo2", "Java", "20"]])
+        self.assertEqual(files["author_data.csv"], [csv_export.AUTHOR_HEADER, ["Alice", "1", "3", "2"], ["Bob", "3", "1", "1"]])
 
-    def test_update_author_count(self):
+    def test_results_aggregator_writes_nothing_until_flushed(self):
         # Arrange
-        commits = {
-            0: MagicMock(author="John Doe"),
-            1: MagicMock(author="Jane Doe"),
-            2: MagicMock(author="John Doe")
-        }
-        author_counts = {}
-        test_files = [(0,), (1,), (2,)]
-
-        expected_counts = {
-            "John Doe": [0, 2, 0],
-            "Jane Doe": [0, 1, 0]
-        }
+        results = [(["repo1", "Java", 10], {"Alice": [1, 0, 2]})]
 
         # Act
-        update_author_count(commits, author_counts, test_files, index_to_update=1)
+        files = self._aggregate(results, flush=False)
 
         # Assert
-        self.assertEqual(author_counts, expected_counts)
+        self.assertEqual(files, {})
 
-    @patch('src.mining.csv_export.file_utils.read_csv')
-    @patch('src.mining.csv_export.file_utils.write_csv')
-    def test_anonymyse_authors_single_authors(self, mock_write_csv, mock_read_csv):
+    def test_results_aggregator_writes_at_checkpoints(self):
         # Arrange
-        mock_read_csv.return_value = [{"Author": "Alice", "Test Before": "5", "Test After": "3", "Test During": "2"}]
+        results = [([f"repo{i}", "Java", i], {"Alice": [1, 0, 0]}) for i in range(5)]
+
+        # Act
+        files = self._aggregate(results, checkpoint_interval=2, flush=False)
+
+        # Assert
+        # The last repository is only written when the aggregator is flushed
+        self.assertEqual([row[0] for row in files["repo_data.csv"][1:]], ["repo0", "repo1", "repo2", "repo3"])
+        self.assertEqual(files["author_data.csv"][1:], [["Alice", "4", "0", "0"]])
 
-        expected_data = [csv_export.AUTHOR_HEADER, ["1", "5", "3", "2"]]
+    @patch("src.mining.csv_export.file_utils.replace_csv")
+    def test_results_aggregator_flush_without_new_results(self, mock_replace_csv):
+        # Arrange
+        aggregator = ResultsAggregator()
 
         # Act
-        anonymyse_authors()
+        aggregator.flush()
 
         # Assert
-        mock_write_csv.assert_called_once_with(expected_data, 'author_data')
+        mock_replace_csv.assert_not_called()
+
 
-    @patch('src.mining.csv_export.file_utils.read_csv')
-    @patch('src.mining.csv_export.file_utils.write_csv')
-    def test_anonymyse_authors_multiple_authors(self, mock_write_csv, mock_read_csv):
+    def test_results_aggregator_orders_rows_by_position(self):
         # Arrange
-        mock_read_csv.return_value = [
-            {"Author": "Alice", "Test Before": "5", "Test After": "3", "Test During": "2"},
-            {"Author": "Bob", "Test Before": "8", "Test After": "2", "Test During": "1"},
-            {"Author": "Charlie", "Test Before": "2", "Test After": "6", "Test During": "4"}
+        results = [
+            (["repo2", "Java", 20], {"Bob": [1, 1, 1], "Alice": [0, 3, 0]}, (2,)),
+            (["repo1", "Java", 10], {"Alice": [1, 0, 2]}, (1,)),
         ]
 
-        expected_data = [
-            csv_export.AUTHOR_HEADER,
-            ["1", "5", "3", "2"],
-            ["2", "8", "2", "1"],
-            ["3", "2", "6", "4"]
-        ]
+        # Act
+        files = self._aggregate(results)
+
+        # Assert
+        self.assertEqual([row[0] for row in files["repo_data.csv"][1:]], ["repo1", "repo2"])
+        self.assertEqual(files["author_data.csv"][1:], [["Alice", "1", "3", "2"], ["Bob", "1", "1", "1"]])
+
+    def test_results_writer_with_concurrent_producers_writes_like_single_producer(self):
+        # Arrange
+        random.seed(4)
+        results = [([f"repo{i}", "Java", i, random.random()], {f"Author{random.randrange(40)}": [random.randrange(5), 1, 0] for _ in range(4)}, (0, i))
+                   for i in range(400)]
+        shuffled_results = random.sample(results, len(results))
+
+        async def produce_concurrently(aggregator, _):
+            writer = ResultsWriter(aggregator, queue_size=4)
+            writer.start()
+
+            async def producer(producer_results):
+                for result in producer_results:
+                    await asyncio.sleep(random.random() / 1000)
+                    await writer.submit(*result)
+
+            await asyncio.gather(*[producer(shuffled_results[i::16]) for i in range(16)])
+            await writer.close()
 
         # Act
-        anonymyse_authors()
+        single_producer_files = self._aggregate(results)
+        concurrent_files = self._aggregate(results, checkpoint_interval=7, flush=False, export=produce_concurrently)
 
         # Assert
-        mock_write_csv.assert_called_once_with(expected_data, 'author_data')
+        self.assertEqual(concurrent_files, single_producer_files)
+        self.assertEqual(len(concurrent_files["repo_data.csv"]), len(results) + 1)
 
-    @patch('src.mining.csv_export.file_utils.read_csv')
-    @patch('src.mining.csv_export.file_utils.write_csv')
-    def test_anonymyse_authors_empty_csv(self, mock_write_csv, mock_read_csv):
+    def test_results_writer_stops_producers_when_writing_fails(self):
         # Arrange
-        mock_read_csv.return_value = []
+        async def produce(aggregator, _):
+            writer = ResultsWriter(aggregator)
+            writer.start()
+            await writer.submit(["repo1", "Java", 10], {"Alice": [1, 0, 2]})
+            await asyncio.sleep(0)
+            with self.assertRaises(OSError):
+                await writer.submit(["repo2", "Java", 10], {"Alice": [1, 0, 2]})
+            with self.assertRaises(OSError):
+                await writer.close()
+
+        # Act
+        with patch("src.mining.csv_export.file_utils.replace_csv", side_effect=OSError("No space left on device")):
+            files = self._aggregate([], checkpoint_interval=1, flush=False, export=produce)
+
+        # Assert
+        self.assertEqual(files, {})
+
+
+    def test_read_anonymisation_key_keeps_generated_key(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Arrange
+            file_path = os.path.join(directory, "anonymisation.key")
+
+            # Act
+            first_key = read_anonymisation_key(file_path)
+            second_key = read_anonymisation_key(file_path)
+
+            # Assert
+            self.assertEqual(len(first_key), 32)
+            self.assertEqual(second_key, first_key)
+            self.assertEqual(os.listdir(directory), ["anonymisation.key"])
+
+    def test_anonymise_author(self):
+        # Act
+        author_ids = [anonymise_author(author, key) for author, key in [("Alice", KEY), ("Alice", KEY), ("Bob", KEY), ("Alice", bytes(32))]]
+
+        # Assert
+        self.assertEqual(author_ids[0], author_ids[1])
+        self.assertNotEqual(author_ids[0], author_ids[2])
+        self.assertNotEqual(author_ids[0], author_ids[3])
+        self.assertRegex(author_ids[0], f"^[0-9a-f]{{{csv_export.AUTHOR_ID_LENGTH}}}$")
+
+    def test_anonymise_author_counts(self):
+        # Arrange
+        author_counts = {"Bob": [0, 1, 0], "Alice": [1, 0, 2]}
+
+        # Act
+        result = anonymise_author_counts(author_counts, KEY)
+
+        # Assert
+        self.assertEqual(list(result.items()), [(_id("Bob"), [0, 1, 0]), (_id("Alice"), [1, 0, 2])])
 
+    @patch("src.mining.csv_export.anonymise_author", return_value="0" * csv_export.AUTHOR_ID_LENGTH)
+    def test_anonymise_author_counts_merges_authors_sharing_an_id(self, mock_anonymise_author):
         # Act
-        anonymyse_authors()
+        result = anonymise_author_counts({"Alice": [1, 0, 2], "Bob": [0, 1, 0]}, KEY)
 
         # Assert
-        mock_write_csv.assert_not_called()
+        self.assertEqual(result, {"0" * csv_export.AUTHOR_ID_LENGTH: [1, 1, 2]})
 
 
 if __name__ == "__main__":
@@ -0,0 +1,75 @@
+import unittest
+from src.models.file_handlers import CPlusPlusFileHandler, CSharpFileHandler, JavaFileHandler, KotlinFileHandler, PythonFileHandler
+
+from src.mining.implementation_index import ImplementationIndex
+
+class TestImplementationIndex(unittest.TestCase):
+
+    def test_get_implementation_file_across_source_roots(self):
+        # Arrange
+        layouts = [
+            (JavaFileHandler(), ["src/main/java/org/apache/Foo.java", "src/test/java/org/apache/FooTest.java"],
+             "src/test/java/org/apache/FooTest.java", "src/main/java/org/apache/Foo.java"),
+            (KotlinFileHandler(), ["app/src/main/kotlin/org/Parser.kt", "app/src/test/kotlin/org/ParserTests.kt"],
+             "app/src/test/kotlin/org/ParserTests.kt", "app/src/main/kotlin/org/Parser.kt"),
+            (CSharpFileHandler(), ["Project/Services/Service.cs", "Project.Tests/Services/ServiceTest.cs"],
+             "Project.Tests/Services/ServiceTest.cs", "Project/Services/Service.cs"),
+            (PythonFileHandler(), ["src/package/parser.py", "tests/test_parser.py"],
+             "tests/test_parser.py", "src/package/parser.py"),
+            (CPlusPlusFileHandler(), ["src/lexer.cpp", "test/lexer_test.cpp"],
+             "test/lexer_test.cpp", "src/lexer.cpp"),
+        ]
+
+        for file_handler, paths, test_file, expected in layouts:
+            # Act
+            result = ImplementationIndex(paths, file_handler).get_implementation_file(test_file)
+
+            # Assert
+            self.assertEqual(result, expected, file_handler.name)
+
+    def test_get_implementation_file_prefers_same_package(self):
+        # Arrange
+        paths = ["src/main/java/org/apache/io/Utils.java", "src/main/java/org/apache/net/Utils.java", "src/main/java/org/Utils.java"]
+        index = ImplementationIndex(paths, JavaFileHandler())
+
+        # Act
+        result = index.get_implementation_file("src/test/java/org/apache/net/UtilsTest.java")
+
+        # Assert
+        self.assertEqual(result, "src/main/java/org/apache/net/Utils.java")
+
+    def test_get_implementation_file_prefers_derived_path(self):
+        # Arrange
+        paths = ["module/src/org/Foo.java", "src/org/Foo.java"]
+        index = ImplementationIndex(paths, JavaFileHandler())
+
+        # Act
+        result = index.get_implementation_file("module/src/org/FooTest.java")
+
+        # Assert
+        self.assertEqual(result, "module/src/org/Foo.java")
+
+    def test_get_implementation_file_breaks_ties_deterministically(self):
+        # Arrange
+        paths = ["b/Foo.java", "a/Foo.java", "a/deeper/Foo.java"]
+
+        # Act
+        result = [ImplementationIndex(order, JavaFileHandler()).get_implementation_file("test/FooTest.java")
+                  for order in [paths, list(reversed(paths))]]
+
+        # Assert
+        self.assertEqual(result, ["a/Foo.java", "a/Foo.java"])
+
+    def test_get_implementation_file_without_implementation(self):
+        # Arrange
+        index = ImplementationIndex(["src/main/java/Bar.java", "src/test/java/FooTest.java"], JavaFileHandler())
+
+        # Act
+        result = index.get_implementation_file("src/test/java/FooTest.java")
+
+        # Assert
+        self.assertIsNone(result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,254 @@
+import asyncio
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+from src.models.file_handlers.JavaFileHandler import JavaFileHandler
+from src.models.MiningOptions import MiningOptions
+from src.models.Repository import Repository
+
+from src.mining.mining_executor import (
+    MiningExecutor,
+    MiningJob,
+    run_mining_job,
+    COMPLETED,
+    FAILED,
+    MEMORY_EXCEEDED,
+    TIMED_OUT,
+)
+
+# Functions run in supervised processes, which import them from this module
+
+def _sleep(seconds):
+    time.sleep(seconds)
+
+def _fail(_):
+    raise RuntimeError("Test exception")
+
+def _allocate(megabytes):
+    data = b"x" * (megabytes * 1024 * 1024)
+    time.sleep(30)
+    return data
+
+def _allocate_in_subprocess(megabytes):
+    subprocess.run([sys.executable, "-c", f"import time; data = b'x' * {megabytes * 1024 * 1024}; time.sleep(30)"])
+
+def _start_subprocess(pid_file):
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    with open(pid_file, "w", encoding="utf-8") as file:
+        file.write(str(process.pid))
+    time.sleep(30)
+
+def _create_temp_dir(path_file):
+    with open(path_file, "w", encoding="utf-8") as file:
+        file.write(tempfile.mkdtemp())
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # Killed processes stay zombies until their parent exits
+    with open(f"/proc/{pid}/stat", encoding="utf-8") as file:
+        return file.read().split(") ")[1][0] != "Z"
+
+class TestMiningExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = Repository(name="mock_repo", url="https://mock-repo.git")
+        self.final_date = datetime(2024, 1, 1)
+        log_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(log_dir.cleanup)
+        log_patcher = patch("src.infrastructure.configuration.log_path", os.path.join(log_dir.name, "log.txt"))
+        log_patcher.start()
+        self.addCleanup(log_patcher.stop)
+
+    def test_mining_job_from_repository(self):
+        # Act
+        job = MiningJob.from_repository(self.repo, JavaFileHandler(), self.final_date, force_mine=True)
+
+        # Assert
+        self.assertEqual(job.repo_name, "mock_repo")
+        self.assertEqual(job.repo_url, "https://mock-repo.git")
+        self.assertEqual(job.handler_name, "Java")
+        self.assertEqual(job.final_date, self.final_date)
+        self.assertTrue(job.force_mine)
+
+    def test_mining_job_is_picklable(self):
+        # Arrange
+        job = MiningJob.from_repository(self.repo, JavaFileHandler(), self.final_date, options=MiningOptions(incremental=True))
+
+        # Act
+        result = pickle.loads(pickle.dumps(job))
+
+        # Assert
+        self.assertEqual(result.repo_name, job.repo_name)
+        self.assertEqual(result.final_date, job.final_date)
+        self.assertTrue(result.options.incremental)
+
+    @patch("src.mining.commit_retrieval.store_repo_info")
+    def test_run_mining_job(self, mock_store_repo_info):
+        # Arrange
+        job = MiningJob.from_repository(self.repo, JavaFileHandler(), self.final_date, force_mine=True)
+
+        # Act
+        result = run_mining_job(job)
+
+        # Assert
+        self.assertEqual(result, "mock_repo")
+        repo, file_handler, final_date, force_mine, _ = mock_store_repo_info.call_args[0]
+        self.assertEqual(repo.url, "https://mock-repo.git")
+        self.assertIsInstance(file_handler, JavaFileHandler)
+        self.assertEqual(final_date, self.final_date)
+        self.assertTrue(force_mine)
+
+    @patch("src.mining.commit_retrieval.store_repo_info")
+    @patch("src.mining.mining_executor.ProcessPoolExecutor")
+    def test_mine_runs_job_on_pool(self, mock_pool, mock_store_repo_info):
+        # Arrange
+        mock_pool.side_effect = lambda max_workers, **_: ThreadPoolExecutor(max_workers)
+        job = MiningJob.from_repository(self.repo, JavaFileHandler())
+
+        # Act
+        with MiningExecutor(workers=2) as executor:
+            result = asyncio.run(executor.mine(job))
+
+        # Assert
+        self.assertEqual(result.repo_name, "mock_repo")
+        self.assertEqual(result.status, COMPLETED)
+        mock_pool.assert_called_once()
+        self.assertEqual(mock_pool.call_args.kwargs["max_workers"], 2)
+        mock_store_repo_info.assert_called_once()
+
+    def test_run_supervised_completes(self):
+        # Arrange
+        executor = MiningExecutor(workers=1, time_budget=30)
+
+        # Act
+        result = asyncio.run(executor._run_supervised(_sleep, 0))
+
+        # Assert
+        self.assertEqual(result, COMPLETED)
+
+    def test_run_supervised_with_failing_function(self):
+        # Arrange
+        executor = MiningExecutor(workers=1, time_budget=30)
+
+        # Act
+        result = asyncio.run(executor._run_supervised(_fail, None))
+
+        # Assert
+        self.assertEqual(result, FAILED)
+
+    def test_run_supervised_stops_function_over_time_budget(self):
+        # Arrange
+        executor = MiningExecutor(workers=1, time_budget=1)
+
+        # Act
+        start_time = time.time()
+        result = asyncio.run(executor._run_supervised(_sleep, 30))
+        duration = time.time() - start_time
+
+        # Assert
+        self.assertEqual(result, TIMED_OUT)
+        self.assertLess(duration, 10)
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "Reads the state of processes from /proc")
+    def test_run_supervised_stops_subprocesses_over_time_budget(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            pid_file = os.path.join(temp_dir, "pid")
+            executor = MiningExecutor(workers=1, time_budget=3)
+
+            # Act
+            result = asyncio.run(executor._run_supervised(_start_subprocess, pid_file))
+            with open(pid_file, encoding="utf-8") as file:
+                pid = int(file.read())
+
+        # Assert
+        self.assertEqual(result, TIMED_OUT)
+        self.assertFalse(_is_running(pid))
+
+    @unittest.skipIf(sys.platform == "win32", "Memory budgets are not supported on Windows")
+    def test_run_supervised_stops_function_over_memory_budget(self):
+        # Arrange
+        executor = MiningExecutor(workers=1, time_budget=30, memory_budget=200)
+
+        # Act
+        result = asyncio.run(executor._run_supervised(_allocate, 400))
+
+        # Assert
+        self.assertEqual(result, MEMORY_EXCEEDED)
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "Reads the memory of processes from /proc")
+    def test_run_supervised_stops_subprocesses_over_memory_budget(self):
+        # Arrange
+        executor = MiningExecutor(workers=1, time_budget=30, memory_budget=200)
+
+        # Act
+        start_time = time.monotonic()
+        result = asyncio.run(executor._run_supervised(_allocate_in_subprocess, 400))
+        duration = time.monotonic() - start_time
+
+        # Assert
+        self.assertEqual(result, MEMORY_EXCEEDED)
+        self.assertLess(duration, 20)
+
+    def test_run_supervised_removes_temporary_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Arrange
+            path_file = os.path.join(temp_dir, "path")
+            executor = MiningExecutor(workers=1, time_budget=30)
+
+            # Act
+            asyncio.run(executor._run_supervised(_create_temp_dir, path_file))
+            with open(path_file, encoding="utf-8") as file:
+                created_dir = file.read()
+
+        # Assert
+        self.assertTrue(os.path.basename(os.path.dirname(created_dir)).startswith("mining-"))
+        self.assertFalse(os.path.exists(created_dir))
+
+    @patch("src.mining.commit_retrieval.recover_repo_info", return_value=42)
+    @patch("src.mining.mining_executor.MiningExecutor._run_supervised", new_callable=AsyncMock, return_value=TIMED_OUT)
+    def test_mine_over_budget_keeps_mined_commits(self, mock_run_supervised, mock_recover_repo_info):
+        # Arrange
+        options = MiningOptions(incremental=True)
+        job = MiningJob.from_repository(self.repo, JavaFileHandler(), force_mine=True, options=options)
+
+        async def mine():
+            with MiningExecutor(workers=1, time_budget=5) as executor:
+                return await executor.mine(job)
+
+        # Act
+        result = asyncio.run(mine())
+
+        # Assert
+        self.assertEqual(result.status, TIMED_OUT)
+        self.assertEqual(result.commits_kept, 42)
+        mock_run_supervised.assert_called_once_with(run_mining_job, job)
+        repo, file_handler, final_date, force_mine, recovered_options = mock_recover_repo_info.call_args[0]
+        self.assertEqual(repo.name, "mock_repo")
+        self.assertIsInstance(file_handler, JavaFileHandler)
+        self.assertIsNone(final_date)
+        self.assertTrue(force_mine)
+        self.assertIs(recovered_options, options)
+
+    def test_mine_when_not_started(self):
+        # Arrange
+        executor = MiningExecutor(workers=1)
+        job = MiningJob.from_repository(self.repo, JavaFileHandler())
+
+        # Act, Assert
+        with self.assertRaises(RuntimeError):
+            asyncio.run(executor.mine(job))
+
+
+if __name__ == "__main__":
+    unittest.main()
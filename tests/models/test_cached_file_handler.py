@@ -0,0 +1,66 @@
+import unittest
+from src.models.file_handlers import (
+    CachedFileHandler,
+    CPlusPlusFileHandler,
+    CSharpFileHandler,
+    JavaFileHandler,
+    KotlinFileHandler,
+    PythonFileHandler
+)
+
+PATHS = [
+    "src/main/java/Main.java",
+    "src/test/java/MainTest.java",
+    "src/test/java/MainTests.java",
+    "Project.Tests/ServiceTest.cs",
+    "app/src/test/kotlin/ParserTest.kt",
+    "tests/test_parser.py",
+    "parser_test.py",
+    "src/lexer_test.cpp",
+    "test/LexerTest.cc",
+]
+
+class TestCachedFileHandler(unittest.TestCase):
+
+    def test_cached_file_handler_keeps_handler_rules(self):
+        for file_handler in [JavaFileHandler(), CSharpFileHandler(), KotlinFileHandler(), PythonFileHandler(), CPlusPlusFileHandler()]:
+            # Arrange
+            cached_file_handler = CachedFileHandler(file_handler)
+
+            # Act
+            result = [(cached_file_handler.is_test_file(path), cached_file_handler.get_implementation_file(path)) for path in PATHS * 2]
+
+            # Assert
+            expected = [(file_handler.is_test_file(path), file_handler.get_implementation_file(path)) for path in PATHS * 2]
+            self.assertEqual(result, expected, file_handler.name)
+            self.assertEqual(cached_file_handler.name, file_handler.name)
+            self.assertEqual(cached_file_handler.file_extensions, file_handler.file_extensions)
+
+    def test_cached_file_handler_counts_hits_and_misses(self):
+        # Arrange
+        cached_file_handler = CachedFileHandler(JavaFileHandler())
+
+        # Act
+        for _ in range(3):
+            cached_file_handler.is_test_file("src/MainTest.java")
+            cached_file_handler.get_implementation_file("src/MainTest.java")
+
+        # Assert
+        self.assertEqual(cached_file_handler.misses, 2)
+        self.assertEqual(cached_file_handler.hits, 4)
+
+    def test_cached_file_handler_forgets_least_recently_used_paths(self):
+        # Arrange
+        cached_file_handler = CachedFileHandler(JavaFileHandler(), max_size=2)
+
+        # Act
+        for path in ["ATest.java", "BTest.java", "CTest.java", "ATest.java"]:
+            cached_file_handler.get_implementation_file(path)
+
+        # Assert
+        self.assertEqual(cached_file_handler.misses, 4)
+        self.assertEqual(cached_file_handler.hits, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import pickle
+import unittest
+from datetime import datetime
+from src.models.CustomCommit import CustomCommit
+
+class TestCustomCommit(unittest.TestCase):
+
+    def test_custom_commit_has_no_dictionary(self):
+        # Act
+        commit = CustomCommit("abc123", ["File1.java", "File1Test.java"], "Author1", datetime(2023, 1, 1))
+
+        # Assert
+        self.assertFalse(hasattr(commit, "__dict__"))
+        self.assertEqual(commit.modified_files, ("File1.java", "File1Test.java"))
+        self.assertEqual(commit.size, 2)
+
+    def test_custom_commit_pickle(self):
+        # Arrange
+        commit = CustomCommit("abc123", ["File1.java"], "Author1", datetime(2023, 1, 1))
+
+        # Act
+        result = pickle.loads(pickle.dumps(commit))
+
+        # Assert
+        self.assertEqual((result.hash, result.modified_files, result.author, result.date, result.size),
+                         ("abc123", ("File1.java",), "Author1", datetime(2023, 1, 1), 1))
+
+    def test_custom_commit_set_state_of_dictionary_commit(self):
+        # Arrange
+        state = {"hash": "abc123", "modified_files": ["File1.java"], "author": "Author1", "date": datetime(2023, 1, 1), "size": 1}
+        commit = CustomCommit.__new__(CustomCommit)
+
+        # Act
+        commit.__setstate__(state)
+
+        # Assert
+        self.assertEqual((commit.hash, commit.modified_files, commit.author, commit.date, commit.size),
+                         ("abc123", ("File1.java",), "Author1", datetime(2023, 1, 1), 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import asyncio
+import csv
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+from src.infrastructure import configuration, file_utils
+from src.mining.commit_processing import RepoMetrics
+from src.mining.csv_export import anonymise_author, anonymise_author_counts, read_anonymisation_key
+from src.models.file_handlers.JavaFileHandler import JavaFileHandler
+from src.models.MiningOptions import MiningOptions
+from src.models.Repository import Repository
+
+from src.presentation.analysis_manager import AnalysisManager
+
+REPOSITORIES = [Repository(f"repo{i}", f"https://repo{i}.git") for i in range(6)]
+
+def _process_repository(repo_name, file_handler, store, anonymisation_key):
+    index = int(repo_name[len("repo"):])
+    # The first repositories take the longest, so they finish processing last
+    time.sleep(0.05 * (len(REPOSITORIES) - index))
+    if index == 3:
+        return None, 0.1
+    author_counts = anonymise_author_counts({f"Author{index}": [index, 0, 1], "Shared": [1, 0, 0]}, anonymisation_key)
+    return RepoMetrics(index, [index, 0, 1], [1.0, 0, 2.0, 1.0], author_counts), 0.1
+
+def _read_rows(file_path):
+    with open(file_path, "r", encoding="utf-8") as file:
+        return list(csv.reader(file))
+
+class TestAnalysisManager(unittest.TestCase):
+
+    def setUp(self):
+        configuration.setup_logging()
+        store_patcher = patch("src.presentation.analysis_manager.AnalysisManager._store_repo_data", new_callable=AsyncMock)
+        store_patcher.start()
+        self.addCleanup(store_patcher.stop)
+        # The runs of a test share their anonymisation key, as the runs of a project do
+        key_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(key_directory.cleanup)
+        key_patcher = patch("src.mining.csv_export.file_utils.ANONYMISATION_KEY_PATH", os.path.join(key_directory.name, "anonymisation.key"))
+        key_patcher.start()
+        self.addCleanup(key_patcher.stop)
+
+    def _export(self, processing_workers, checkpoint_interval=None):
+        analysis_manager = AnalysisManager(datetime(2024, 12, 1), workers=0, processing_workers=processing_workers,
+                                           checkpoint_interval=checkpoint_interval)
+        with tempfile.TemporaryDirectory() as directory, \
+             patch("src.mining.commit_processing.process_repository", side_effect=_process_repository), \
+             patch("src.mining.csv_export.REPO_CSV_PATH", os.path.join(directory, "repo_data.csv")), \
+             patch("src.mining.csv_export.AUTHOR_CSV_PATH", os.path.join(directory, "author_data.csv")), \
+             patch("src.mining.csv_export.file_utils.replace_csv", wraps=file_utils.replace_csv) as mock_replace_csv:
+            asyncio.run(analysis_manager._process_repositories(REPOSITORIES, JavaFileHandler(), batch_size=2, force_mine=False))
+            exports = (_read_rows(os.path.join(directory, "repo_data.csv")), _read_rows(os.path.join(directory, "author_data.csv")))
+        return exports, mock_replace_csv.call_count
+
+    def test_process_repositories_in_parallel_exports_like_serial_run(self):
+        # Arrange
+        serial_exports, _ = self._export(processing_workers=0)
+
+        # Act
+        # Threads stand in for the worker processes, which would not see the patched processing
+        with patch("src.presentation.analysis_manager.ProcessPoolExecutor", side_effect=lambda max_workers, **_: ThreadPoolExecutor(max_workers)):
+            parallel_exports, _ = self._export(processing_workers=3)
+
+        # Assert
+        self.assertEqual(parallel_exports, serial_exports)
+        repo_rows, author_rows = parallel_exports
+        self.assertEqual([row[0] for row in repo_rows[1:]], ["repo0", "repo1", "repo2", "repo4", "repo5"])
+        self.assertIn([anonymise_author("Shared", read_anonymisation_key()), "5", "0", "0"], author_rows)
+
+    def test_process_repositories_writes_results_once_per_run(self):
+        # Act
+        _, write_count = self._export(processing_workers=0)
+
+        # Assert
+        # Once for the repository file and once for the author file
+        self.assertEqual(write_count, 2)
+
+    def test_process_repositories_writes_results_at_checkpoints(self):
+        # Act
+        exports, write_count = self._export(processing_workers=0, checkpoint_interval=2)
+
+        # Assert
+        # Two checkpoints for the four repositories with results, then the last repository when the run ends
+        self.assertEqual(write_count, 6)
+        self.assertEqual(exports, self._export(processing_workers=0)[0])
+
+    @patch("src.presentation.analysis_manager.run_pipeline", new_callable=AsyncMock)
+    def test_process_repositories_mines_on_every_worker(self, mock_run_pipeline):
+        # Arrange
+        analysis_manager = AnalysisManager(datetime(2024, 12, 1), workers=3)
+
+        # Act
+        asyncio.run(analysis_manager._process_repositories(REPOSITORIES, JavaFileHandler(), batch_size=2, force_mine=False))
+
+        # Assert
+        _, worker_count, _, _ = mock_run_pipeline.call_args.args
+        self.assertEqual(worker_count, 3)
+        self.assertEqual(mock_run_pipeline.call_args.kwargs, {"queue_size": 2})
+
+    @patch("src.presentation.analysis_manager.os.cpu_count", return_value=8)
+    @patch("src.presentation.analysis_manager.run_pipeline", new_callable=AsyncMock)
+    def test_process_repositories_caps_shards_by_cpu_cores(self, mock_run_pipeline, mock_cpu_count):
+        # Arrange
+        analysis_manager = AnalysisManager(datetime(2024, 12, 1), workers=3, mining_options=MiningOptions(shards=8))
+
+        # Act
+        asyncio.run(analysis_manager._process_repositories(REPOSITORIES, JavaFileHandler(), batch_size=2, force_mine=False))
+        retrieve = mock_run_pipeline.call_args.args[2]
+        with patch("src.presentation.analysis_manager.AnalysisManager._store_repo_data", new_callable=AsyncMock) as mock_store_repo_data:
+            asyncio.run(retrieve(REPOSITORIES[0]))
+
+        # Assert
+        # Three repositories are mined at a time, with two windows each
+        self.assertEqual(mock_store_repo_data.call_args.args[4].shards, 2)
+        self.assertEqual(analysis_manager.mining_options.shards, 8)
+
+if __name__ == "__main__":
+    unittest.main()